@@ -0,0 +1,47 @@
+"""
+Adaptive sampling
+Sheds storage and printing of low-severity lines when the parser falls behind
+"""
+
+from typing import Optional
+
+
+class AdaptiveSampler:
+    """Decide which low-severity entries to keep while the parser is lagging"""
+
+    # Levels that are sampled under load; everything else is always kept
+    SAMPLED_LEVELS = ('info', 'debug')
+
+    def __init__(self, lag_threshold: Optional[float] = 30.0,
+                 depth_threshold: Optional[int] = 10000,
+                 min_rate: float = 0.01):
+        self.lag_threshold = lag_threshold
+        self.depth_threshold = depth_threshold
+        self.min_rate = min_rate
+        self.rate = 1.0
+        self._credit = 0.0
+
+    def update(self, lag: float = 0.0, depth: int = 0) -> float:
+        """
+        Recompute the sampling rate from the current lag and queue depth.
+
+        The rate is the smaller of threshold/observed for each signal, so
+        twice the allowed lag keeps half of the low-severity entries.
+        """
+        rate = 1.0
+        if self.lag_threshold and lag > self.lag_threshold:
+            rate = min(rate, self.lag_threshold / lag)
+        if self.depth_threshold and depth > self.depth_threshold:
+            rate = min(rate, self.depth_threshold / depth)
+        self.rate = max(rate, self.min_rate)
+        return self.rate
+
+    def should_store(self, level: str) -> bool:
+        """Keep every high-severity entry and a deterministic fraction of the rest"""
+        if self.rate >= 1.0 or level not in self.SAMPLED_LEVELS:
+            return True
+        self._credit += self.rate
+        if self._credit >= 1.0:
+            self._credit -= 1.0
+            return True
+        return False
@@ -0,0 +1,333 @@
+"""
+Alert dispatcher
+Delivers alerts to webhook, SMTP and file channels from one background worker
+per channel. Each channel batches, keeps its connection open between batches
+and retries with exponential backoff; batches that still fail are appended to
+a dead-letter file. Dispatching never blocks the ingestion path.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class AlertChannel(ABC):
+    """Base channel: a bounded queue drained in batches by a worker thread"""
+
+    kind = 'channel'
+
+    def __init__(self, name: Optional[str] = None, batch_size: int = 100,
+                 flush_interval: float = 2.0, queue_size: int = 10000,
+                 max_attempts: int = 5, initial_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.name = name or self.kind
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.queue = queue.Queue(queue_size)
+        self.stats = {'sent': 0, 'failed_attempts': 0, 'dead_lettered': 0, 'dropped': 0, 'batches': 0}
+        self.dispatcher = None
+        self.thread = None
+        self.stopping = threading.Event()
+
+    @abstractmethod
+    def deliver(self, alerts: List[Dict]):
+        """Send one batch; raises on failure"""
+
+    def close(self):
+        """Release the channel's connection"""
+
+    def _next_batch(self) -> List[Dict]:
+        """Collect alerts until the batch is full or the flush interval passes"""
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            timeout = self.flush_interval if deadline is None else deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                alert = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if alert is None:
+                self.stopping.set()
+                break
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            batch.append(alert)
+        return batch
+
+    def _send(self, batch: List[Dict]):
+        """Deliver a batch with retries, dead-lettering it once attempts run out"""
+        backoff = self.initial_backoff
+        for attempt in range(1, self.max_attempts + 1):
+            started = time.perf_counter()
+            try:
+                self.deliver(batch)
+            except Exception as e:
+                self.stats['failed_attempts'] += 1
+                self.dispatcher.record(self, 'failed', len(batch), time.perf_counter() - started)
+                if attempt == self.max_attempts or self.stopping.is_set():
+                    print(f"❌ Alert channel {self.name} gave up on {len(batch)} alert(s): {e}")
+                    self.stats['dead_lettered'] += len(batch)
+                    self.dispatcher.dead_letter(self, batch, e)
+                    return
+                print(f"⚠️  Alert channel {self.name} failed ({e}); retrying in {backoff:.1f}s")
+                # Waiting on the stop event lets shutdown cut a backoff short
+                self.stopping.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            self.stats['sent'] += len(batch)
+            self.stats['batches'] += 1
+            self.dispatcher.record(self, 'sent', len(batch), time.perf_counter() - started)
+            return
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._send(batch)
+            self.dispatcher.update_depth(self)
+            if self.stopping.is_set() and self.queue.empty():
+                self.close()
+                return
+
+    def start(self, dispatcher: 'AlertDispatcher'):
+        self.dispatcher = dispatcher
+        self.thread = threading.Thread(target=self._run, daemon=True, name=f"alerts-{self.name}")
+        self.thread.start()
+
+    def get_status(self) -> Dict:
+        return {'kind': self.kind, 'queued': self.queue.qsize(), **self.stats}
+
+
+class WebhookChannel(AlertChannel):
+    """POST batches as JSON ({"alerts": [...]}) over a keep-alive session"""
+
+    kind = 'webhook'
+
+    def __init__(self, url: str, headers: Optional[Dict] = None, timeout: float = 10.0, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.session = None
+
+    def deliver(self, alerts: List[Dict]):
+        if self.session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            self.session = requests.Session()
+            self.session.headers.update({'Content-Type': 'application/json', **self.headers})
+            # One worker per channel: a single pooled keep-alive connection
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+        response = self.session.post(self.url, data=json.dumps({'alerts': alerts}), timeout=self.timeout)
+        response.raise_for_status()
+
+    def close(self):
+        if self.session:
+            self.session.close()
+            self.session = None
+
+
+class SmtpChannel(AlertChannel):
+    """One email per batch over a reused SMTP connection"""
+
+    kind = 'smtp'
+
+    def __init__(self, host: str, recipients: List[str], port: int = 25,
+                 sender: str = 'log-monitor@localhost', username: Optional[str] = None,
+                 password: Optional[str] = None, starttls: bool = False, timeout: float = 10.0,
+                 **kwargs):
+        kwargs.setdefault('flush_interval', 30.0)
+        super().__init__(**kwargs)
+        self.host = host
+        self.port = port
+        self.recipients = recipients
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.connection = None
+
+    def _connect(self):
+        import smtplib
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password or '')
+        return connection
+
+    @staticmethod
+    def compose(alerts: List[Dict]) -> Dict[str, str]:
+        """Subject and body summarizing a batch"""
+        critical = sum(1 for alert in alerts if alert['level'] == 'critical')
+        subject = f"[log-monitor] {len(alerts)} alert(s)" + (f", {critical} critical" if critical else "")
+        body = "\n\n".join(
+            f"{alert['timestamp']} {alert['level'].upper()} {alert['source']} ({alert['framework']})\n"
+            f"{alert['message']}"
+            for alert in alerts
+        )
+        return {'subject': subject, 'body': body}
+
+    def deliver(self, alerts: List[Dict]):
+        from email.message import EmailMessage
+        import smtplib
+
+        content = self.compose(alerts)
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = ', '.join(self.recipients)
+        message['Subject'] = content['subject']
+        message.set_content(content['body'])
+
+        if self.connection is not None:
+            try:
+                self.connection.noop()
+            except (smtplib.SMTPException, OSError):
+                # Server closed the idle connection
+                self.connection = None
+        if self.connection is None:
+            self.connection = self._connect()
+        try:
+            self.connection.send_message(message)
+        except (smtplib.SMTPException, OSError):
+            self.close()
+            raise
+
+    def close(self):
+        if self.connection:
+            try:
+                self.connection.quit()
+            except Exception:
+                pass
+            self.connection = None
+
+
+class FileChannel(AlertChannel):
+    """Append alerts as NDJSON to a local file"""
+
+    kind = 'file'
+
+    def __init__(self, path: str, **kwargs):
+        kwargs.setdefault('flush_interval', 0.5)
+        super().__init__(**kwargs)
+        self.path = Path(path)
+
+    def deliver(self, alerts: List[Dict]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(''.join(json.dumps(alert) + '\n' for alert in alerts))
+
+
+class AlertDispatcher:
+    """Fans alerts out to every channel's queue"""
+
+    def __init__(self, channels: List[AlertChannel], dead_letter_path: str = "alerts-dead-letter.ndjson",
+                 metrics=None):
+        self.channels = channels
+        self.dead_letter_path = Path(dead_letter_path)
+        self.dead_letter_lock = threading.Lock()
+        self.metrics = metrics
+        names = [channel.name for channel in channels]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Alert channel names must be unique: {names}")
+
+    def dispatch(self, level: str, message: str, source: str, framework: str):
+        """Queue an alert on every channel; a full channel queue drops it"""
+        alert = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'level': level,
+            'source': source,
+            'framework': framework,
+            'message': message
+        }
+        for channel in self.channels:
+            try:
+                channel.queue.put_nowait(alert)
+            except queue.Full:
+                channel.stats['dropped'] += 1
+                self.record(channel, 'dropped', 1)
+
+    def record(self, channel: AlertChannel, outcome: str, count: int, seconds: Optional[float] = None):
+        """Count a delivery outcome and, for attempts, their latency"""
+        if not self.metrics:
+            return
+        self.metrics.alert_deliveries.labels(channel=channel.name, outcome=outcome).inc(count)
+        if seconds is not None:
+            self.metrics.alert_delivery_seconds.labels(channel=channel.name).observe(seconds)
+
+    def update_depth(self, channel: AlertChannel):
+        if self.metrics:
+            self.metrics.alert_queue_depth.labels(channel=channel.name).set(channel.queue.qsize())
+
+    def dead_letter(self, channel: AlertChannel, alerts: List[Dict], error: Exception):
+        """Append undeliverable alerts to the dead-letter file"""
+        self.record(channel, 'dead_lettered', len(alerts))
+        failed_at = datetime.now().isoformat(timespec='seconds')
+        lines = ''.join(
+            json.dumps({'channel': channel.name, 'failed_at': failed_at, 'error': str(error), 'alert': alert}) + '\n'
+            for alert in alerts
+        )
+        with self.dead_letter_lock:
+            if self.dead_letter_path.parent != Path('.'):
+                self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.dead_letter_path, 'a') as f:
+                f.write(lines)
+
+    def start(self):
+        for channel in self.channels:
+            channel.start(self)
+
+    def stop(self, timeout: float = 10.0):
+        """Flush queued alerts (delivered or dead-lettered) and stop the workers"""
+        for channel in self.channels:
+            if channel.thread:
+                channel.queue.put(None)
+        deadline = time.monotonic() + timeout
+        for channel in self.channels:
+            if channel.thread:
+                channel.thread.join(max(0.0, deadline - time.monotonic()))
+                channel.thread = None
+
+    def get_status(self) -> Dict:
+        return {
+            'channels': {channel.name: channel.get_status() for channel in self.channels},
+            'dead_letter': str(self.dead_letter_path)
+        }
+
+
+def build_channels(webhooks: Optional[List[str]] = None, files: Optional[List[str]] = None,
+                   smtp_host: Optional[str] = None, recipients: Optional[List[str]] = None,
+                   sender: Optional[str] = None) -> List[AlertChannel]:
+    """Channels from command-line style options; SMTP credentials come from the environment"""
+    channels: List[AlertChannel] = []
+    for number, url in enumerate(webhooks or [], 1):
+        channels.append(WebhookChannel(url, name='webhook' if number == 1 else f'webhook-{number}'))
+    for number, path in enumerate(files or [], 1):
+        channels.append(FileChannel(path, name='file' if number == 1 else f'file-{number}'))
+    if smtp_host:
+        if not recipients:
+            raise ValueError("SMTP alerts need at least one recipient")
+        host, _, port = smtp_host.partition(':')
+        channels.append(SmtpChannel(
+            host,
+            recipients,
+            port=int(port or os.environ.get('SMTP_PORT', 25)),
+            sender=sender or os.environ.get('SMTP_SENDER', 'log-monitor@localhost'),
+            username=os.environ.get('SMTP_USERNAME'),
+            password=os.environ.get('SMTP_PASSWORD'),
+            starttls=os.environ.get('SMTP_STARTTLS', '').lower() in ('1', 'true', 'yes')
+        ))
+    return channels
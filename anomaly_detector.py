@@ -0,0 +1,102 @@
+"""
+Streaming rate anomaly detector
+Keeps an EWMA baseline per (source, level) rate series and scores deviations
+"""
+
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class EwmaSeries:
+    """Exponentially weighted mean/variance of one rate series"""
+
+    __slots__ = ('mean', 'variance', 'samples', 'last_count', 'last_alert')
+
+    def __init__(self, count: int):
+        self.mean = 0.0
+        self.variance = 0.0
+        self.samples = 0
+        self.last_count = count
+        self.last_alert = 0.0
+
+    def update(self, value: float, alpha: float):
+        """Fold a new observation into the baseline"""
+        if self.samples == 0:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.variance = (1 - alpha) * (self.variance + diff * increment)
+        self.samples += 1
+
+
+class RateAnomalyDetector:
+    """Flag statistically significant changes in per-series log rates"""
+
+    def __init__(self, interval: float = 10.0, alpha: float = 0.1,
+                 threshold: float = 4.0, warmup: int = 12,
+                 min_std: float = 0.05, cooldown: float = 300.0):
+        self.interval = interval
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.min_std = min_std
+        self.cooldown = cooldown
+        self.series: Dict[Tuple[str, str], EwmaSeries] = {}
+        self.last_tick: Optional[float] = None
+
+    def due(self, now: float) -> bool:
+        """Check whether a detection tick should run"""
+        return self.last_tick is None or now - self.last_tick >= self.interval
+
+    def tick(self, counts: Dict[Tuple[str, str], int],
+             now: Optional[float] = None) -> List[Dict]:
+        """
+        Score every series against its baseline.
+
+        Args:
+            counts: Cumulative line counts keyed by (source, level)
+            now: Tick time, defaults to time.time()
+
+        Returns:
+            A score record per series; records with 'anomaly' set crossed the threshold
+        """
+        now = time.time() if now is None else now
+        elapsed = None if self.last_tick is None else now - self.last_tick
+        self.last_tick = now
+
+        results = []
+        for key, count in counts.items():
+            series = self.series.get(key)
+            if series is None:
+                self.series[key] = EwmaSeries(count)
+                continue
+            if not elapsed:
+                series.last_count = count
+                continue
+
+            rate = (count - series.last_count) / elapsed
+            series.last_count = count
+
+            score = 0.0
+            if series.samples >= self.warmup:
+                std = max(math.sqrt(series.variance), self.min_std)
+                score = (rate - series.mean) / std
+
+            anomaly = abs(score) >= self.threshold and now - series.last_alert >= self.cooldown
+            if anomaly:
+                series.last_alert = now
+
+            results.append({
+                'source': key[0],
+                'level': key[1],
+                'rate': rate,
+                'baseline': series.mean,
+                'score': score,
+                'anomaly': anomaly
+            })
+            series.update(rate, self.alpha)
+
+        return results
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Batch Analyzer
+One-shot analysis of log files: no metrics server, no file watcher.
+Prints a JSON or CSV summary and exits.
+"""
+
+import argparse
+import csv
+import glob
+import json
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from log_parser import LogParser
+
+# Variable parts of a message, replaced to group errors by template
+TEMPLATE_SUBSTITUTIONS = [
+    (re.compile(r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?'), '<ts>'),
+    (re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}\b'), '<ip>'),
+    (re.compile(r'"[^"]*"'), '"<str>"'),
+    (re.compile(r"'[^']*'"), "'<str>'"),
+    (re.compile(r'\b\d+(?:\.\d+)?'), '<n>'),
+]
+
+
+def message_template(line: str) -> str:
+    """Collapse timestamps, IPs, quoted strings and numbers into placeholders"""
+    for pattern, placeholder in TEMPLATE_SUBSTITUTIONS:
+        line = pattern.sub(placeholder, line)
+    return line
+
+
+def expand_paths(patterns: List[str]) -> List[Path]:
+    """Expand files and globs (including ** patterns) into a sorted file list"""
+    paths = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True)
+        if not matches and Path(pattern).is_file():
+            matches = [pattern]
+        paths.update(Path(match) for match in matches if Path(match).is_file())
+    return sorted(paths)
+
+
+def read_lines(path: Path) -> Iterator[bytes]:
+    """Stream raw lines from a plain or gzip-compressed file"""
+    if path.suffix == '.gz':
+        import gzip
+        opener = gzip.open
+    else:
+        opener = open
+    with opener(path, 'rb') as f:
+        yield from f
+
+
+class BatchAnalyzer:
+    """Classify every line of a set of files and summarize the results"""
+
+    def __init__(self, top: int = 10, multiline: bool = False):
+        # Same record boundaries as the live parser unless multiline is asked for
+        self.parser = LogParser(extract_fields=False, detect_anomalies=False, monitoring=False,
+                                multiline=multiline)
+        self.top = top
+        self.levels = Counter()
+        self.sources = Counter()
+        self.frameworks = Counter()
+        self.error_templates = Counter()
+        self.lines = 0
+        self.files = 0
+
+    def analyze_file(self, path: Path):
+        """Classify every line of one file"""
+        classify = self.parser.classify_line
+        assembler = self.parser.assembler
+        source = path.name[:-3] if path.suffix == '.gz' else path.name
+        lines = read_lines(path)
+        if assembler:
+            # Stack traces are joined to their first line, counted as one record
+            read_before = assembler.stats['lines']
+            lines = assembler.assemble(str(path), lines)
+        for line in lines:
+            if not assembler:
+                self.lines += 1
+            record = classify(line, source)
+            if not record:
+                continue
+            level = record['level']
+            self.levels[level] += 1
+            self.sources[source] += 1
+            self.frameworks[record['framework']] += 1
+            if level in ('error', 'critical'):
+                self.error_templates[message_template(self.parser.record_text(record).split('\n', 1)[0])] += 1
+        if assembler:
+            self.lines += assembler.stats['lines'] - read_before
+        self.files += 1
+
+    def analyze(self, paths: List[Path]) -> Dict:
+        """Analyze every file and return the summary"""
+        start = time.perf_counter()
+        for path in paths:
+            self.analyze_file(path)
+        elapsed = time.perf_counter() - start
+
+        return {
+            'files': self.files,
+            'lines': self.lines,
+            'classified': sum(self.levels.values()),
+            'levels': dict(self.levels),
+            'sources': dict(self.sources),
+            'frameworks': dict(self.frameworks),
+            'top_error_templates': [
+                {'template': template, 'count': count}
+                for template, count in self.error_templates.most_common(self.top)
+            ],
+            'timings': {
+                'elapsed_seconds': round(elapsed, 6),
+                'lines_per_second': round(self.lines / elapsed, 1) if elapsed else None
+            }
+        }
+
+
+def write_csv(summary: Dict, output):
+    """Flatten a summary into section,key,value rows"""
+    writer = csv.writer(output)
+    writer.writerow(['section', 'key', 'value'])
+    for key in ('files', 'lines', 'classified'):
+        writer.writerow(['totals', key, summary[key]])
+    for section in ('levels', 'sources', 'frameworks'):
+        for key, value in sorted(summary[section].items()):
+            writer.writerow([section, key, value])
+    for item in summary['top_error_templates']:
+        writer.writerow(['top_error_templates', item['template'], item['count']])
+    for key, value in summary['timings'].items():
+        writer.writerow(['timings', key, value])
+
+
+def main(argv=None) -> int:
+    """Main function"""
+    parser = argparse.ArgumentParser(description="One-shot batch log analysis")
+    parser.add_argument('paths', nargs='+', help="Log files or glob patterns (quote globs)")
+    parser.add_argument('--format', choices=['json', 'csv'], default='json')
+    parser.add_argument('--top', type=int, default=10, help="Number of error templates to report")
+    parser.add_argument('--multiline', action='store_true',
+                        help="Join stack traces and continuation lines into one record")
+    args = parser.parse_args(argv)
+
+    paths = expand_paths(args.paths)
+    if not paths:
+        print("❌ No matching files", file=sys.stderr)
+        return 1
+
+    summary = BatchAnalyzer(args.top, args.multiline).analyze(paths)
+    if args.format == 'csv':
+        write_csv(summary, sys.stdout)
+    else:
+        print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Classifier Benchmark
+Golden-corpus equivalence checks and ns/line micro-benchmarks for the
+log level / framework classifiers
+"""
+
+import argparse
+import json
+import random
+import re
+import statistics
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent
+CORPUS_PATH = ROOT / "examples" / "classifier_corpus.jsonl"
+FIXED_TIMESTAMP = "2025-07-05 12:00:00"
+
+# Hand-picked lines covering branches the generated corpus does not reach
+EXTRA_LINES = [
+    "",
+    "plain line without any level marker",
+    "2025-07-05 12:00:00 DEBUG flask.app: request context pushed",
+    "2025-07-05 12:00:00.123  ERROR 1234 --- [main] org.springframework.boot.SpringApplication : Application run failed",
+    "[2025-07-05 12:00:00] production.ERROR: Laravel production channel",
+    "[2025-07-05 12:00:00] local.DEBUG: laravel.debug: cache miss",
+    "ERROR: 2025-07-05 12:00:00 - FastAPI startup failed",
+    "INFO: 2025-07-05 12:00:00 - FastAPI application started",
+    "[2025-07-05 12:00:00] [WARN] express.router: deprecated route",
+    "Started service in 1.2s",
+    "Completed 200 OK in 12ms",
+    "java.lang.IllegalStateException: Exception in thread main",
+    "warning: lowercase markers still match case-insensitively",
+    "fatal: repository not found",
+    "Traceback (most recent call last):",
+    "  File \"app.py\", line 10, in <module>",
+    "    at com.example.Service.run(Service.java:42)",
+    "Caused by: java.io.IOException: Failed to read",
+]
+
+
+class _MissingAsZero(dict):
+    """format_map helper that renders unknown template fields as 0"""
+
+    def __missing__(self, key):
+        return "0"
+
+
+def build_corpus_lines(seed=0, variants=3):
+    """Render simulator templates, ansible messages and example files into lines"""
+    from production_log_simulator import ProductionLogSimulator
+
+    lines = []
+    random.seed(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        simulator = ProductionLogSimulator(directory)
+        formatter = string.Formatter()
+        for levels in simulator.log_templates.values():
+            for templates in levels.values():
+                for template in templates:
+                    for _ in range(variants):
+                        values = _MissingAsZero(simulator.generate_sample_values())
+                        values["timestamp"] = FIXED_TIMESTAMP
+                        lines.append(formatter.vformat(template, (), values))
+
+    playbook = yaml.safe_load((ROOT / "ansible" / "simulate_logs.yml").read_text())
+    for play in playbook:
+        for messages in play.get("vars", {}).get("log_messages", {}).values():
+            for message in messages:
+                message = re.sub(r"\{\{.*?\}\}", "1751716800", message)
+                lines.append(f"2025-07-05T12:00:00 {message}")
+
+    for example in sorted((ROOT / "examples").glob("*.txt")):
+        lines.extend(line.rstrip("\n") for line in example.read_text().splitlines())
+
+    lines.extend(EXTRA_LINES)
+    return lines
+
+
+def load_reference():
+    """The LogParser classifiers (detect_log_level, detect_framework)"""
+    from log_parser import LogParser
+    parser = LogParser(extract_fields=False, detect_anomalies=False, monitoring=False)
+    return parser.detect_log_level, parser.detect_framework
+
+
+def load_bytes():
+    """The LogParser classifiers on raw bytes lines, as read by the hot path (timings include encoding)"""
+    detect_level, detect_framework = load_reference()
+    return (lambda line: detect_level(line.encode("utf-8")),
+            lambda line: detect_framework(line.encode("utf-8")))
+
+
+# Classifier implementations: name -> loader returning (level_fn, framework_fn).
+# Faster engines register here to be checked against the golden corpus.
+IMPLEMENTATIONS = {
+    "reference": load_reference,
+    "bytes": load_bytes,
+}
+
+
+def write_corpus(path=CORPUS_PATH, seed=0):
+    """Label the corpus with the reference classifiers and write it as JSONL"""
+    detect_level, detect_framework = load_reference()
+    with open(path, "w", encoding="utf-8") as f:
+        for line in build_corpus_lines(seed):
+            record = {
+                "line": line,
+                "level": detect_level(line),
+                "framework": detect_framework(line)
+            }
+            f.write(json.dumps(record) + "\n")
+
+
+def load_corpus(path=CORPUS_PATH):
+    """Read the golden corpus"""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def check_equivalence(name, corpus):
+    """
+    Compare an implementation against the golden labels.
+
+    Returns:
+        A list of (line, expected, actual) mismatches
+    """
+    detect_level, detect_framework = IMPLEMENTATIONS[name]()
+    mismatches = []
+    for record in corpus:
+        actual = (detect_level(record["line"]), detect_framework(record["line"]))
+        expected = (record["level"], record["framework"])
+        if actual != expected:
+            mismatches.append((record["line"], expected, actual))
+    return mismatches
+
+
+def benchmark(name, lines, runs=7, warmup=1):
+    """
+    Time both classifiers over the corpus.
+
+    Returns:
+        (mean, stdev) of ns/line across runs
+    """
+    detect_level, detect_framework = IMPLEMENTATIONS[name]()
+    timings = []
+    for run in range(warmup + runs):
+        start = time.perf_counter_ns()
+        for line in lines:
+            detect_level(line)
+            detect_framework(line)
+        elapsed = time.perf_counter_ns() - start
+        if run >= warmup:
+            timings.append(elapsed / len(lines))
+    return statistics.mean(timings), statistics.stdev(timings) if len(timings) > 1 else 0.0
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Classifier equivalence and micro-benchmark")
+    parser.add_argument("--build", action="store_true",
+                        help="Regenerate the golden corpus from the reference classifiers")
+    parser.add_argument("--check", action="store_true",
+                        help="Only check equivalence; exit 1 on any mismatch")
+    parser.add_argument("--implementation", action="append", choices=list(IMPLEMENTATIONS),
+                        help="Implementation to check/benchmark (repeatable; default: all)")
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.build:
+        write_corpus()
+        print(f"📝 Golden corpus written to {CORPUS_PATH}")
+        return 0
+
+    corpus = load_corpus()
+    lines = [record["line"] for record in corpus]
+    names = args.implementation or list(IMPLEMENTATIONS)
+    print(f"🧪 Golden corpus: {len(corpus)} lines")
+
+    failed = False
+    for name in names:
+        mismatches = check_equivalence(name, corpus)
+        if mismatches:
+            failed = True
+            print(f"❌ {name}: {len(mismatches)} mismatch(es)")
+            for line, expected, actual in mismatches[:10]:
+                print(f"   {line[:80]!r}: expected {expected}, got {actual}")
+            continue
+        print(f"✅ {name}: equivalent")
+
+        if not args.check:
+            mean, stdev = benchmark(name, lines, args.runs)
+            print(f"   ⏱️  {mean:,.0f} ns/line ± {stdev:,.0f}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
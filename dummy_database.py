@@ -1,28 +1,93 @@
+from collections import deque
 from datetime import datetime
+from heapq import merge, nlargest
+from itertools import chain, islice
 from typing import Dict, List, Optional
+import sys
 import threading
+import time
+
+# Retention tiers: how long entries of each level are kept, and the share of
+# the memory budget each level may hold before it is evicted from first
+DEFAULT_RETENTION = {
+    'critical': {'max_age': 24 * 3600, 'share': 0.35},
+    'error': {'max_age': 6 * 3600, 'share': 0.30},
+    'warning': {'max_age': 3600, 'share': 0.20},
+    'info': {'max_age': 300, 'share': 0.10},
+    'debug': {'max_age': 60, 'share': 0.05}
+}
+DEFAULT_BUDGET_BYTES = 64 * 1024 * 1024
+
+# Approximate bytes of an entry besides its message: the dict and two datetimes
+ENTRY_OVERHEAD = sys.getsizeof(dict.fromkeys(
+    ('timestamp', 'event_time', 'level', 'message', 'source', 'framework', 'alert_sent')
+)) + 2 * sys.getsizeof(datetime.now()) + 64
 
 
 class DummyDatabase:
-    def __init__(self):
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES, retention: Optional[Dict] = None):
         self.lock = threading.Lock()
         self.storage = {
-            'entries': [],
+            # level -> deque of (sequence, inserted_at, size, entry), oldest first
+            'tiers': {},
             'statistics': {
                 'total_entries': 0,
                 'error_count': 0,
                 'warning_count': 0,
                 'info_count': 0,
                 'debug_count': 0,
+                'evicted_entries': 0,
                 'last_processed': None
             }
         }
+        self.sequence = 0
+        self.tier_bytes: Dict[str, int] = {}
+        self.total_bytes = 0
+        self.configure_retention(budget_bytes, retention)
+    
+    def configure_retention(self, budget_bytes: int = DEFAULT_BUDGET_BYTES, retention: Optional[Dict] = None):
+        """Set the memory budget and per-level tiers (levels without a tier use 'info')"""
+        with self.lock:
+            self.budget_bytes = budget_bytes
+            self.retention = retention or DEFAULT_RETENTION
+            self._enforce(time.time())
+    
+    def _policy(self, level: str) -> Dict:
+        return self.retention.get(level) or self.retention.get('info') or {'max_age': None, 'share': 1.0}
+    
+    def _evict(self, level: str):
+        _, _, size, _ = self.storage['tiers'][level].popleft()
+        self.tier_bytes[level] -= size
+        self.total_bytes -= size
+        self.storage['statistics']['evicted_entries'] += 1
     
-    def add_log_entry(self, level: str, message: str, source: str = 'app.log', framework: str = 'unknown') -> bool:
-        """Add a log entry to the database"""
+    def _enforce(self, now: float):
+        """Drop aged-out heads, then evict from the tier most over its share until within budget"""
+        tiers = self.storage['tiers']
+        for level, tier in tiers.items():
+            max_age = self._policy(level)['max_age']
+            while tier and max_age is not None and now - tier[0][1] > max_age:
+                self._evict(level)
+        
+        while self.total_bytes > self.budget_bytes:
+            level = max(
+                (level for level, tier in tiers.items() if tier),
+                key=lambda level: self.tier_bytes[level] / (self._policy(level)['share'] * self.budget_bytes or 1)
+            )
+            self._evict(level)
+    
+    def _chronological(self, tiers=None):
+        """Retained entries across tiers in insertion order"""
+        tiers = self.storage['tiers'].values() if tiers is None else tiers
+        return (item[3] for item in merge(*tiers))
+    
+    def add_log_entry(self, level: str, message: str, source: str = 'app.log', framework: str = 'unknown',
+                      event_time: Optional[datetime] = None) -> bool:
+        """Add a log entry to the database (event_time is the timestamp parsed from the line)"""
         with self.lock:
             entry = {
                 'timestamp': datetime.now(),
+                'event_time': event_time,
                 'level': level.lower(),
                 'message': message,
                 'source': source,
@@ -30,7 +95,19 @@ class DummyDatabase:
                 'alert_sent': False
             }
             
-            self.storage['entries'].append(entry)
+            # Evicting as we insert keeps memory bounded without periodic sweeps
+            self.sequence += 1
+            now = time.time()
+            size = ENTRY_OVERHEAD + sys.getsizeof(message)
+            tier = self.storage['tiers'].get(entry['level'])
+            if tier is None:
+                tier = self.storage['tiers'][entry['level']] = deque()
+                self.tier_bytes[entry['level']] = 0
+            tier.append((self.sequence, now, size, entry))
+            self.tier_bytes[entry['level']] += size
+            self.total_bytes += size
+            self._enforce(now)
+            
             self.storage['statistics']['total_entries'] += 1
             self.storage['statistics']['last_processed'] = datetime.now()
             
@@ -44,14 +121,14 @@ class DummyDatabase:
     def get_recent_entries(self, limit: int = 100) -> List[Dict]:
         """Get recent log entries"""
         with self.lock:
-            return self.storage['entries'][-limit:]
+            tails = [islice(tier, max(len(tier) - limit, 0), None) for tier in self.storage['tiers'].values()]
+            return [item[3] for item in sorted(nlargest(limit, chain(*tails)))]
     
     def get_entries_by_level(self, level: str, limit: int = 50) -> List[Dict]:
         """Get entries filtered by log level"""
         with self.lock:
-            filtered = [entry for entry in self.storage['entries'] 
-                       if entry['level'] == level.lower()]
-            return filtered[-limit:]
+            tier = self.storage['tiers'].get(level.lower(), ())
+            return [item[3] for item in islice(tier, max(len(tier) - limit, 0), None)]
     
     def get_statistics(self) -> Dict:
         """Get current statistics"""
@@ -61,22 +138,46 @@ class DummyDatabase:
     def mark_alert_sent(self, entry_index: int) -> bool:
         """Mark that an alert has been sent for this entry"""
         with self.lock:
-            if 0 <= entry_index < len(self.storage['entries']):
-                self.storage['entries'][entry_index]['alert_sent'] = True
-                return True
+            if entry_index >= 0:
+                for entry in islice(self._chronological(), entry_index, None):
+                    entry['alert_sent'] = True
+                    return True
             return False
     
     def get_unalerted_errors(self) -> List[Dict]:
         """Get error entries that haven't had alerts sent"""
         with self.lock:
-            return [entry for entry in self.storage['entries'] 
-                   if entry['level'] in ['error', 'critical'] and not entry['alert_sent']]
+            tiers = [self.storage['tiers'][level] for level in ('error', 'critical')
+                     if level in self.storage['tiers']]
+            return [entry for entry in self._chronological(tiers) if not entry['alert_sent']]
     
     def clear_old_entries(self, keep_last: int = 1000):
-        """Keep only the most recent entries to prevent memory issues"""
+        """Keep only the most recent entries (retention normally does this on insert)"""
         with self.lock:
-            if len(self.storage['entries']) > keep_last:
-                self.storage['entries'] = self.storage['entries'][-keep_last:]
+            tiers = self.storage['tiers']
+            excess = sum(len(tier) for tier in tiers.values()) - keep_last
+            for _ in range(max(excess, 0)):
+                # Oldest head across tiers
+                self._evict(min((level for level in tiers if tiers[level]), key=lambda level: tiers[level][0][0]))
+    
+    def get_retention_status(self) -> Dict:
+        """Entries, bytes and oldest entry age per tier, against the budget"""
+        with self.lock:
+            now = time.time()
+            return {
+                'budget_bytes': self.budget_bytes,
+                'used_bytes': self.total_bytes,
+                'tiers': {
+                    level: {
+                        'entries': len(tier),
+                        'bytes': self.tier_bytes[level],
+                        'share_bytes': int(self._policy(level)['share'] * self.budget_bytes),
+                        'max_age': self._policy(level)['max_age'],
+                        'oldest_age': round(now - tier[0][1], 3) if tier else None
+                    }
+                    for level, tier in self.storage['tiers'].items()
+                }
+            }
     
     def get_summary(self) -> str:
         """Get a summary string of the current state"""
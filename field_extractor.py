@@ -0,0 +1,108 @@
+"""
+Structured field extraction
+Pulls request latency, HTTP status and query timings out of framework log lines
+"""
+
+import re
+from typing import AnyStr, Dict, List, Optional, Pattern, Tuple
+
+# Timestamp layout shared by every simulator template: 2025-07-05 12:00:00
+_TS = r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}'
+_REQ = r'(?P<method>GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS) (?P<endpoint>/\S*)'
+
+# Numeric path segments are collapsed so endpoint labels stay low-cardinality
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+# Lines are text, or raw bytes straight from the read buffer
+LINE_KINDS = (str, bytes)
+
+
+def encode_variants(text: str) -> Dict[type, AnyStr]:
+    """A literal as text and as UTF-8 bytes, keyed by line type"""
+    return {str: text, bytes: text.encode('utf-8')}
+
+
+def compile_variants(pattern: str, flags: int = 0) -> Dict[type, Pattern]:
+    """A regex compiled for text lines and for raw bytes lines, keyed by line type"""
+    return {kind: re.compile(source, flags) for kind, source in encode_variants(pattern).items()}
+
+
+class FieldExtractor:
+    """Per-framework precompiled extractors for structured log fields"""
+
+    # Each layout is (guard, pattern). The guard is a literal substring that
+    # must be present before the regex is run, so lines without the field
+    # cost a couple of `in` checks rather than a regex search.
+    LAYOUTS = {
+        'fastapi': [
+            ('ms', _REQ + r' - (?P<ip>[\d.]+) - (?P<status>\d{3}) - (?P<response_time>\d+)ms'),
+            ('query', r'(?:executed in|detected:) (?P<query_time>\d+)ms'),
+        ],
+        'django': [
+            ('django.request', r'django\.request: ' + _REQ + r' - (?P<status>\d{3})(?: \[(?P<response_time>\d+)ms\])?'),
+            ('took', r'django\.request: Slow request (?P<endpoint>/\S*) took (?P<response_time>\d+)ms'),
+            ('django.db', r'django\.db: .*?\(?(?P<query_time>\d+)ms\)?$'),
+        ],
+        'laravel': [
+            ('"ip"', r'local\.\w+: ' + _REQ + r' \{"ip":"(?P<ip>[\d.]+)"'),
+            ('"time":', r'"time":(?P<query_time>\d+)'),
+        ],
+        'express': [
+            ('ms', _TS + r' \[\w+\] ' + _REQ + r' (?P<status>\d{3}) (?P<response_time>\d+)ms'),
+            ('took', r'\[WARN\] Slow response: (?P<endpoint>/\S*) took (?P<response_time>\d+)ms'),
+        ],
+    }
+
+    # Lines detected as 'unknown' still get a chance against the request
+    # layouts whose shape is unambiguous (FastAPI and Express lines carry no
+    # framework marker, so detect_framework cannot tell them apart).
+    FALLBACK_FRAMEWORKS = ['fastapi', 'express']
+
+    def __init__(self):
+        layouts = {
+            framework: [(encode_variants(guard), compile_variants(pattern)) for guard, pattern in entries]
+            for framework, entries in self.LAYOUTS.items()
+        }
+        self._compiled: Dict[type, Dict[str, List[Tuple[AnyStr, Pattern]]]] = {}
+        for kind in LINE_KINDS:
+            compiled = {
+                framework: [(guards[kind], regexes[kind]) for guards, regexes in entries]
+                for framework, entries in layouts.items()
+            }
+            compiled['unknown'] = [
+                layout
+                for framework in self.FALLBACK_FRAMEWORKS
+                for layout in compiled[framework]
+            ]
+            self._compiled[kind] = compiled
+
+    def extract(self, line: AnyStr, framework: str) -> Optional[Dict]:
+        """Extract structured fields from a line (str or raw bytes), or None if it carries none"""
+        layouts = self._compiled[type(line)].get(framework)
+        if not layouts:
+            return None
+
+        for guard, pattern in layouts:
+            if guard not in line:
+                continue
+            match = pattern.search(line)
+            if match:
+                return self._normalize(match.groupdict())
+        return None
+
+    @staticmethod
+    def _normalize(fields: Dict) -> Dict:
+        """Convert raw regex groups into typed values"""
+        result = {}
+        for key, value in fields.items():
+            if value is None:
+                continue
+            if isinstance(value, bytes):
+                value = value.decode('utf-8', errors='replace')
+            if key in ('response_time', 'query_time'):
+                result[key] = int(value) / 1000.0
+            elif key == 'endpoint':
+                result[key] = _ID_SEGMENT.sub('/:id', value.split('?', 1)[0])
+            else:
+                result[key] = value
+        return result
@@ -0,0 +1,263 @@
+"""
+Streaming field sketches
+Heavy hitters (Count-Min plus a top-K candidate table) and distinct counts
+(HyperLogLog) of IPs, endpoints and user IDs per (source, level), over
+rotating time windows. Memory per series is fixed by the sketch dimensions,
+so answers cover all traffic rather than the retained entries.
+"""
+
+import math
+import time
+from array import array
+from collections import deque
+from typing import AnyStr, Dict, List, Optional, Tuple
+
+from field_extractor import LINE_KINDS, compile_variants, encode_variants
+
+MASK64 = (1 << 64) - 1
+
+# Values not already provided by the field extractor are picked out of the
+# line: (guard literal, pattern), the regex only runs when the guard is present.
+# After a bare "user" only ID-like tokens (with a digit) or quoted names count,
+# so "User authentication failed" does not sketch "authentication".
+FALLBACK_PATTERNS = {
+    'ip': ('.', r'\b(\d{1,3}(?:\.\d{1,3}){3})\b'),
+    'user_id': ('ser', r'(?:"user_id":\s*"?|\buser_id=|\b[Uu]ser:? \'(?=[\w-]+\')|\b[Uu]ser:? (?=[\w-]*\d))(\w[\w-]*)')
+}
+
+
+class CountMinSketch:
+    """depth x width counters with conservative update; estimates never undercount"""
+
+    __slots__ = ('width', 'depth', 'rows', 'shifts', 'total')
+
+    def __init__(self, width: int = 1024, depth: int = 4):
+        if width > 1 << (64 // depth):
+            raise ValueError(f"width {width} needs more than {64 // depth} hash bits per row")
+        self.width = width
+        self.depth = depth
+        self.rows = [array('I', bytes(4 * width)) for _ in range(depth)]
+        # Each row takes its own slice of the 64-bit hash
+        self.shifts = [row * (64 // depth) for row in range(depth)]
+        self.total = 0
+
+    def add(self, h: int, count: int = 1) -> int:
+        """Count the item with hash h; returns its new estimate"""
+        width = self.width
+        cells = [(row, (h >> shift) % width) for row, shift in zip(self.rows, self.shifts)]
+        values = [row[index] for row, index in cells]
+        estimate = min(values) + count
+        # Conservative update: only counters below the new estimate are raised
+        for (row, index), value in zip(cells, values):
+            if value < estimate:
+                row[index] = estimate
+        self.total += count
+        return estimate
+
+    def estimate(self, h: int) -> int:
+        width = self.width
+        return min(row[(h >> shift) % width] for row, shift in zip(self.rows, self.shifts))
+
+    def merge(self, other: 'CountMinSketch'):
+        for row, other_row in zip(self.rows, other.rows):
+            for index, count in enumerate(other_row):
+                if count:
+                    row[index] += count
+        self.total += other.total
+
+
+class HyperLogLog:
+    """2**precision one-byte registers; standard error about 1.04 / sqrt(2**precision)"""
+
+    __slots__ = ('precision', 'registers')
+
+    def __init__(self, precision: int = 11):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, h: int):
+        """Add the item with 64-bit hash h"""
+        bits = 64 - self.precision
+        index = h >> bits
+        rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog'):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -rank for rank in self.registers)
+        empty = self.registers.count(0)
+        if estimate <= 2.5 * size and empty:
+            # Small range: linear counting over the empty registers
+            estimate = size * math.log(size / empty)
+        return int(round(estimate))
+
+
+def value_hash(value: str) -> int:
+    """64-bit hash shared by both sketches (str hashing is SipHash, salted per process)"""
+    return hash(value) & MASK64
+
+
+class FieldSketch:
+    """Frequencies, heavy-hitter candidates and distinct count of one field over one window"""
+
+    __slots__ = ('counts', 'candidates', 'capacity', 'floor', 'distinct', 'started')
+
+    def __init__(self, started: float, capacity: int, width: int, depth: int, precision: int):
+        self.counts = CountMinSketch(width, depth)
+        self.candidates: Dict[str, int] = {}
+        self.capacity = capacity
+        self.floor = 0  # Lower bound of the smallest candidate estimate
+        self.distinct = HyperLogLog(precision)
+        self.started = started
+
+    def add(self, value: str):
+        h = value_hash(value)
+        estimate = self.counts.add(h)
+        self.distinct.add(h)
+        candidates = self.candidates
+        if value in candidates or len(candidates) < self.capacity:
+            candidates[value] = estimate
+        elif estimate > self.floor:
+            # Estimates only grow, so the floor is refreshed only when it is passed
+            smallest = min(candidates, key=candidates.get)
+            self.floor = candidates[smallest]
+            if estimate > self.floor:
+                del candidates[smallest]
+                candidates[value] = estimate
+
+
+class WindowedSketch:
+    """The last `windows` FieldSketches of one series, rotated every window_seconds"""
+
+    __slots__ = ('windows', 'window_seconds', 'dimensions', 'sketches')
+
+    def __init__(self, now: float, windows: int, window_seconds: float, dimensions: Tuple):
+        self.windows = windows
+        self.window_seconds = window_seconds
+        self.dimensions = dimensions
+        self.sketches = deque([FieldSketch(now, *dimensions)], maxlen=windows)
+
+    def rotate(self, now: float) -> FieldSketch:
+        """Current window's sketch, starting new windows as time has passed"""
+        current = self.sketches[-1]
+        if now - current.started >= self.window_seconds:
+            # Aligned to the window grid; idle windows are kept (empty) so the
+            # deque always spans the last windows * window_seconds
+            elapsed = int((now - current.started) // self.window_seconds)
+            for step in range(max(1, elapsed - self.windows + 1), elapsed + 1):
+                self.sketches.append(FieldSketch(current.started + step * self.window_seconds, *self.dimensions))
+            current = self.sketches[-1]
+        return current
+
+    def add(self, value: str, now: float):
+        self.rotate(now).add(value)
+
+
+class FieldSketches:
+    """Windowed sketches keyed by (source, level, field)"""
+
+    def __init__(self, fields: Tuple[str, ...] = ('ip', 'endpoint', 'user_id'),
+                 levels: Tuple[str, ...] = ('critical', 'error', 'warning'),
+                 windows: int = 3, window_seconds: float = 300.0, top_k: int = 10,
+                 width: int = 1024, depth: int = 4, precision: int = 11):
+        self.fields = fields
+        # Only these levels are sketched; info/debug volume would dominate the cost
+        self.levels = frozenset(levels)
+        self.windows = windows
+        self.window_seconds = window_seconds
+        self.top_k = top_k
+        # Twice top_k candidates are tracked so the reported top_k are stable
+        self.dimensions = (2 * top_k, width, depth, precision)
+        self.series: Dict[Tuple[str, str, str], WindowedSketch] = {}
+        fallbacks = [(field, encode_variants(guard), compile_variants(pattern))
+                     for field, (guard, pattern) in FALLBACK_PATTERNS.items() if field in fields]
+        self.fallbacks = {
+            kind: [(field, guards[kind], regexes[kind]) for field, guards, regexes in fallbacks]
+            for kind in LINE_KINDS
+        }
+
+    def values(self, record: Dict) -> Dict[str, str]:
+        """Sketched field values of a record: extracted fields, else the fallback patterns"""
+        fields = record['fields'] or {}
+        values = {field: str(fields[field]) for field in self.fields if field in fields}
+        line: AnyStr = record['line']
+        for field, guard, regex in self.fallbacks[type(line)]:
+            if field not in values and guard in line:
+                match = regex.search(line)
+                if match:
+                    value = match.group(1)
+                    values[field] = value.decode('utf-8', errors='replace') if isinstance(value, bytes) else value
+        return values
+
+    def observe(self, record: Dict, now: Optional[float] = None):
+        """Add a classified record's field values to its series' current windows"""
+        if record['level'] not in self.levels:
+            return
+        values = self.values(record)
+        if not values:
+            return
+        now = time.time() if now is None else now
+        source, level = record['source'], record['level']
+        for field, value in values.items():
+            key = (source, level, field)
+            sketch = self.series.get(key)
+            if sketch is None:
+                sketch = self.series[key] = WindowedSketch(now, self.windows, self.window_seconds, self.dimensions)
+            sketch.add(value, now)
+
+    def query(self, field: str, levels: Optional[List[str]] = None, source: Optional[str] = None,
+              k: Optional[int] = None, now: Optional[float] = None) -> Dict:
+        """
+        Top values and distinct count of a field over the live windows.
+
+        Args:
+            field: 'ip', 'endpoint' or 'user_id'
+            levels: Levels to combine (all when None), e.g. ['error', 'critical']
+            source: Restrict to one source file (all when None)
+            k: Number of top values (defaults to top_k)
+        """
+        now = time.time() if now is None else now
+        capacity, width, depth, precision = self.dimensions
+        counts = CountMinSketch(width, depth)
+        distinct = HyperLogLog(precision)
+        candidates = set()
+        oldest = now
+        for (series_source, level, series_field), sketch in list(self.series.items()):
+            if series_field != field or (source and series_source != source) or (levels and level not in levels):
+                continue
+            sketch.rotate(now)
+            for window in list(sketch.sketches):
+                counts.merge(window.counts)
+                distinct.merge(window.distinct)
+                candidates.update(window.candidates)
+                oldest = min(oldest, window.started)
+
+        top = sorted(((value, counts.estimate(value_hash(value))) for value in candidates), key=lambda item: -item[1])
+        return {
+            'field': field,
+            'top': [{'value': value, 'count': count} for value, count in top[:k or self.top_k]],
+            'distinct': distinct.count() if counts.total else 0,
+            'total': counts.total,
+            'since': oldest
+        }
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the counters and registers of every live window"""
+        capacity, width, depth, precision = self.dimensions
+        per_window = 4 * width * depth + (1 << precision)
+        return sum(per_window * len(sketch.sketches) for sketch in list(self.series.values()))
+
+    def get_status(self, levels: Tuple[str, ...] = ('error', 'critical')) -> Dict:
+        """Series count, memory and the top values of every field for the given levels"""
+        return {
+            'series': len(self.series),
+            'window_seconds': self.window_seconds * self.windows,
+            'memory_bytes': self.memory_bytes(),
+            'levels': list(levels),
+            'fields': {field: self.query(field, list(levels)) for field in self.fields}
+        }
@@ -0,0 +1,300 @@
+"""
+Scalable log file watching
+Recursive multi-root watching with include/exclude globs, an inotify watch
+budget and an adaptive polling fallback for network filesystems
+"""
+
+import fnmatch
+import heapq
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Filesystems where inotify events are not delivered for remote writes
+NETWORK_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smbfs', 'smb3', 'fuse.sshfs', '9p'}
+
+
+class FileMatcher:
+    """Include/exclude glob matching for log files and directories"""
+
+    def __init__(self, include: Optional[List[str]] = None,
+                 exclude: Optional[List[str]] = None):
+        self.include = include or ['*.log']
+        self.exclude = exclude or []
+
+    def matches(self, path: Path) -> bool:
+        """Check whether a file should be monitored"""
+        path_str = str(path)
+        name = path.name
+        for pattern in self.exclude:
+            if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(path_str, pattern):
+                return False
+        for pattern in self.include:
+            if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(path_str, pattern):
+                return True
+        return False
+
+    def excludes_directory(self, path: str) -> bool:
+        """Check whether a directory should be skipped entirely"""
+        name = os.path.basename(path)
+        return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(path, pattern)
+                   for pattern in self.exclude)
+
+    def walk(self, root: Path) -> Iterator[Tuple[str, List[os.DirEntry]]]:
+        """Yield (directory, matching file entries) for every directory under root"""
+        stack = [str(root)]
+        while stack:
+            directory = stack.pop()
+            files = []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self.excludes_directory(entry.path):
+                                stack.append(entry.path)
+                        elif entry.is_file() and self.matches(Path(entry.path)):
+                            files.append(entry)
+            except OSError:
+                continue
+            yield directory, files
+
+    def iter_files(self, root: Path) -> Iterator[Path]:
+        """Yield every matching file under root"""
+        for _, files in self.walk(root):
+            for entry in files:
+                yield Path(entry.path)
+
+
+class WatchBudget:
+    """Allocate native (inotify) watches without exceeding the kernel limit"""
+
+    LIMIT_PATH = '/proc/sys/fs/inotify/max_user_watches'
+
+    def __init__(self, max_watches: Optional[int] = None, share: float = 0.5):
+        if max_watches is None:
+            max_watches = self.read_system_limit()
+        # Other processes share the per-user limit, so only claim part of it
+        self.available = None if max_watches is None else int(max_watches * share)
+        self.used = 0
+
+    @classmethod
+    def read_system_limit(cls) -> Optional[int]:
+        """Read the per-user inotify watch limit, if the platform has one"""
+        try:
+            with open(cls.LIMIT_PATH) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def reserve(self, watches: int) -> bool:
+        """Reserve watches for a root; False if it would exceed the budget"""
+        if self.available is not None and self.used + watches > self.available:
+            return False
+        self.used += watches
+        return True
+
+
+class PolledFile:
+    """Polling state for one file"""
+
+    __slots__ = ('size', 'mtime', 'interval')
+
+    def __init__(self, size: int, mtime: int, interval: float):
+        self.size = size
+        self.mtime = mtime
+        self.interval = interval
+
+
+class AdaptivePoller:
+    """Stat-based polling that checks active files more often than idle ones"""
+
+    def __init__(self, matcher: FileMatcher, on_change: Callable[[Path], None],
+                 min_interval: float = 0.5, max_interval: float = 30.0,
+                 rescan_interval: float = 10.0):
+        self.matcher = matcher
+        self.on_change = on_change
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.rescan_interval = rescan_interval
+        self.roots: List[Path] = []
+        self.files: Dict[str, PolledFile] = {}
+        self.schedule: List[Tuple[float, int, str, PolledFile]] = []
+        self.sequence = 0
+        self.next_rescan = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_root(self, root: Path):
+        """Start polling files under a root"""
+        self.roots.append(root)
+        self.rescan(time.monotonic(), notify=False)
+
+    def rescan(self, now: float, notify: bool = True):
+        """Discover new and removed files with one scandir pass per directory"""
+        seen = set()
+        for root in self.roots:
+            for _, entries in self.matcher.walk(root):
+                for entry in entries:
+                    seen.add(entry.path)
+                    if entry.path in self.files:
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    state = PolledFile(stat.st_size, stat.st_mtime_ns, self.min_interval)
+                    self.files[entry.path] = state
+                    self._push(now + self.min_interval, entry.path, state)
+                    if notify:
+                        self.on_change(Path(entry.path))
+
+        for path in list(self.files):
+            if path not in seen:
+                del self.files[path]
+        self.next_rescan = now + self.rescan_interval
+
+    def _push(self, due: float, path: str, state: PolledFile):
+        self.sequence += 1
+        heapq.heappush(self.schedule, (due, self.sequence, path, state))
+
+    def poll_once(self, now: Optional[float] = None) -> float:
+        """Stat every file that is due; returns the time of the next due check"""
+        now = time.monotonic() if now is None else now
+        if now >= self.next_rescan:
+            self.rescan(now)
+
+        while self.schedule and self.schedule[0][0] <= now:
+            _, _, path, state = heapq.heappop(self.schedule)
+            if self.files.get(path) is not state:
+                continue  # Removed (or replaced) during rescan
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.files[path]
+                continue
+
+            if stat.st_size != state.size or stat.st_mtime_ns != state.mtime:
+                state.size = stat.st_size
+                state.mtime = stat.st_mtime_ns
+                state.interval = self.min_interval
+                self.on_change(Path(path))
+            else:
+                state.interval = min(state.interval * 2, self.max_interval)
+            self._push(now + state.interval, path, state)
+
+        next_due = self.schedule[0][0] if self.schedule else now + self.max_interval
+        return min(next_due, self.next_rescan)
+
+    def _run(self):
+        while not self._stop.is_set():
+            next_due = self.poll_once()
+            self._stop.wait(max(next_due - time.monotonic(), 0.05))
+
+    def start(self):
+        """Start the polling thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the polling thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+
+def is_network_filesystem(path: Path) -> bool:
+    """Check /proc/mounts for a network filesystem under path"""
+    try:
+        with open('/proc/mounts') as f:
+            mounts = [line.split()[1:3] for line in f if len(line.split()) >= 3]
+    except OSError:
+        return False
+
+    resolved = str(path.resolve())
+    best, fs_type = '', ''
+    for mount_point, mount_type in mounts:
+        if (resolved == mount_point or resolved.startswith(mount_point.rstrip('/') + '/')) \
+                and len(mount_point) > len(best):
+            best, fs_type = mount_point, mount_type
+    return fs_type in NETWORK_FILESYSTEMS
+
+
+class FileWatcher:
+    """Watch several roots recursively, falling back to polling where needed"""
+
+    MODES = ('auto', 'native', 'poll')
+
+    def __init__(self, roots: List[Path], matcher: FileMatcher, handler,
+                 on_change: Callable[[Path], None], mode: str = 'auto',
+                 budget: Optional[WatchBudget] = None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown watch mode: {mode}")
+        self.roots = roots
+        self.matcher = matcher
+        self.handler = handler
+        self.mode = mode
+        self.budget = budget or WatchBudget()
+        self.observer = None
+        self.poller = AdaptivePoller(matcher, on_change)
+        self.native_roots: List[Path] = []
+        self.polled_roots: List[Path] = []
+
+    def count_directories(self, root: Path) -> int:
+        """Number of inotify watches a recursive watch on root would need"""
+        return sum(1 for _ in self.matcher.walk(root))
+
+    def allocate(self):
+        """Split roots between native watches and polling"""
+        self.native_roots, self.polled_roots = [], []
+        for root in self.roots:
+            if self.mode == 'poll':
+                self.polled_roots.append(root)
+            elif self.mode == 'native':
+                self.native_roots.append(root)
+            elif is_network_filesystem(root):
+                self.polled_roots.append(root)
+            elif self.budget.reserve(self.count_directories(root)):
+                self.native_roots.append(root)
+            else:
+                self.polled_roots.append(root)
+
+    def iter_files(self) -> Iterator[Path]:
+        """Yield every matching file under every root"""
+        for root in self.roots:
+            yield from self.matcher.iter_files(root)
+
+    def start(self):
+        """Start native watches and the polling fallback"""
+        self.allocate()
+
+        if self.native_roots:
+            from watchdog.observers import Observer
+            self.observer = Observer()
+            for root in self.native_roots:
+                self.observer.schedule(self.handler, str(root), recursive=True)
+            self.observer.start()
+
+        if self.polled_roots:
+            for root in self.polled_roots:
+                self.poller.add_root(root)
+            self.poller.start()
+
+    def stop(self):
+        """Stop all watching"""
+        if self.observer:
+            self.observer.stop()
+            self.observer.join()
+        if self.polled_roots:
+            self.poller.stop()
+
+    def get_status(self) -> Dict:
+        """Describe how each root is being watched"""
+        return {
+            'native_roots': [str(root) for root in self.native_roots],
+            'polled_roots': [str(root) for root in self.polled_roots],
+            'polled_files': len(self.poller.files),
+            'watches_used': self.budget.used
+        }
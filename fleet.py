@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Fleet agent/aggregator mode
+Parser agents send one compact delta per interval (per-series counts, histogram
+bucket increments and a sample of stored entries) to an aggregator, which
+dedupes them by agent and sequence number and merges them into one store and
+one /metrics. Frames are a 4-byte big-endian length and zlib-compressed JSON.
+"""
+
+import argparse
+import json
+import random
+import socket
+import socketserver
+import struct
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from metrics_collector import (AggregateMetrics, LabelledAggregateCollector, LAG_BUCKETS,
+                               LATENCY_BUCKETS, QUERY_BUCKETS)
+
+COUNTERS = ('entries', 'shed', 'http_responses')
+HISTOGRAMS = {
+    'lag': LAG_BUCKETS,
+    'request_latency': LATENCY_BUCKETS,
+    'query_duration': QUERY_BUCKETS
+}
+MAX_FRAME_BYTES = 64 << 20
+DEFAULT_PORT = 9100
+
+
+def parse_address(address: str, default_port: int = DEFAULT_PORT) -> Tuple[str, int]:
+    """'host:port', 'host' or 'tcp://host:port' as a (host, port) pair"""
+    address = address.split('://', 1)[-1]
+    host, _, port = address.rpartition(':')
+    if not host:
+        return port or '127.0.0.1', default_port
+    return host, int(port)
+
+
+def write_frame(sock: socket.socket, message: Dict) -> int:
+    """Send one message; returns the bytes written"""
+    payload = zlib.compress(json.dumps(message, separators=(',', ':')).encode('utf-8'), 1)
+    sock.sendall(struct.pack('>I', len(payload)) + payload)
+    return len(payload) + 4
+
+
+def _read_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def read_frame(sock: socket.socket) -> Optional[Dict]:
+    """Next message, or None when the peer closed the connection"""
+    header = _read_exactly(sock, 4)
+    if header is None:
+        return None
+    (size,) = struct.unpack('>I', header)
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"frame of {size} bytes exceeds the limit")
+    payload = _read_exactly(sock, size)
+    if payload is None:
+        return None
+    return json.loads(zlib.decompress(payload))
+
+
+def _labels(key) -> List[str]:
+    return list(key) if isinstance(key, tuple) else [key]
+
+
+def _key(name: str, labels: List[str]):
+    # shed is keyed by the bare level, every other table by a tuple
+    return labels[0] if name == 'shed' else tuple(labels)
+
+
+def snapshot(aggregates: AggregateMetrics) -> Dict[str, Dict]:
+    """Copy of every counter and histogram, cheap enough to take once per interval"""
+    state = {name: dict(getattr(aggregates, name)) for name in COUNTERS}
+    for name in HISTOGRAMS:
+        state[name] = {key: (list(histogram.counts), histogram.sum)
+                       for key, histogram in dict(getattr(aggregates, name)).items()}
+    state['processing'] = {(): (list(aggregates.processing.counts), aggregates.processing.sum)}
+    return state
+
+
+def diff(current: Dict[str, Dict], previous: Dict[str, Dict]) -> Tuple[Dict, Dict]:
+    """(counters, histograms) changed since previous, as JSON-ready rows"""
+    counters = {}
+    for name in COUNTERS:
+        before = previous.get(name, {})
+        rows = [_labels(key) + [count - before.get(key, 0)]
+                for key, count in current[name].items() if count != before.get(key, 0)]
+        if rows:
+            counters[name] = rows
+
+    histograms = {}
+    for name in list(HISTOGRAMS) + ['processing']:
+        before = previous.get(name, {})
+        rows = []
+        for key, (counts, total) in current[name].items():
+            old_counts, old_total = before.get(key, (None, 0.0))
+            if old_counts is not None:
+                counts = [new - old for new, old in zip(counts, old_counts)]
+            if any(counts):
+                rows.append([list(key), counts, total - old_total])
+        if rows:
+            histograms[name] = rows
+    return counters, histograms
+
+
+def merge(aggregates: AggregateMetrics, counters: Dict, histograms: Dict):
+    """Add one delta's counters and histogram increments to aggregates"""
+    for name, rows in counters.items():
+        table = getattr(aggregates, name)
+        for row in rows:
+            key = _key(name, row[:-1])
+            table[key] = table.get(key, 0) + row[-1]
+
+    for name, rows in histograms.items():
+        for labels, counts, total in rows:
+            if name == 'processing':
+                histogram = aggregates.processing
+            else:
+                histogram = aggregates._histogram(getattr(aggregates, name), tuple(labels), HISTOGRAMS[name])
+            if len(counts) != len(histogram.counts):
+                continue  # Agent built with other bucket bounds
+            for index, count in enumerate(counts):
+                histogram.counts[index] += count
+            histogram.sum += total
+
+
+class FleetAgent:
+    """
+    Reports a LogParser's aggregates to an aggregator once per interval.
+
+    At most one delta is in flight: while the aggregator is unreachable the
+    counts keep accumulating locally and go out with the next delta after
+    the owed one is delivered, so memory and network cost do not grow with
+    the line rate or the outage length.
+    """
+
+    def __init__(self, parser, address: str, agent_id: Optional[str] = None,
+                 interval: float = 5.0, sample_size: int = 50,
+                 initial_backoff: float = 0.5, max_backoff: float = 30.0, timeout: float = 10.0):
+        self.parser = parser
+        self.aggregates = parser.aggregates
+        self.address = parse_address(address)
+        self.agent_id = agent_id or socket.gethostname()
+        # New per process: a restarted agent's sequence numbers start over
+        self.instance = uuid.uuid4().hex
+        self.interval = interval
+        self.sample_size = sample_size
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self.lock = threading.Lock()
+        self.samples: Dict[str, List[Dict]] = {'alert': [], 'other': []}
+        self.seen = {'alert': 0, 'other': 0}
+        self.previous: Dict[str, Dict] = {}
+        self.sequence = 0
+        self.pending: Optional[Dict] = None
+        self.connection = None
+        self.backoff = initial_backoff
+        self.retry_at = 0.0
+        self.stats = {'deltas': 0, 'acknowledged': 0, 'bytes_sent': 0, 'reconnects': 0, 'failures': 0}
+        self.thread = None
+        self.stopping = threading.Event()
+
+    def submit(self, record: Dict):
+        """Offer a stored record for this interval's sample (reservoir per kind)"""
+        kind = 'alert' if record['level'] in ('error', 'critical') else 'other'
+        with self.lock:
+            self.seen[kind] += 1
+            sample = self.samples[kind]
+            if len(sample) < self.sample_size:
+                sample.append(record)
+            else:
+                slot = random.randrange(self.seen[kind])
+                if slot < self.sample_size:
+                    sample[slot] = record
+
+    @staticmethod
+    def serialize(record: Dict) -> Dict:
+        event_time = record['event_time']
+        return {
+            'level': record['level'],
+            'message': record['line'] if isinstance(record['line'], str)
+            else record['line'].decode('utf-8', errors='replace'),
+            'source': record['source'],
+            'framework': record['framework'],
+            'event_time': event_time[0] if event_time else None
+        }
+
+    def build_delta(self) -> Dict:
+        """Next delta message; an empty one doubles as a heartbeat"""
+        current = snapshot(self.aggregates)
+        counters, histograms = diff(current, self.previous)
+        with self.lock:
+            samples, seen = self.samples, self.seen
+            self.samples = {'alert': [], 'other': []}
+            self.seen = {'alert': 0, 'other': 0}
+        self.previous = current
+
+        self.sequence += 1
+        self.stats['deltas'] += 1
+        return {
+            'type': 'delta',
+            'seq': self.sequence,
+            'sent_at': time.time(),
+            'counters': counters,
+            'histograms': histograms,
+            'entries': [self.serialize(record) for record in samples['alert'] + samples['other']],
+            'stored': seen
+        }
+
+    def _connect(self):
+        self.connection = socket.create_connection(self.address, timeout=self.timeout)
+        write_frame(self.connection, {'type': 'hello', 'agent': self.agent_id, 'instance': self.instance})
+        welcome = read_frame(self.connection)
+        if not welcome or welcome.get('type') != 'welcome':
+            raise ConnectionError("aggregator did not acknowledge hello")
+        self.stats['reconnects'] += 1
+        # Applied before the previous connection dropped, only the ack was lost
+        if self.pending and self.pending['seq'] <= welcome['acknowledged']:
+            self.pending = None
+
+    def _close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def flush(self) -> bool:
+        """Send the pending delta (building one if none is owed) and wait for its ack"""
+        if self.pending is None:
+            self.pending = self.build_delta()
+        if time.monotonic() < self.retry_at:
+            return False
+        try:
+            if self.connection is None:
+                self._connect()
+            if self.pending is None:
+                return True
+            self.stats['bytes_sent'] += write_frame(self.connection, self.pending)
+            ack = read_frame(self.connection)
+            if not ack or ack.get('seq') != self.pending['seq']:
+                raise ConnectionError("aggregator closed the connection")
+        except (OSError, ValueError, ConnectionError) as e:
+            self._close()
+            self.stats['failures'] += 1
+            print(f"⚠️  Reporting to aggregator {self.address[0]}:{self.address[1]} failed ({e}); "
+                  f"retrying in {self.backoff:.1f}s")
+            self.retry_at = time.monotonic() + self.backoff
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+            return False
+        self.backoff = self.initial_backoff
+        self.stats['acknowledged'] = self.pending['seq']
+        self.pending = None
+        return True
+
+    def _run(self):
+        next_report = time.monotonic() + self.interval
+        while not self.stopping.wait(max(0.0, next_report - time.monotonic())):
+            next_report += self.interval
+            self.flush()
+        # On shutdown: deliver what is owed, then one last delta
+        self.retry_at = 0.0
+        if self.flush():
+            self.flush()
+
+    def start(self):
+        """Start the reporting thread"""
+        self.thread = threading.Thread(target=self._run, daemon=True, name="fleet-agent")
+        self.thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        if not self.thread:
+            return
+        self.stopping.set()
+        self.thread.join(timeout)
+        self.thread = None
+        self._close()
+
+    def get_status(self) -> Dict:
+        return {
+            'aggregator': f"{self.address[0]}:{self.address[1]}",
+            'agent': self.agent_id,
+            'connected': self.connection is not None,
+            'sequence': self.sequence,
+            'pending': self.pending['seq'] if self.pending else None,
+            **self.stats
+        }
+
+
+class FleetRequestHandler(socketserver.BaseRequestHandler):
+    """One agent connection: hello, then delta/ack pairs until the agent disconnects"""
+
+    def handle(self):
+        aggregator = self.server.aggregator
+        sock = self.request
+        try:
+            hello = read_frame(sock)
+            if not hello or hello.get('type') != 'hello':
+                return
+            agent, instance = hello['agent'], hello['instance']
+            acknowledged = aggregator.connect(agent, instance, self.client_address[0])
+            write_frame(sock, {'type': 'welcome', 'acknowledged': acknowledged})
+        except (OSError, ValueError, KeyError):
+            return
+
+        try:
+            while True:
+                message = read_frame(sock)
+                if message is None:
+                    break
+                aggregator.apply(agent, instance, message)
+                write_frame(sock, {'type': 'ack', 'seq': message['seq']})
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️  Agent {agent} connection error: {e}")
+        finally:
+            aggregator.disconnect(agent)
+
+
+class FleetAggregator:
+    """
+    Merges agent deltas into the local database and into AggregateMetrics:
+    fleet-wide totals, and per agent for export with an `agent` label
+    """
+
+    def __init__(self, host: str = '0.0.0.0', port: int = DEFAULT_PORT, metrics=None):
+        self.address = (host, port)
+        self.aggregates = AggregateMetrics()
+        self.agent_aggregates: Dict[str, AggregateMetrics] = {}
+        self.metrics = metrics
+        self.lock = threading.Lock()
+        self.agents: Dict[str, Dict] = {}
+        self.server = None
+
+    def connect(self, agent: str, instance: str, host: str) -> int:
+        """Register a (re)connecting agent; returns the last sequence applied for it"""
+        with self.lock:
+            state = self.agents.get(agent)
+            if state is None or state['instance'] != instance:
+                if state is not None:
+                    print(f"🔄 Agent {agent} restarted")
+                state = self.agents[agent] = {
+                    'instance': instance, 'last_seq': 0, 'applied': 0, 'duplicates': 0,
+                    'connections': 0, 'last_seen': None, 'host': host,
+                    'stored': {'alert': 0, 'other': 0}
+                }
+            state['connections'] += 1
+            state['host'] = host
+            print(f"🛰️  Agent {agent} connected from {host}")
+            self._update_connected()
+            return state['last_seq']
+
+    def disconnect(self, agent: str):
+        with self.lock:
+            state = self.agents.get(agent)
+            if state:
+                state['connections'] -= 1
+            self._update_connected()
+        print(f"🛰️  Agent {agent} disconnected")
+
+    def _update_connected(self):
+        if self.metrics:
+            self.metrics.fleet_agents.set(sum(1 for state in self.agents.values() if state['connections'] > 0))
+
+    def apply(self, agent: str, instance: str, message: Dict) -> bool:
+        """Merge a delta unless this agent instance already sent its sequence number"""
+        from dummy_database import db
+
+        with self.lock:
+            state = self.agents[agent]
+            if state['instance'] != instance or message['seq'] <= state['last_seq']:
+                state['duplicates'] += 1
+                if self.metrics:
+                    self.metrics.fleet_deltas.labels(agent=agent, outcome='duplicate').inc()
+                return False
+            merge(self.aggregates, message['counters'], message['histograms'])
+            agent_aggregates = self.agent_aggregates.get(agent)
+            if agent_aggregates is None:
+                agent_aggregates = self.agent_aggregates[agent] = AggregateMetrics()
+            merge(agent_aggregates, message['counters'], message['histograms'])
+            state['last_seq'] = message['seq']
+            state['applied'] += 1
+            state['last_seen'] = time.time()
+            for kind, count in message.get('stored', {}).items():
+                state['stored'][kind] = state['stored'].get(kind, 0) + count
+
+        for entry in message['entries']:
+            db.add_log_entry(
+                level=entry['level'],
+                message=entry['message'],
+                source=f"{agent}/{entry['source']}",
+                framework=entry['framework'],
+                event_time=datetime.fromtimestamp(entry['event_time']) if entry['event_time'] else None
+            )
+        if self.metrics:
+            self.metrics.fleet_deltas.labels(agent=agent, outcome='applied').inc()
+        return True
+
+    def collector(self) -> LabelledAggregateCollector:
+        """Scrape-time collector exporting every agent's series with an `agent` label"""
+        return LabelledAggregateCollector(self.agent_aggregates, 'agent')
+
+    def start(self):
+        """Accept agent connections on a background thread"""
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer(self.address, FleetRequestHandler)
+        self.server.daemon_threads = True
+        self.server.aggregator = self
+        threading.Thread(target=self.server.serve_forever, daemon=True, name="fleet-aggregator").start()
+        return self.server
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def get_status(self) -> Dict:
+        with self.lock:
+            return {
+                'address': f"{self.address[0]}:{self.address[1]}",
+                'agents': {
+                    agent: {key: value for key, value in state.items() if key != 'instance'}
+                    for agent, state in self.agents.items()
+                }
+            }
+
+
+def main(argv=None) -> int:
+    """`python log_parser.py aggregate`: run the fleet aggregator"""
+    arg_parser = argparse.ArgumentParser(
+        prog="log_parser.py aggregate",
+        description="Merge delta updates from parser agents into one store and /metrics"
+    )
+    arg_parser.add_argument('--listen', default=f"0.0.0.0:{DEFAULT_PORT}", metavar='HOST:PORT',
+                            help=f"Address agents connect to (default 0.0.0.0:{DEFAULT_PORT})")
+    arg_parser.add_argument('--metrics-port', type=int, default=8000,
+                            help="Port of the merged /metrics endpoint (default 8000)")
+    args = arg_parser.parse_args(argv)
+
+    from prometheus_client import start_http_server
+    from dummy_database import db
+    from log_parser import LogMetrics
+
+    print("🔧 Universal Log Monitoring Tool - Fleet Aggregator")
+    print("=" * 50)
+    host, port = parse_address(args.listen)
+    aggregator = FleetAggregator(host, port)
+    aggregator.metrics = LogMetrics(aggregates=aggregator.aggregates, collector=aggregator.collector())
+    print(f"📊 Starting Prometheus metrics server on port {args.metrics_port}...")
+    start_http_server(args.metrics_port)
+    aggregator.start()
+    print(f"🛰️  Accepting agents on {host}:{port}")
+
+    try:
+        while True:
+            time.sleep(30)
+            status = aggregator.get_status()
+            connected = sum(1 for state in status['agents'].values() if state['connections'] > 0)
+            print(f"📡 {connected}/{len(status['agents'])} agents connected, "
+                  f"{db.get_statistics()['total_entries']} sampled entries stored")
+    except KeyboardInterrupt:
+        print("Stopping aggregator...")
+        aggregator.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
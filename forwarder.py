@@ -0,0 +1,231 @@
+"""
+Entry forwarder
+Ships classified entries to a downstream collector as gzip-compressed batches
+of newline-delimited JSON, over HTTP(S) or a length-prefixed TCP stream.
+Batches that cannot be delivered are spooled to disk and retried with
+exponential backoff; submitting never blocks the ingestion path.
+"""
+
+import gzip
+import json
+import queue
+import socket
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+
+class EntryForwarder:
+    """Batch, compress and deliver classified records from a background thread"""
+
+    def __init__(self, url: str, batch_lines: int = 1000, batch_bytes: int = 1 << 20,
+                 flush_interval: float = 1.0, queue_size: int = 100000,
+                 spool_directory: str = "spool", spool_max_bytes: int = 256 << 20,
+                 initial_backoff: float = 0.5, max_backoff: float = 60.0,
+                 timeout: float = 10.0, compress_level: int = 1, metrics=None):
+        self.url = url
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https', 'tcp'):
+            raise ValueError(f"Unsupported forward URL scheme: {parsed.scheme!r}")
+        self.scheme = parsed.scheme
+        self.address = (parsed.hostname, parsed.port)
+        self.batch_lines = batch_lines
+        self.batch_bytes = batch_bytes
+        self.flush_interval = flush_interval
+        self.spool_directory = Path(spool_directory)
+        self.spool_max_bytes = spool_max_bytes
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        # Fastest level: NDJSON log batches compress well even at level 1
+        self.compress_level = compress_level
+        self.metrics = metrics
+
+        self.queue = queue.Queue(queue_size)
+        self.session = None
+        self.connection = None
+        self.backoff = initial_backoff
+        self.retry_at = 0.0
+        self.sequence = 0
+        self.stats = {'sent': 0, 'spooled': 0, 'dropped': 0, 'batches': 0, 'failures': 0}
+        self.thread = None
+        self.stopping = threading.Event()
+
+    def submit(self, record: Dict):
+        """Queue a record for forwarding; drops it if the queue is full"""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._count_dropped(1)
+
+    def _count_dropped(self, count: int):
+        self.stats['dropped'] += count
+        if self.metrics:
+            self.metrics.forwarded_entries.labels(outcome='dropped').inc(count)
+
+    @staticmethod
+    def serialize(record: Dict) -> bytes:
+        """One NDJSON line for a classified record"""
+        event_time = record['event_time']
+        return json.dumps({
+            'event_time': event_time[0] if event_time else None,
+            'level': record['level'],
+            'source': record['source'],
+            'framework': record['framework'],
+            'application': record['application'],
+            'message': record['line'],
+            'fields': record['fields']
+        }, separators=(',', ':')).encode('utf-8') + b'\n'
+
+    def _next_batch(self) -> List[bytes]:
+        """Collect lines until the batch is full or the flush interval passes"""
+        lines = []
+        size = 0
+        deadline = None
+        while len(lines) < self.batch_lines and size < self.batch_bytes:
+            timeout = self.flush_interval if deadline is None else deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                record = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if record is None:
+                self.stopping.set()
+                break
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            line = self.serialize(record)
+            lines.append(line)
+            size += len(line)
+        return lines
+
+    def _send(self, payload: bytes):
+        """Deliver one compressed batch; raises on failure"""
+        if self.scheme == 'tcp':
+            if self.connection is None:
+                self.connection = socket.create_connection(self.address, timeout=self.timeout)
+            try:
+                # Frame: 4-byte big-endian length, then one gzip member
+                self.connection.sendall(struct.pack('>I', len(payload)) + payload)
+            except OSError:
+                self.connection.close()
+                self.connection = None
+                raise
+            return
+
+        if self.session is None:
+            import requests
+            self.session = requests.Session()
+        response = self.session.post(
+            self.url,
+            data=payload,
+            headers={'Content-Type': 'application/x-ndjson', 'Content-Encoding': 'gzip'},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+    def _deliver(self, payload: bytes, count: int) -> bool:
+        """Try to send a batch unless backing off; adjust the backoff either way"""
+        if time.monotonic() < self.retry_at:
+            return False
+        try:
+            self._send(payload)
+        except Exception as e:
+            self.stats['failures'] += 1
+            print(f"⚠️  Forwarding to {self.url} failed ({e}); retrying in {self.backoff:.1f}s")
+            self.retry_at = time.monotonic() + self.backoff
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+            return False
+        self.backoff = self.initial_backoff
+        self.stats['sent'] += count
+        self.stats['batches'] += 1
+        if self.metrics:
+            self.metrics.forwarded_entries.labels(outcome='sent').inc(count)
+        return True
+
+    def _spool(self, payload: bytes, count: int):
+        """Write an undeliverable batch to the disk buffer, oldest files go first when full"""
+        self.spool_directory.mkdir(parents=True, exist_ok=True)
+        self.sequence += 1
+        # Entry count in the name so a later delivery can account for it
+        path = self.spool_directory / f"{time.time_ns()}-{self.sequence:06d}-{count}.ndjson.gz"
+        path.write_bytes(payload)
+        self.stats['spooled'] += count
+        if self.metrics:
+            self.metrics.forwarded_entries.labels(outcome='spooled').inc(count)
+
+        files = self._spool_files()
+        total = sum(file.stat().st_size for file in files)
+        while files and total > self.spool_max_bytes:
+            oldest = files.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink()
+            self._count_dropped(int(oldest.name.split('-')[2].split('.')[0]))
+        self._update_spool_gauge(total)
+
+    def _spool_files(self) -> List[Path]:
+        if not self.spool_directory.exists():
+            return []
+        return sorted(self.spool_directory.glob("*.ndjson.gz"))
+
+    def _update_spool_gauge(self, total: Optional[int] = None):
+        if self.metrics:
+            if total is None:
+                total = sum(file.stat().st_size for file in self._spool_files())
+            self.metrics.forward_spool_bytes.set(total)
+
+    def _drain_spool(self):
+        """Resend spooled batches oldest first, stopping at the first failure"""
+        files = self._spool_files()
+        for path in files:
+            count = int(path.name.split('-')[2].split('.')[0])
+            if not self._deliver(path.read_bytes(), count):
+                break
+            path.unlink()
+        if files:
+            self._update_spool_gauge()
+
+    def _run(self):
+        while True:
+            lines = self._next_batch()
+            # Older spooled data goes out before new batches
+            self._drain_spool()
+            if lines:
+                payload = gzip.compress(b''.join(lines), compresslevel=self.compress_level)
+                if self._spool_files() or not self._deliver(payload, len(lines)):
+                    self._spool(payload, len(lines))
+            if self.stopping.is_set() and self.queue.empty():
+                return
+
+    def start(self):
+        """Start the delivery thread"""
+        self.thread = threading.Thread(target=self._run, daemon=True, name="forwarder")
+        self.thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush what is queued (to the downstream or the spool) and stop"""
+        if not self.thread:
+            return
+        self.queue.put(None)
+        self.thread.join(timeout)
+        self.thread = None
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+        if self.session:
+            self.session.close()
+
+    def get_status(self) -> Dict:
+        """Delivery counters, queue depth and spool size"""
+        files = self._spool_files()
+        return {
+            'url': self.url,
+            'queued': self.queue.qsize(),
+            'spool_files': len(files),
+            'spool_bytes': sum(file.stat().st_size for file in files),
+            **self.stats
+        }
@@ -0,0 +1,48 @@
+"""
+Shared Grafana HTTP helpers
+Pooled keep-alive sessions and exponential-backoff readiness checks used by
+the dashboard and alert setup scripts
+"""
+
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def create_session(auth, pool_size=10):
+    """Create a keep-alive session whose connection pool fits pool_size workers"""
+    session = requests.Session()
+    session.auth = auth
+    session.headers.update({"Content-Type": "application/json"})
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def org_headers(org_id=None):
+    """Headers selecting a Grafana organization (None keeps the user's current org)"""
+    return {"X-Grafana-Org-Id": str(org_id)} if org_id is not None else {}
+
+
+def wait_for_grafana(session, grafana_url, max_attempts=30, initial_delay=0.1, max_delay=5.0):
+    """Wait for Grafana's health endpoint, backing off exponentially between attempts"""
+    print("⏳ Waiting for Grafana to be available...")
+
+    delay = initial_delay
+    for attempt in range(max_attempts):
+        try:
+            response = session.get(f"{grafana_url}/api/health", timeout=5)
+            if response.status_code == 200:
+                print("✅ Grafana is available")
+                return True
+        except requests.exceptions.RequestException:
+            pass
+
+        print(f"   Attempt {attempt + 1}/{max_attempts} (retrying in {delay:.1f}s)...")
+        time.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+    print("❌ Grafana is not available")
+    return False
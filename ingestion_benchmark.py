@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Ingestion Benchmark
+Drives the production log simulator into a temporary directory, runs LogParser
+against it and reports sustained throughput, write-to-metric latency, CPU cost
+and peak memory. Results can be compared against a stored baseline.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Scenario definitions. Tail scenarios write at a fixed rate while the parser
+# watches the directory; the backlog scenario pre-writes everything first.
+SCENARIOS = {
+    "backlog": {"mode": "backlog", "lines": 100000},
+    "steady": {"mode": "tail", "rate": 2000, "duration": 10.0},
+    "error-storm": {"mode": "tail", "rate": 2000, "duration": 10.0, "error_rate": 1.0},
+    "fan-out": {"mode": "tail", "rate": 2000, "duration": 10.0, "files": 500}
+}
+
+# Metric -> True if a higher value is better
+METRIC_DIRECTIONS = {
+    "lines_per_second": True,
+    "drain_seconds": False,
+    "latency_p50_ms": False,
+    "latency_p95_ms": False,
+    "latency_p99_ms": False,
+    "cpu_ms_per_1k_lines": False,
+    "peak_rss_mb": False
+}
+
+# Tail scenarios are paced: their lines/s is the offered rate, so a slower
+# parser shows up as latency and as backlog left to drain when the writer stops
+TAIL_GATED_OUT = {"lines_per_second"}
+
+# Absolute changes below these are noise, whatever the relative change
+METRIC_NOISE = {"drain_seconds": 0.1}
+
+
+def configure_applications(simulator, scenario):
+    """Apply scenario overrides (error rate, file fan-out) to the simulator apps"""
+    applications = simulator.applications
+    if "error_rate" in scenario:
+        for app_config in applications.values():
+            app_config["error_rate"] = scenario["error_rate"]
+
+    files = scenario.get("files")
+    if files:
+        base = list(applications.items())
+        applications = {}
+        for index in range(files):
+            app_name, app_config = base[index % len(base)]
+            clone = dict(app_config)
+            clone["log_file"] = f"{app_name}-{index}.log"
+            applications[f"{app_name}-{index}"] = clone
+    simulator.applications = applications
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _write_load(log_directory, scenario, seed, checkpoints):
+    """Writer process: paced load with a (write time, cumulative lines) checkpoint per tick"""
+    from production_log_simulator import ProductionLogSimulator
+
+    simulator = ProductionLogSimulator(log_directory)
+    configure_applications(simulator, scenario)
+    simulator.run_load(
+        rate=scenario["rate"],
+        duration=scenario["duration"],
+        seed=seed,
+        start_time=1700000000,
+        on_batch=lambda written: checkpoints.put((time.time(), written))
+    )
+    checkpoints.put(None)
+
+
+def _run_scenario(name, scenario, seed, parser_options, results):
+    """Scenario process: owns a fresh LogParser, metrics registry and db"""
+    sys.stdout = open(os.devnull, "w")
+    from log_parser import LogParser
+    from production_log_simulator import ProductionLogSimulator
+
+    log_directory = tempfile.mkdtemp(prefix=f"bench-{name}-")
+    parser = LogParser(log_directory, detect_anomalies=False, **parser_options)
+
+    def processed():
+        return sum(parser.series_counts.values())
+
+    latencies = []
+    drain = None
+    if scenario["mode"] == "backlog":
+        simulator = ProductionLogSimulator(log_directory)
+        configure_applications(simulator, scenario)
+        simulator.run_load(rate=scenario["lines"], duration=1.0, seed=seed,
+                           pace=False, start_time=1700000000)
+        total = scenario["lines"]
+
+        usage_start = resource.getrusage(resource.RUSAGE_SELF)
+        wall_start = time.perf_counter()
+        if parser.pipeline:
+            parser.pipeline.start()
+        parser.process_existing_files()
+        if parser.pipeline:
+            parser.pipeline.join()
+        # The files are complete: flush each one's last multi-line record
+        parser.flush_records(force=True)
+        if parser.pipeline:
+            parser.pipeline.join()
+        elapsed = time.perf_counter() - wall_start
+        usage_end = resource.getrusage(resource.RUSAGE_SELF)
+    else:
+        monitor = threading.Thread(target=parser.start_monitoring, daemon=True)
+        monitor.start()
+        while not parser.running:
+            time.sleep(0.01)
+
+        checkpoints = multiprocessing.Queue()
+        writer = multiprocessing.Process(
+            target=_write_load, args=(log_directory, scenario, seed, checkpoints)
+        )
+        usage_start = resource.getrusage(resource.RUSAGE_SELF)
+        wall_start = time.perf_counter()
+        writer.start()
+
+        pending = []
+        total = 0
+        writing = True
+        last_write = None
+        last_progress = time.time()
+        last_count = 0
+        while writing or pending:
+            while True:
+                try:
+                    checkpoint = checkpoints.get(timeout=0.002)
+                except Exception:
+                    break
+                if checkpoint is None:
+                    writing = False
+                    break
+                pending.append(checkpoint)
+                last_write, total = checkpoint
+
+            count = processed()
+            now = time.time()
+            while pending and pending[0][1] <= count:
+                latencies.append(now - pending.pop(0)[0])
+            if count != last_count:
+                last_count, last_progress = count, now
+            elif not writing and now - last_progress > 5.0:
+                break  # Parser stalled; report what was reached
+        # Time from the writer's last batch until the parser caught up (or stalled)
+        drain = time.time() - last_write if last_write else 0.0
+
+        elapsed = time.perf_counter() - wall_start
+        usage_end = resource.getrusage(resource.RUSAGE_SELF)
+        writer.join()
+        parser.stop_monitoring()
+
+    lines = processed()
+    cpu = (usage_end.ru_utime - usage_start.ru_utime) + (usage_end.ru_stime - usage_start.ru_stime)
+    latency_ms = [latency * 1000 for latency in latencies]
+    results.put({
+        "scenario": name,
+        "mode": scenario["mode"],
+        "lines": lines,
+        "expected_lines": total,
+        "elapsed_seconds": elapsed,
+        "lines_per_second": lines / elapsed if elapsed else 0.0,
+        "drain_seconds": drain,
+        "latency_p50_ms": percentile(latency_ms, 0.50),
+        "latency_p95_ms": percentile(latency_ms, 0.95),
+        "latency_p99_ms": percentile(latency_ms, 0.99),
+        "cpu_ms_per_1k_lines": cpu * 1000 / lines * 1000 if lines else None,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    })
+
+
+class IngestionBenchmark:
+    """Run ingestion scenarios in isolated processes and gate on regressions"""
+
+    def __init__(self, scenarios=None, scale=1.0, seed=0, parser_options=None):
+        self.scenarios = {}
+        for name in scenarios or SCENARIOS:
+            scenario = dict(SCENARIOS[name])
+            for key in ("lines", "duration"):
+                if key in scenario:
+                    scenario[key] = type(scenario[key])(scenario[key] * scale)
+            self.scenarios[name] = scenario
+        self.seed = seed
+        self.parser_options = parser_options or {}
+
+    def run_scenario(self, name):
+        """Run one scenario in a fresh process and return its report"""
+        results = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=_run_scenario, args=(name, self.scenarios[name], self.seed, self.parser_options, results)
+        )
+        process.start()
+        report = results.get()
+        process.join()
+        return report
+
+    def run(self):
+        """Run every configured scenario"""
+        reports = {}
+        for name in self.scenarios:
+            print(f"⏱️  Running scenario: {name}")
+            reports[name] = self.run_scenario(name)
+            self.print_report(reports[name])
+        return reports
+
+    @staticmethod
+    def print_report(report):
+        """Print one scenario report"""
+        def fmt(value, suffix=""):
+            return "n/a" if value is None else f"{value:,.2f}{suffix}"
+
+        print(f"   Lines: {report['lines']:,}/{report['expected_lines']:,} "
+              f"in {report['elapsed_seconds']:.2f}s ({fmt(report['lines_per_second'])} lines/s)")
+        if report.get("drain_seconds") is not None:
+            print(f"   Drained {report['drain_seconds']:.2f}s after the writer stopped")
+        print(f"   Latency p50/p95/p99: {fmt(report['latency_p50_ms'])}/"
+              f"{fmt(report['latency_p95_ms'])}/{fmt(report['latency_p99_ms'], ' ms')}")
+        print(f"   CPU: {fmt(report['cpu_ms_per_1k_lines'], ' ms')} per 1k lines, "
+              f"peak RSS {fmt(report['peak_rss_mb'], ' MB')}")
+
+    @staticmethod
+    def compare(reports, baseline, max_regression=0.10):
+        """
+        Compare reports with a baseline.
+
+        Returns:
+            A list of human-readable regression descriptions (empty if none)
+        """
+        regressions = []
+        for name, report in reports.items():
+            reference = baseline.get(name)
+            if not reference:
+                continue
+            for metric, higher_is_better in METRIC_DIRECTIONS.items():
+                if report.get("mode") == "tail" and metric in TAIL_GATED_OUT:
+                    continue
+                current, previous = report.get(metric), reference.get(metric)
+                if current is None or not previous:
+                    continue
+                if abs(current - previous) < METRIC_NOISE.get(metric, 0.0):
+                    continue
+                change = (current - previous) / previous
+                if (-change if higher_is_better else change) > max_regression:
+                    regressions.append(
+                        f"{name}.{metric}: {previous:,.2f} -> {current:,.2f} ({change:+.1%})"
+                    )
+        return regressions
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="End-to-end ingestion benchmark")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="Scenario to run (repeatable; default: all)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiply scenario durations and backlog sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default="bench_baseline.json",
+                        help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write these results as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="Allowed relative regression per metric (0.10 = 10%%)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Run LogParser in staged pipeline mode")
+    parser.add_argument("--exporter", choices=["client", "collector"], default="client",
+                        help="LogParser metrics exporter to benchmark")
+    parser.add_argument("--multiline", action="store_true",
+                        help="Benchmark with multi-line record assembly")
+    args = parser.parse_args()
+
+    print("🏁 Universal Log Monitoring Tool - Ingestion Benchmark")
+    print("=" * 50)
+
+    benchmark = IngestionBenchmark(args.scenario, args.scale, args.seed,
+                                   {"pipeline": args.pipeline, "exporter": args.exporter,
+                                    "multiline": args.multiline})
+    reports = benchmark.run()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(reports, indent=2))
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(reports, indent=2))
+        print(f"💾 Baseline saved to {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"ℹ️  No baseline at {baseline_path}; run with --save-baseline to create one")
+        return 0
+
+    regressions = benchmark.compare(reports, json.loads(baseline_path.read_text()),
+                                    args.max_regression)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.max_regression:.0%}:")
+        for regression in regressions:
+            print(f"   • {regression}")
+        return 1
+
+    print(f"\n✅ No regressions beyond {args.max_regression:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
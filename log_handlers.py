@@ -0,0 +1,101 @@
+"""
+Watchdog and HTTP handler classes
+Kept apart from log_parser so batch runs never import watchdog or http.server
+"""
+
+import json
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from watchdog.events import FileSystemEventHandler
+
+
+class AlertWebhookHandler(BaseHTTPRequestHandler):
+    """Handle incoming webhook alerts from Grafana"""
+    
+    def do_POST(self):
+        if self.path == '/alert-webhook':
+            content_length = int(self.headers['Content-Length'])
+            post_data = self.rfile.read(content_length)
+            
+            try:
+                alert_data = json.loads(post_data.decode('utf-8'))
+                self.process_alert(alert_data)
+                
+                self.send_response(200)
+                self.send_header('Content-type', 'application/json')
+                self.end_headers()
+                self.wfile.write(b'{"status": "ok"}')
+                
+            except Exception as e:
+                print(f"❌ Error processing webhook: {e}")
+                self.send_response(500)
+                self.end_headers()
+        else:
+            self.send_response(404)
+            self.end_headers()
+    
+    def process_alert(self, alert_data):
+        """Process incoming alert from Grafana"""
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        print(f"\n🚨 GRAFANA ALERT RECEIVED [{timestamp}] 🚨")
+        print(f"   Status: {alert_data.get('status', 'unknown')}")
+        print(f"   Title: {alert_data.get('title', 'No title')}")
+        print(f"   Message: {alert_data.get('message', 'No message')}")
+        print("─" * 60)
+    
+    def log_message(self, format, *args):
+        # Suppress default HTTP server logs
+        pass
+
+
+class DebugHandler(BaseHTTPRequestHandler):
+    """Serve memory introspection from the server's memory_monitor"""
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        monitor = self.server.memory_monitor
+        params = parse_qs(url.query)
+        
+        if url.path == '/debug/memory':
+            body = {'structures': monitor.update()}
+        elif url.path == '/debug/tracemalloc':
+            if params.get('stop'):
+                monitor.stop_tracing()
+                body = {'tracing': False}
+            else:
+                body = monitor.tracemalloc_diff(int(params.get('top', ['20'])[0]))
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        
+        data = json.dumps(body, indent=2).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        # Suppress default HTTP server logs
+        pass
+
+
+class LogFileHandler(FileSystemEventHandler):
+    """Handle file system events for log files"""
+    
+    def __init__(self, log_parser):
+        self.log_parser = log_parser
+        self.last_position = {}
+    
+    def on_modified(self, event):
+        if event.is_directory:
+            return
+            
+        file_path = Path(event.src_path)
+        if self.log_parser.file_matcher.matches(file_path):
+            self.log_parser.process_new_lines(file_path)
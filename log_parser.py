@@ -1,15 +1,30 @@
+import argparse
 import re
+import sys
 import time
 import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-from prometheus_client import Counter, Histogram, Gauge, start_http_server
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import json
+from typing import TYPE_CHECKING, AnyStr, Dict, List, Optional
 from dummy_database import db
+from field_extractor import LINE_KINDS, FieldExtractor, compile_variants, encode_variants
+from anomaly_detector import RateAnomalyDetector
+from file_watcher import FileMatcher, FileWatcher
+from timestamp_parser import TimestampParser
+from adaptive_sampler import AdaptiveSampler
+from pipeline import IngestionPipeline
+from forwarder import EntryForwarder
+from fleet import FleetAgent
+from rule_engine import RuleEngine
+from field_sketches import FieldSketches
+from alert_dispatcher import AlertChannel, AlertDispatcher, build_channels
+from record_assembler import RecordAssembler
+from memory_monitor import MemoryMonitor
+from metrics_collector import (AggregateMetrics, AggregateCollector, LAG_BUCKETS,
+                               LATENCY_BUCKETS, QUERY_BUCKETS)
+
+if TYPE_CHECKING:
+    from prometheus_client import CollectorRegistry
 
 
 class LogPatterns:
@@ -32,136 +47,327 @@ class LogPatterns:
         'spring': r'org\.springframework',
         'flask': r'flask\.\w+'
     }
+    
+    # Log format indicators, tried (case-sensitively) when no framework pattern
+    # matches: (framework, pattern, literal that must also be present)
+    FRAMEWORK_INDICATORS = [
+        ('laravel', r'\[.*\] local\.(INFO|WARNING|ERROR|CRITICAL):', None),
+        ('django', r'\[.*\] (INFO|WARNING|ERROR|CRITICAL) django\.', None),
+        ('fastapi', r'(INFO|WARNING|ERROR|CRITICAL):', 'FastAPI'),
+        ('express', r'\[.*\] \[(INFO|WARN|ERROR|CRITICAL)\]', None)
+    ]
 
 
 class LogMetrics:
     """Prometheus' metrics for log monitoring"""
     
-    def __init__(self):
-        self.log_entries_total = Counter(
-            'log_entries_total',
-            'Total number of log entries processed',
-            ['level', 'source', 'framework']
-        )
-        
-        self.error_count = Counter(
-            'log_errors_total',
-            'Total number of error-level log entries',
-            ['source', 'framework']
-        )
+    def __init__(self, registry: Optional['CollectorRegistry'] = None,
+                 aggregates: Optional[AggregateMetrics] = None,
+                 collector: Optional[AggregateCollector] = None):
+        # Imported here so classification-only use (batch mode) never loads it
+        from prometheus_client import Counter, Histogram, Gauge, REGISTRY
+        if registry is None:
+            registry = REGISTRY
         
-        self.warning_count = Counter(
-            'log_warnings_total',
-            'Total number of warning-level log entries',
-            ['source', 'framework']
-        )
-        
-        self.processing_time = Histogram(
-            'log_processing_seconds',
-            'Time spent processing log entries'
-        )
+        if aggregates is not None:
+            # Collector mode: the per-line metrics are plain integers in
+            # `aggregates`, turned into metric families at scrape time
+            self.processing_time = aggregates.processing
+            registry.register(collector or AggregateCollector(aggregates))
+        else:
+            self.log_entries_total = Counter(
+                'log_entries_total',
+                'Total number of log entries processed',
+                ['level', 'source', 'framework'],
+                registry=registry
+            )
+            
+            self.error_count = Counter(
+                'log_errors_total',
+                'Total number of error-level log entries',
+                ['source', 'framework'],
+                registry=registry
+            )
+            
+            self.warning_count = Counter(
+                'log_warnings_total',
+                'Total number of warning-level log entries',
+                ['source', 'framework'],
+                registry=registry
+            )
+            
+            self.processing_time = Histogram(
+                'log_processing_seconds',
+                'Time spent processing log entries',
+                registry=registry
+            )
+            
+            self.request_latency = Histogram(
+                'log_request_latency_seconds',
+                'Request latency reported in log lines',
+                ['application', 'endpoint'],
+                buckets=LATENCY_BUCKETS,
+                registry=registry
+            )
+            
+            self.http_responses = Counter(
+                'log_http_responses_total',
+                'HTTP responses reported in log lines',
+                ['application', 'status'],
+                registry=registry
+            )
+            
+            self.query_duration = Histogram(
+                'log_query_duration_seconds',
+                'Database query durations reported in log lines',
+                ['application'],
+                buckets=QUERY_BUCKETS,
+                registry=registry
+            )
+            
+            self.ingestion_lag = Histogram(
+                'log_ingestion_lag_seconds',
+                'Delay between the timestamp in a log line and its processing',
+                ['source'],
+                buckets=LAG_BUCKETS,
+                registry=registry
+            )
+            
+            self.entries_shed = Counter(
+                'log_entries_shed_total',
+                'Entries counted in metrics but not stored or printed due to sampling',
+                ['level'],
+                registry=registry
+            )
         
         self.file_size = Gauge(
             'log_file_size_bytes',
             'Size of log files being monitored',
-            ['filename']
+            ['filename'],
+            registry=registry
         )
         
         self.alerts_sent = Counter(
             'log_alerts_sent_total',
             'Total number of alerts sent',
-            ['level', 'type']
+            ['level', 'type'],
+            registry=registry
         )
-
-
-class AlertWebhookHandler(BaseHTTPRequestHandler):
-    """Handle incoming webhook alerts from Grafana"""
-    
-    def do_POST(self):
-        if self.path == '/alert-webhook':
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            
-            try:
-                alert_data = json.loads(post_data.decode('utf-8'))
-                self.process_alert(alert_data)
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(b'{"status": "ok"}')
-                
-            except Exception as e:
-                print(f"❌ Error processing webhook: {e}")
-                self.send_response(500)
-                self.end_headers()
-        else:
-            self.send_response(404)
-            self.end_headers()
-    
-    def process_alert(self, alert_data):
-        """Process incoming alert from Grafana"""
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        print(f"\n🚨 GRAFANA ALERT RECEIVED [{timestamp}] 🚨")
-        print(f"   Status: {alert_data.get('status', 'unknown')}")
-        print(f"   Title: {alert_data.get('title', 'No title')}")
-        print(f"   Message: {alert_data.get('message', 'No message')}")
-        print("─" * 60)
-    
-    def log_message(self, format, *args):
-        # Suppress default HTTP server logs
-        pass
+        self.anomaly_score = Gauge(
+            'log_rate_anomaly_score',
+            'Deviation of the log rate from its EWMA baseline, in standard deviations',
+            ['source', 'level'],
+            registry=registry
+        )
+        
+        self.pipeline_queue_depth = Gauge(
+            'log_pipeline_queue_depth',
+            'Items waiting in each pipeline stage queue',
+            ['stage'],
+            registry=registry
+        )
+        
+        self.pipeline_items = Counter(
+            'log_pipeline_items_total',
+            'Items (paths, lines or records) handled by each pipeline stage',
+            ['stage'],
+            registry=registry
+        )
+        
+        self.sampling_rate = Gauge(
+            'log_sampling_rate',
+            'Fraction of info/debug entries currently stored (1 = no shedding)',
+            registry=registry
+        )
+        self.sampling_rate.set(1.0)
+        
+        self.forwarded_entries = Counter(
+            'log_forwarded_entries_total',
+            'Entries handed to the downstream forwarder, by outcome (sent, spooled, dropped)',
+            ['outcome'],
+            registry=registry
+        )
+        
+        self.forward_spool_bytes = Gauge(
+            'log_forward_spool_bytes',
+            'Bytes of undelivered batches buffered on disk by the forwarder',
+            registry=registry
+        )
+        
+        self.alert_deliveries = Counter(
+            'log_alert_deliveries_total',
+            'Alerts handled by each delivery channel, by outcome (sent, failed, dead_lettered, dropped)',
+            ['channel', 'outcome'],
+            registry=registry
+        )
+        
+        self.alert_delivery_seconds = Histogram(
+            'log_alert_delivery_seconds',
+            'Time per alert batch delivery attempt, by channel',
+            ['channel'],
+            buckets=LATENCY_BUCKETS,
+            registry=registry
+        )
+        
+        self.alert_queue_depth = Gauge(
+            'log_alert_queue_depth',
+            'Alerts waiting in each delivery channel queue',
+            ['channel'],
+            registry=registry
+        )
+        
+        self.memory_bytes = Gauge(
+            'log_memory_bytes',
+            'Approximate bytes held by each long-lived parser structure',
+            ['structure'],
+            registry=registry
+        )
+        
+        self.memory_items = Gauge(
+            'log_memory_items',
+            'Items held by each long-lived parser structure',
+            ['structure'],
+            registry=registry
+        )
+        
+        self.fleet_deltas = Counter(
+            'log_fleet_deltas_total',
+            'Delta updates received by the fleet aggregator, by agent and outcome (applied, duplicate)',
+            ['agent', 'outcome'],
+            registry=registry
+        )
+        
+        self.fleet_agents = Gauge(
+            'log_fleet_agents_connected',
+            'Agents currently connected to the fleet aggregator',
+            registry=registry
+        )
 
-class LogFileHandler(FileSystemEventHandler):
-    """Handle file system events for log files"""
-    
-    def __init__(self, log_parser):
-        self.log_parser = log_parser
-        self.last_position = {}
-    
-    def on_modified(self, event):
-        if event.is_directory:
-            return
-            
-        file_path = Path(event.src_path)
-        if file_path.suffix == '.log':
-            self.log_parser.process_new_lines(file_path)
+
+def __getattr__(name):
+    # The handler classes pull in watchdog and http.server; load them on first use
+    if name in ('LogFileHandler', 'AlertWebhookHandler'):
+        import log_handlers
+        return getattr(log_handlers, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class LogParser:
     """Main log parser class"""
     
-    def __init__(self, log_directory: str = "logs"):
+    def __init__(self, log_directory: str = "logs", extract_fields: bool = True,
+                 detect_anomalies: bool = True,
+                 extra_directories: Optional[List[str]] = None,
+                 include: Optional[List[str]] = None,
+                 exclude: Optional[List[str]] = None,
+                 watch_mode: str = 'auto',
+                 adaptive_sampling: bool = False,
+                 pipeline: bool = False,
+                 monitoring: bool = True,
+                 registry: Optional['CollectorRegistry'] = None,
+                 exporter: str = 'client',
+                 forward_url: Optional[str] = None,
+                 rule_files: Optional[List[str]] = None,
+                 memory_accounting: bool = True,
+                 memory_budget: Optional[int] = None,
+                 aggregator: Optional[str] = None,
+                 agent_id: Optional[str] = None,
+                 field_sketches: bool = True,
+                 alert_channels: Optional[List[AlertChannel]] = None,
+                 multiline: bool = False):
         self.log_directory = Path(log_directory)
+        self.watch_roots = [self.log_directory] + [Path(d) for d in extra_directories or []]
+        self.file_matcher = FileMatcher(include, exclude)
+        self.watch_mode = watch_mode
         self.patterns = LogPatterns()
-        self.metrics = LogMetrics()
+        levels = [(level, compile_variants(pattern, re.IGNORECASE))
+                  for level, pattern in self.patterns.PATTERNS.items()]
+        frameworks = [(framework, compile_variants(pattern, re.IGNORECASE))
+                      for framework, pattern in self.patterns.FRAMEWORK_PATTERNS.items()]
+        indicators = [(framework, compile_variants(pattern), literal and encode_variants(literal))
+                      for framework, pattern, literal in self.patterns.FRAMEWORK_INDICATORS]
+        self.level_regexes = {
+            kind: [(level, regexes[kind]) for level, regexes in levels] for kind in LINE_KINDS
+        }
+        self.framework_regexes = {
+            kind: [(framework, regexes[kind]) for framework, regexes in frameworks] for kind in LINE_KINDS
+        }
+        self.framework_indicators = {
+            kind: [(framework, regexes[kind], literal and literal[kind])
+                   for framework, regexes, literal in indicators]
+            for kind in LINE_KINDS
+        }
+        # User rule files (YAML/JSON) take precedence over the built-in patterns
+        self.rule_engine = RuleEngine(rule_files) if rule_files else None
+        # monitoring=False builds a classification-only parser (batch mode):
+        # no Prometheus metrics and no log directory
+        # exporter='collector' keeps per-line metrics as plain integers that are
+        # exported at scrape time; 'client' updates prometheus_client objects
+        # Fleet agents always use it: deltas are diffs of the plain integers
+        collect = exporter == 'collector' or aggregator is not None
+        self.aggregates = AggregateMetrics() if monitoring and collect else None
+        self.metrics = LogMetrics(registry, self.aggregates) if monitoring else None
+        # Stack traces and continuation lines are joined to their first line;
+        # a line the classifier would find a level in always starts a record
+        self.assembler = RecordAssembler(
+            level_pattern='|'.join(self.patterns.PATTERNS.values())
+        ) if multiline else None
+        self.field_extractor = FieldExtractor() if extract_fields else None
+        # Windowed top-K / distinct-count sketches of IPs, endpoints and user IDs
+        self.sketches = FieldSketches() if field_sketches else None
+        self.timestamp_parser = TimestampParser()
+        self.sampler = AdaptiveSampler() if adaptive_sampling else None
+        self.current_lag = 0.0
+        self.anomaly_detector = RateAnomalyDetector() if detect_anomalies else None
+        self.series_counts = {}
         self.file_positions = {}
+        self.sources: Dict[str, str] = {}
         self.running = False
-        self.observer = None
+        self.file_watcher = None
+        self.file_handler = None
+        # Open multi-line records are flushed on their own timer, not the loop tick;
+        # the counters are plain dicts, so the watcher and the flush timer take
+        # turns processing records
+        self.processing_lock = threading.Lock()
+        self.flush_stop = threading.Event()
+        self.flush_thread = None
+        self.pipeline = IngestionPipeline(self) if pipeline else None
+        # Optional downstream output for stored entries (NDJSON over HTTP or TCP)
+        self.forwarder = EntryForwarder(forward_url, metrics=self.metrics) if forward_url else None
+        # Webhook/SMTP/file alert delivery on per-channel worker threads
+        self.alert_dispatcher = (AlertDispatcher(alert_channels, metrics=self.metrics)
+                                 if monitoring and alert_channels else None)
+        # Optional fleet aggregator that receives one delta per interval
+        self.agent = FleetAgent(self, aggregator, agent_id) if monitoring and aggregator else None
+        # Stored entries are evicted on insert to stay within a byte budget,
+        # per-level tiers decide what goes first (see dummy_database)
+        if memory_budget is not None:
+            db.configure_retention(memory_budget)
+        # Per-structure byte accounting (log_memory_bytes), refreshed every 30 s
+        self.memory_monitor = MemoryMonitor(self) if monitoring and memory_accounting else None
+        
+        if not monitoring:
+            return
         
         # Ensure log directory exists
         self.log_directory.mkdir(exist_ok=True)
         
         print(f"🚀 Log Parser initialized")
-        print(f"📁 Monitoring directory: {self.log_directory.absolute()}")
+        for root in self.watch_roots:
+            print(f"📁 Monitoring directory: {root.absolute()}")
     
-    def detect_framework(self, line: str) -> str:
-        """Detect framework from log line"""
+    def detect_framework(self, line: AnyStr) -> str:
+        """Detect framework from log line (str or raw bytes)"""
         # Check for framework patterns in log content
-        for framework, pattern in self.patterns.FRAMEWORK_PATTERNS.items():
-            if re.search(pattern, line, re.IGNORECASE):
+        for framework, regex in self.framework_regexes[type(line)]:
+            if regex.search(line):
                 return framework
         
         # Check for framework indicators in log format
-        if re.search(r'\[.*\] local\.(INFO|WARNING|ERROR|CRITICAL):', line):
-            return 'laravel'
-        elif re.search(r'\[.*\] (INFO|WARNING|ERROR|CRITICAL) django\.', line):
-            return 'django'
-        elif re.search(r'(INFO|WARNING|ERROR|CRITICAL):', line) and 'FastAPI' in line:
-            return 'fastapi'
-        elif re.search(r'\[.*\] \[(INFO|WARN|ERROR|CRITICAL)\]', line):
-            return 'express'
+        for framework, regex, literal in self.framework_indicators[type(line)]:
+            if regex.search(line) and (literal is None or literal in line):
+                return framework
             
         return 'unknown'
     
@@ -174,63 +380,160 @@ class LogParser:
         app_name = source.replace('.log', '')
         return app_name
     
-    def detect_log_level(self, line: str) -> Optional[str]:
-        """Detect log level from line"""
-        for level, pattern in self.patterns.PATTERNS.items():
-            if re.search(pattern, line, re.IGNORECASE):
+    def detect_log_level(self, line: AnyStr) -> Optional[str]:
+        """Detect log level from line (str or raw bytes)"""
+        for level, regex in self.level_regexes[type(line)]:
+            if regex.search(line):
                 return level
         return None
     
-    def process_log_line(self, line: str, source: str) -> bool:
+    def classify_line(self, line: AnyStr, source: str, now: Optional[float] = None) -> Optional[Dict]:
+        """
+        Classify a single line into a record, or None if it has no log level.
+        
+        Raw bytes lines are classified without decoding; the record keeps the
+        bytes until record_text() is needed (storing, printing, alerting).
+        """
+        # Clean the line
+        line = line.strip()
+        if not line:
+            return None
+        
+        # Assembled multi-line records are classified on their first line only,
+        # frames mentioning "Exception" or "Error" do not change the level
+        head = line
+        newline = b'\n' if isinstance(line, bytes) else '\n'
+        if newline in line:
+            head = line[:line.index(newline)].rstrip()
+        
+        # Detect level, framework, and application; user rules win over the built-ins
+        application = self.detect_application(source)
+        level = framework = None
+        if self.rule_engine:
+            level, framework = self.rule_engine.match(head, application)
+        level = level or self.detect_log_level(head)
+        if not level:
+            return None
+        framework = framework or self.detect_framework(head)
+        
+        # Event time from the line itself, if it carries one
+        parsed_time = self.timestamp_parser.parse(head, source)
+        if parsed_time:
+            now = time.time() if now is None else now
+            self.current_lag = max(now - parsed_time[0], 0.0)
+        
+        # Structured fields (latency, status, query time)
+        fields = self.field_extractor.extract(head, framework) if self.field_extractor else None
+        
+        return {
+            'line': line,
+            'source': source,
+            'level': level,
+            'framework': framework,
+            'application': application,
+            'event_time': parsed_time,
+            'lag': self.current_lag if parsed_time else None,
+            'fields': fields,
+            # Low-severity entries may be sampled out of storage under load
+            'store': self.sampler is None or self.sampler.should_store(level)
+        }
+    
+    @staticmethod
+    def record_text(record: Dict) -> str:
+        """The record's line as text, decoding raw bytes (invalid UTF-8 replaced) on first use"""
+        line = record['line']
+        if isinstance(line, bytes):
+            line = record['line'] = line.decode('utf-8', errors='replace')
+        return line
+    
+    def store_record(self, record: Dict):
+        """Store a classified record in the database"""
+        if not record['store']:
+            return
+        db.add_log_entry(
+            level=record['level'],
+            message=self.record_text(record),
+            source=record['source'],
+            framework=record['framework'],
+            event_time=record['event_time'][1] if record['event_time'] else None
+        )
+        if self.forwarder:
+            self.forwarder.submit(record)
+        if self.agent:
+            self.agent.submit(record)
+    
+    def record_metrics(self, record: Dict):
+        """Update counters and histograms for a classified record"""
+        level, source, framework = record['level'], record['source'], record['framework']
+        
+        key = (source, level)
+        self.series_counts[key] = self.series_counts.get(key, 0) + 1
+        
+        if self.sketches:
+            self.sketches.observe(record)
+        
+        if self.aggregates is not None:
+            self.aggregates.record(record)
+            return
+        
+        if self.metrics is None:
+            return
+        
+        if record['lag'] is not None:
+            self.metrics.ingestion_lag.labels(source=source).observe(record['lag'])
+        
+        if not record['store']:
+            self.metrics.entries_shed.labels(level=level).inc()
+        
+        self.metrics.log_entries_total.labels(
+            level=level,
+            source=source,
+            framework=framework
+        ).inc()
+        
+        if level in ['error', 'critical']:
+            self.metrics.error_count.labels(
+                source=source,
+                framework=framework
+            ).inc()
+        
+        elif level == 'warning':
+            self.metrics.warning_count.labels(
+                source=source,
+                framework=framework
+            ).inc()
+        
+        if record['fields']:
+            self.record_fields(record['application'], record['fields'])
+    
+    def alert_record(self, record: Dict):
+        """Send an alert for error/critical records"""
+        if record['level'] in ['error', 'critical']:
+            self.send_alert(record['level'], self.record_text(record), record['source'], record['framework'])
+    
+    def print_record(self, record: Dict):
+        """Log the detection to the console"""
+        if not record['store']:
+            return
+        line = self.record_text(record)
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        print(f"🔍 [{timestamp}] {record['level'].upper()} detected in {record['application']} ({record['framework']})")
+        print(f"   └─ {line[:100]}{'...' if len(line) > 100 else ''}")
+    
+    def process_log_line(self, line: AnyStr, source: str) -> bool:
         """Process a single log line"""
         start_time = time.time()
         
         try:
-            # Clean the line
-            line = line.strip()
-            if not line:
+            record = self.classify_line(line, source, start_time)
+            if not record:
                 return False
             
-            # Detect level, framework, and application
-            level = self.detect_log_level(line)
-            framework = self.detect_framework(line)
-            application = self.detect_application(source)
-            
-            if level:
-                # Store in database
-                db.add_log_entry(
-                    level=level,
-                    message=line,
-                    source=source,
-                    framework=framework
-                )
-                
-                # Update metrics
-                self.metrics.log_entries_total.labels(
-                    level=level,
-                    source=source,
-                    framework=framework
-                ).inc()
-                
-                if level in ['error', 'critical']:
-                    self.metrics.error_count.labels(
-                        source=source,
-                        framework=framework
-                    ).inc()
-                    self.send_alert(level, line, source, framework)
-                
-                elif level == 'warning':
-                    self.metrics.warning_count.labels(
-                        source=source,
-                        framework=framework
-                    ).inc()
-                
-                # Log the detection
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                print(f"🔍 [{timestamp}] {level.upper()} detected in {application} ({framework})")
-                print(f"   └─ {line[:100]}{'...' if len(line) > 100 else ''}")
-                
-                return True
+            self.store_record(record)
+            self.record_metrics(record)
+            self.alert_record(record)
+            self.print_record(record)
+            return True
         
         except Exception as e:
             print(f"❌ Error processing line: {e}")
@@ -238,15 +541,62 @@ class LogParser:
         
         finally:
             # Record processing time
-            processing_time = time.time() - start_time
-            self.metrics.processing_time.observe(processing_time)
+            if self.metrics is not None:
+                processing_time = time.time() - start_time
+                self.metrics.processing_time.observe(processing_time)
+    
+    def record_fields(self, application: str, fields: Dict):
+        """Feed extracted fields into the latency and status metrics"""
+        if 'response_time' in fields:
+            self.metrics.request_latency.labels(
+                application=application,
+                endpoint=fields.get('endpoint', 'unknown')
+            ).observe(fields['response_time'])
+        
+        if 'status' in fields:
+            self.metrics.http_responses.labels(
+                application=application,
+                status=fields['status']
+            ).inc()
+        
+        if 'query_time' in fields:
+            self.metrics.query_duration.labels(
+                application=application
+            ).observe(fields['query_time'])
+    
+    def update_sampling(self, queue_depth: int):
+        """Recompute the adaptive sampling rate from reading lag and queue depth"""
+        rate = self.sampler.update(lag=self.current_lag, depth=queue_depth)
+        self.metrics.sampling_rate.set(rate)
+    
+    def check_anomalies(self, now: Optional[float] = None):
+        """Run one anomaly detection tick over the aggregated series counts"""
+        if not self.anomaly_detector:
+            return
+        
+        for result in self.anomaly_detector.tick(dict(self.series_counts), now):
+            self.metrics.anomaly_score.labels(
+                source=result['source'],
+                level=result['level']
+            ).set(result['score'])
+            
+            if result['anomaly']:
+                direction = 'spike' if result['score'] > 0 else 'drop'
+                message = (f"Rate {direction}: {result['rate']:.2f}/s vs baseline "
+                           f"{result['baseline']:.2f}/s (score {result['score']:.1f})")
+                self.send_alert(result['level'], message, result['source'], 'rate-anomaly')
     
     def send_alert(self, level: str, message: str, source: str, framework: str):
         """Send alert for critical/error messages"""
-        alert_type = "console"  # For now, just console alerts
+        alert_type = "console"
         
         # Update alert metrics
-        self.metrics.alerts_sent.labels(level=level, type=alert_type).inc()
+        if self.metrics is not None:
+            self.metrics.alerts_sent.labels(level=level, type=alert_type).inc()
+        
+        # Other channels only get it queued; delivery happens on their workers
+        if self.alert_dispatcher:
+            self.alert_dispatcher.dispatch(level, message, source, framework)
         
         # Console alert
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -257,62 +607,148 @@ class LogParser:
         print(f"Message: {message}")
         print("-" * 60)
     
+    def source_name(self, file_path: Path) -> str:
+        """
+        Source label of a file: its path relative to the watch root it is under.
+        
+        Files in extra directories are prefixed with the directory's name, so
+        svcA/app.log and svcB/app.log stay separate series.
+        """
+        key = str(file_path)
+        source = self.sources.get(key)
+        if source is None:
+            source = file_path.name
+            for index, root in enumerate(self.watch_roots):
+                try:
+                    relative = file_path.relative_to(root)
+                except ValueError:
+                    continue
+                source = (relative if index == 0 else Path(root.name) / relative).as_posix()
+                break
+            self.sources[key] = source
+        return source
+    
+    def read_new_lines(self, file_path: Path, size_hint: int = -1) -> List[bytes]:
+        """Read raw lines added to a file since the last read (about size_hint bytes at most)"""
+        file_str = str(file_path)
+        
+        # Update file size metric
+        if file_path.exists():
+            file_size = file_path.stat().st_size
+            self.metrics.file_size.labels(filename=self.source_name(file_path)).set(file_size)
+        
+        # Get current position
+        current_pos = self.file_positions.get(file_str, 0)
+        
+        # Binary: undecodable bytes cannot fail a read, and lines that are only
+        # counted are never decoded
+        with open(file_path, 'rb') as f:
+            f.seek(current_pos)
+            new_lines = f.readlines(size_hint)
+            
+            # Update position
+            self.file_positions[file_str] = f.tell()
+        
+        return new_lines
+    
     def process_new_lines(self, file_path: Path):
         """Process new lines added to a file"""
+        if self.pipeline:
+            self.pipeline.submit(file_path)
+            return
+        
         try:
-            file_str = str(file_path)
-            
-            # Update file size metric
-            if file_path.exists():
-                file_size = file_path.stat().st_size
-                self.metrics.file_size.labels(filename=file_path.name).set(file_size)
+            new_lines = self.read_new_lines(file_path)
             
-            # Get current position
-            current_pos = self.file_positions.get(file_str, 0)
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                f.seek(current_pos)
-                new_lines = f.readlines()
-                
-                # Update position
-                self.file_positions[file_str] = f.tell()
-                
-                # Process new lines
+            # Process new lines
+            source = self.source_name(file_path)
+            with self.processing_lock:
+                if self.assembler:
+                    new_lines = self.assembler.feed(str(file_path), new_lines, source=source)
+                remaining = len(new_lines)
                 for line in new_lines:
-                    self.process_log_line(line, file_path.name)
+                    if self.sampler and remaining % 1000 == 0:
+                        self.update_sampling(remaining)
+                    self.process_log_line(line, source)
+                    remaining -= 1
+                
+                if self.sampler:
+                    self.update_sampling(0)
         
         except Exception as e:
             print(f"Error processing file {file_path}: {e}")
     
+    def flush_records(self, force: bool = False):
+        """Process assembled records whose file has been quiet for the flush timeout"""
+        if not self.assembler:
+            return
+        if self.pipeline:
+            for source, record in self.assembler.expire(force=force):
+                self.pipeline.submit_lines(source, [record])
+            return
+        # Held across expire too, so a file's records are processed in order
+        with self.processing_lock:
+            for source, record in self.assembler.expire(force=force):
+                self.process_log_line(record, source)
+    
+    def _flush_loop(self):
+        while not self.flush_stop.wait(self.assembler.flush_timeout / 2):
+            self.flush_records()
+    
     def process_existing_files(self):
         """Process existing log files on startup"""
         print("Processing existing log files...")
         
-        log_files = list(self.log_directory.glob("*.log"))
+        log_files = [
+            log_file
+            for root in self.watch_roots
+            for log_file in self.file_matcher.iter_files(root)
+        ]
         if not log_files:
             print("No existing log files found")
             return
         
         for log_file in log_files:
-            print(f"Processing: {log_file.name}")
+            print(f"Processing: {self.source_name(log_file)}")
             self.process_new_lines(log_file)
     
     def start_monitoring(self):
         """Start monitoring log files"""
         print("Starting log file monitoring...")
         
+        if self.pipeline:
+            self.pipeline.start()
+        if self.forwarder:
+            self.forwarder.start()
+        if self.agent:
+            self.agent.start()
+        if self.alert_dispatcher:
+            self.alert_dispatcher.start()
+        if self.assembler:
+            self.flush_stop.clear()
+            self.flush_thread = threading.Thread(target=self._flush_loop, name='record-flush', daemon=True)
+            self.flush_thread.start()
+        
         # Process existing files first
         self.process_existing_files()
         
-        # Start file system monitoring
-        self.observer = Observer()
-        handler = LogFileHandler(self)
-        self.observer.schedule(handler, str(self.log_directory), recursive=False)
-        
-        self.observer.start()
+        # Start file system monitoring (native watches within budget, polling otherwise)
+        from log_handlers import LogFileHandler
+        self.file_handler = LogFileHandler(self)
+        self.file_watcher = FileWatcher(
+            self.watch_roots,
+            self.file_matcher,
+            self.file_handler,
+            self.process_new_lines,
+            mode=self.watch_mode
+        )
+        self.file_watcher.start()
         self.running = True
         
-        print(f"Monitoring started for {self.log_directory}")
+        watch_status = self.file_watcher.get_status()
+        print(f"Monitoring started for {', '.join(str(root) for root in self.watch_roots)}")
+        if watch_status['polled_roots']:
+            print(f"Polling fallback for: {', '.join(watch_status['polled_roots'])}")
         print("Metrics available at: http://localhost:8000/metrics")
         print("Press Ctrl+C to stop")
         
@@ -320,9 +756,14 @@ class LogParser:
             while self.running:
                 time.sleep(1)
                 
-                # Periodic cleanup
-                if int(time.time()) % 300 == 0:  # Every 5 minutes
-                    db.clear_old_entries(1000)
+                if self.anomaly_detector and self.anomaly_detector.due(time.time()):
+                    self.check_anomalies()
+                
+                if self.rule_engine:
+                    self.rule_engine.maybe_reload()
+                
+                if self.memory_monitor and self.memory_monitor.due():
+                    self.memory_monitor.update()
                     
         except KeyboardInterrupt:
             print("Stopping log parser...")
@@ -331,9 +772,23 @@ class LogParser:
     def stop_monitoring(self):
         """Stop monitoring log files"""
         self.running = False
-        if self.observer:
-            self.observer.stop()
-            self.observer.join()
+        if self.file_watcher:
+            self.file_watcher.stop()
+        if self.flush_thread:
+            self.flush_stop.set()
+            self.flush_thread.join()
+            self.flush_thread = None
+        # The pipeline flushes open records itself once its readers are done
+        if self.pipeline:
+            self.pipeline.stop()
+        else:
+            self.flush_records(force=True)
+        if self.forwarder:
+            self.forwarder.stop()
+        if self.agent:
+            self.agent.stop()
+        if self.alert_dispatcher:
+            self.alert_dispatcher.stop()
         print("Log parser stopped")
     
     def get_status(self) -> Dict:
@@ -342,21 +797,102 @@ class LogParser:
             'running': self.running,
             'monitored_files': len(self.file_positions),
             'database_stats': db.get_statistics(),
-            'log_directory': str(self.log_directory.absolute())
+            'retention': db.get_retention_status(),
+            'log_directory': str(self.log_directory.absolute()),
+            'watch': self.file_watcher.get_status() if self.file_watcher else None,
+            'pipeline': self.pipeline.get_status() if self.pipeline else None,
+            'forwarder': self.forwarder.get_status() if self.forwarder else None,
+            'multiline': self.assembler.get_status() if self.assembler else None,
+            'alerts': self.alert_dispatcher.get_status() if self.alert_dispatcher else None,
+            'sketches': self.sketches.get_status() if self.sketches else None,
+            'fleet': self.agent.get_status() if self.agent else None,
+            'rules': self.rule_engine.get_status() if self.rule_engine else None,
+            'memory': self.memory_monitor.last_accounting if self.memory_monitor else None
         }
 
 
 def main():
     """Main function"""
+    # `python log_parser.py batch FILES...` runs a one-shot analysis instead
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        from batch_analyzer import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    # `python log_parser.py aggregate` merges deltas from parser agents
+    if len(sys.argv) > 1 and sys.argv[1] == 'aggregate':
+        from fleet import main as aggregate_main
+        sys.exit(aggregate_main(sys.argv[2:]))
+    
+    arg_parser = argparse.ArgumentParser(description="Universal log monitoring parser")
+    arg_parser.add_argument('--log-dir', action='append', metavar='DIR', dest='log_dirs',
+                            help="Directory to watch recursively (repeatable, default: logs)")
+    arg_parser.add_argument('--include', action='append', metavar='GLOB',
+                            help="Only watch matching files (repeatable, default: *.log)")
+    arg_parser.add_argument('--exclude', action='append', metavar='GLOB',
+                            help="Skip matching files and directories (repeatable)")
+    arg_parser.add_argument('--watch-mode', choices=FileWatcher.MODES, default='auto',
+                            help="native: inotify only, poll: stat polling only, auto: decide per root")
+    arg_parser.add_argument('--adaptive-sampling', action='store_true',
+                            help="Store info/debug entries at a reduced rate while lagging behind")
+    arg_parser.add_argument('--pipeline', action='store_true',
+                            help="Run reading, classification and sinks as staged worker threads")
+    arg_parser.add_argument('--exporter', choices=['client', 'collector'], default='client',
+                            help="collector: build per-line metrics at scrape time")
+    arg_parser.add_argument('--multiline', action='store_true',
+                            help="Join stack traces and continuation lines into one record")
+    arg_parser.add_argument('--forward', metavar='URL',
+                            help="Forward stored entries as gzipped NDJSON (http://, https:// or tcp://)")
+    arg_parser.add_argument('--rules', action='append', metavar='FILE',
+                            help="YAML/JSON rule file, reloaded on change (repeatable)")
+    arg_parser.add_argument('--memory-budget', type=float, metavar='MB',
+                            help="Memory budget for stored entries in MiB (default 64)")
+    arg_parser.add_argument('--aggregator', metavar='HOST:PORT',
+                            help="Report deltas to a fleet aggregator (python log_parser.py aggregate)")
+    arg_parser.add_argument('--agent-id', help="Name reported to the aggregator (default: hostname)")
+    arg_parser.add_argument('--alert-webhook', action='append', metavar='URL',
+                            help="POST batched alerts as JSON to URL (repeatable)")
+    arg_parser.add_argument('--alert-file', action='append', metavar='PATH',
+                            help="Append alerts as NDJSON to PATH (repeatable)")
+    arg_parser.add_argument('--alert-smtp', metavar='HOST[:PORT]',
+                            help="Email batched alerts (SMTP_USERNAME/SMTP_PASSWORD/SMTP_STARTTLS from env)")
+    arg_parser.add_argument('--alert-email', action='append', metavar='ADDRESS',
+                            help="Recipient for --alert-smtp (repeatable)")
+    arg_parser.add_argument('--debug-port', type=int, metavar='PORT',
+                            help="Serve /debug/memory and /debug/tracemalloc on 127.0.0.1:PORT")
+    args = arg_parser.parse_args()
+    
     print("🔧 Universal Log Monitoring Tool - Log Parser")
     print("=" * 50)
     
     # Start Prometheus metrics server
+    from prometheus_client import start_http_server
     print("📊 Starting Prometheus metrics server on port 8000...")
     start_http_server(8000)
     
     # Initialize and start log parser
-    parser = LogParser()
+    log_dirs = args.log_dirs or ['logs']
+    parser = LogParser(
+        log_directory=log_dirs[0],
+        extra_directories=log_dirs[1:],
+        include=args.include,
+        exclude=args.exclude,
+        watch_mode=args.watch_mode,
+        adaptive_sampling=args.adaptive_sampling,
+        pipeline=args.pipeline,
+        exporter=args.exporter,
+        multiline=args.multiline,
+        forward_url=args.forward,
+        rule_files=args.rules,
+        memory_budget=int(args.memory_budget * 1024 * 1024) if args.memory_budget else None,
+        aggregator=args.aggregator,
+        agent_id=args.agent_id,
+        alert_channels=build_channels(args.alert_webhook, args.alert_file, args.alert_smtp, args.alert_email)
+    )
+    
+    # Memory introspection: `kill -USR1 <pid>` prints a report
+    parser.memory_monitor.install_signal_handler()
+    if args.debug_port:
+        parser.memory_monitor.serve(args.debug_port)
+        print(f"🧠 Memory debug endpoint on http://127.0.0.1:{args.debug_port}/debug/memory")
     
     try:
         parser.start_monitoring()
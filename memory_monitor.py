@@ -0,0 +1,210 @@
+"""
+Runtime memory accounting
+Approximate byte counts for the parser's long-lived structures, exported as
+gauges, plus on-demand tracemalloc snapshot diffs for finding leaks
+"""
+
+import sys
+import time
+import tracemalloc
+from itertools import islice
+from typing import Dict, List, Optional
+
+
+def deep_size(obj, seen: Optional[set] = None, depth: int = 4) -> int:
+    """sys.getsizeof of obj plus what it references, a few levels deep"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if depth <= 0 or isinstance(obj, (str, bytes, int, float, bool)):
+        return size
+
+    depth -= 1
+    if isinstance(obj, dict):
+        for key, value in list(obj.items()):
+            size += deep_size(key, seen, depth) + deep_size(value, seen, depth)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in list(obj):
+            size += deep_size(item, seen, depth)
+    else:
+        if hasattr(obj, '__dict__'):
+            size += deep_size(vars(obj), seen, depth)
+        for slot in getattr(type(obj), '__slots__', ()):
+            if hasattr(obj, slot):
+                size += deep_size(getattr(obj, slot), seen, depth)
+    return size
+
+
+def container_size(container, sample: int = 100) -> int:
+    """
+    Approximate deep size of a list or dict from an evenly spaced sample.
+
+    Cost is bounded by the sample size, not the container length. Objects
+    shared between items (interned level names, say) are counted per item.
+    """
+    count = len(container)
+    size = sys.getsizeof(container)
+    if not count:
+        return size
+    items = container.items() if isinstance(container, dict) else container
+    step = max(1, count // sample)
+    sampled = list(islice(items, 0, None, step))
+    per_item = sum(deep_size(item) for item in sampled) / len(sampled)
+    return int(size + per_item * count)
+
+
+class MemoryMonitor:
+    """Periodic per-structure accounting and tracemalloc diffs for a LogParser"""
+
+    def __init__(self, parser, interval: float = 30.0, sample: int = 100, frames: int = 10):
+        self.parser = parser
+        self.interval = interval
+        self.sample = sample
+        self.frames = frames
+        self.next_update = 0.0
+        self.last_accounting: Dict[str, Dict] = {}
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+
+    def structures(self) -> Dict:
+        """The long-lived containers to account, by name"""
+        from dummy_database import db
+        parser = self.parser
+        structures = {
+            f'db_{level}_entries': tier for level, tier in list(db.storage['tiers'].items())
+        }
+        structures['file_positions'] = parser.file_positions
+        structures['series_counts'] = parser.series_counts
+        if parser.file_handler is not None:
+            structures['handler_positions'] = parser.file_handler.last_position
+        if parser.aggregates is not None:
+            structures['aggregate_entries'] = parser.aggregates.entries
+        return structures
+
+    def metric_children(self) -> Dict:
+        """Label children of every labelled prometheus_client metric, flattened"""
+        children = {}
+        for name, metric in vars(self.parser.metrics).items():
+            for labels, child in list(getattr(metric, '_metrics', {}).items()):
+                children[(name, labels)] = child
+        return children
+
+    def account(self) -> Dict[str, Dict]:
+        """Approximate bytes and item count per structure"""
+        accounting = {}
+        structures = self.structures()
+        if self.parser.metrics is not None:
+            structures['metric_children'] = self.metric_children()
+        for name, container in structures.items():
+            try:
+                accounting[name] = {
+                    'items': len(container),
+                    'bytes': container_size(container, self.sample)
+                }
+            except RuntimeError:
+                # Resized while sampling; the next update will catch it
+                accounting[name] = self.last_accounting.get(name, {'items': 0, 'bytes': 0})
+        return accounting
+
+    def due(self, now: Optional[float] = None) -> bool:
+        return (time.time() if now is None else now) >= self.next_update
+
+    def update(self, now: Optional[float] = None) -> Dict[str, Dict]:
+        """Recompute the accounting and export it as gauges"""
+        now = time.time() if now is None else now
+        self.next_update = now + self.interval
+        self.last_accounting = self.account()
+        if self.parser.metrics is not None:
+            for name, values in self.last_accounting.items():
+                self.parser.metrics.memory_bytes.labels(structure=name).set(values['bytes'])
+                self.parser.metrics.memory_items.labels(structure=name).set(values['items'])
+        return self.last_accounting
+
+    def tracemalloc_diff(self, top: int = 20) -> Dict:
+        """
+        Top allocation sites grown since the previous call.
+
+        The first call starts tracing (which slows allocation down) and takes
+        the baseline; later calls diff against the previous snapshot.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self.baseline = tracemalloc.take_snapshot()
+            return {'tracing': True, 'started': True, 'top': []}
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ))
+        stats = snapshot.compare_to(self.baseline, 'lineno') if self.baseline else snapshot.statistics('lineno')
+        self.baseline = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            'tracing': True,
+            'started': False,
+            'traced_bytes': current,
+            'traced_peak_bytes': peak,
+            'top': [
+                {
+                    'site': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    'size_bytes': stat.size,
+                    'size_diff_bytes': getattr(stat, 'size_diff', stat.size),
+                    'count_diff': getattr(stat, 'count_diff', stat.count)
+                }
+                for stat in stats[:top]
+            ]
+        }
+
+    def stop_tracing(self):
+        """Stop tracemalloc and drop the baseline"""
+        tracemalloc.stop()
+        self.baseline = None
+
+    def report(self, top: int = 20) -> Dict:
+        """Fresh accounting plus a tracemalloc diff"""
+        return {'structures': self.update(), 'tracemalloc': self.tracemalloc_diff(top)}
+
+    @staticmethod
+    def format_report(report: Dict) -> List[str]:
+        """Console lines for a report"""
+        lines = ["🧠 Memory accounting (approximate):"]
+        for name, values in sorted(report['structures'].items(), key=lambda item: -item[1]['bytes']):
+            lines.append(f"   {name:<20} {values['bytes'] / 1024:>12,.1f} KiB  {values['items']:>10,} items")
+        trace = report['tracemalloc']
+        if trace['started']:
+            lines.append("🔬 tracemalloc started; trigger again for a diff")
+        else:
+            lines.append(f"🔬 Top allocation sites since last snapshot "
+                         f"(traced {trace['traced_bytes'] / 1024:,.1f} KiB):")
+            for stat in trace['top']:
+                lines.append(f"   {stat['size_diff_bytes'] / 1024:>+10,.1f} KiB  "
+                             f"{stat['count_diff']:>+8,}  {stat['site']}")
+        return lines
+
+    def install_signal_handler(self, signum=None) -> bool:
+        """Print a report on SIGUSR1 (main thread only)"""
+        import signal
+        signum = signum or getattr(signal, 'SIGUSR1', None)
+        if signum is None:
+            return False
+
+        def handle(received, frame):
+            print("\n".join(self.format_report(self.report())))
+
+        try:
+            signal.signal(signum, handle)
+        except ValueError:
+            return False  # Not the main thread
+        return True
+
+    def serve(self, port: int, host: str = '127.0.0.1'):
+        """Serve /debug/memory and /debug/tracemalloc on a background thread"""
+        import threading
+        from http.server import ThreadingHTTPServer
+        from log_handlers import DebugHandler
+
+        server = ThreadingHTTPServer((host, port), DebugHandler)
+        server.memory_monitor = self
+        threading.Thread(target=server.serve_forever, daemon=True, name="debug-http").start()
+        return server
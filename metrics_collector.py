@@ -0,0 +1,196 @@
+"""
+Scrape-time metrics collector
+Keeps the per-line metrics as plain integers and builds the Prometheus metric
+families from them only when /metrics is scraped
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+# Bucket layouts shared with LogMetrics so both exporters expose the same series
+PROCESSING_BUCKETS = (.005, .01, .025, .05, .075, .1, .25, .5, .75, 1.0, 2.5, 5.0, 7.5, 10.0)
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+LAG_BUCKETS = (0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+class PlainHistogram:
+    """Histogram as a list of per-bucket integers plus a running sum"""
+    
+    __slots__ = ('bounds', 'counts', 'sum')
+    
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+    
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+    
+    def snapshot(self) -> Tuple[List[Tuple[str, int]], float]:
+        """Cumulative (le, count) buckets and the sum"""
+        from prometheus_client.utils import floatToGoString
+        counts, total = list(self.counts), self.sum
+        buckets, cumulative = [], 0
+        for bound, count in zip(self.bounds + (float('inf'),), counts):
+            cumulative += count
+            buckets.append((floatToGoString(bound), cumulative))
+        return buckets, total
+
+
+class AggregateMetrics:
+    """Per-line metric state as plain dicts of integers and PlainHistograms"""
+    
+    def __init__(self):
+        self.entries: Dict[Tuple[str, str, str], int] = {}  # (level, source, framework)
+        self.shed: Dict[str, int] = {}
+        self.http_responses: Dict[Tuple[str, str], int] = {}  # (application, status)
+        self.processing = PlainHistogram(PROCESSING_BUCKETS)
+        self.lag: Dict[Tuple[str], PlainHistogram] = {}
+        self.request_latency: Dict[Tuple[str, str], PlainHistogram] = {}
+        self.query_duration: Dict[Tuple[str], PlainHistogram] = {}
+    
+    @staticmethod
+    def _histogram(table: Dict, key: Tuple, bounds: Tuple[float, ...]) -> PlainHistogram:
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = PlainHistogram(bounds)
+        return histogram
+    
+    def record(self, record: Dict):
+        """Count one classified record"""
+        level, source = record['level'], record['source']
+        key = (level, source, record['framework'])
+        self.entries[key] = self.entries.get(key, 0) + 1
+        
+        if record['lag'] is not None:
+            self._histogram(self.lag, (source,), LAG_BUCKETS).observe(record['lag'])
+        
+        if not record['store']:
+            self.shed[level] = self.shed.get(level, 0) + 1
+        
+        fields = record['fields']
+        if fields:
+            application = record['application']
+            if 'response_time' in fields:
+                key = (application, fields.get('endpoint', 'unknown'))
+                self._histogram(self.request_latency, key, LATENCY_BUCKETS).observe(fields['response_time'])
+            if 'status' in fields:
+                key = (application, str(fields['status']))
+                self.http_responses[key] = self.http_responses.get(key, 0) + 1
+            if 'query_time' in fields:
+                self._histogram(self.query_duration, (application,), QUERY_BUCKETS).observe(fields['query_time'])
+
+
+class AggregateCollector:
+    """
+    prometheus_client collector exposing AggregateMetrics under LogMetrics' names.
+    
+    Scrapes arriving within one tick of each other share a cached snapshot.
+    """
+    
+    def __init__(self, aggregates: AggregateMetrics, tick: float = 1.0):
+        self.aggregates = aggregates
+        self.tick = tick
+        self.lock = threading.Lock()
+        self.cached: Optional[list] = None
+        self.cached_at = 0.0
+    
+    def describe(self):
+        # Names and types only, so registering does not build a snapshot
+        return self.build(AggregateMetrics())
+    
+    def collect(self):
+        with self.lock:
+            now = time.monotonic()
+            if self.cached is None or now - self.cached_at >= self.tick:
+                self.cached = self.snapshot()
+                self.cached_at = now
+            return self.cached
+    
+    def snapshot(self) -> list:
+        return self.build(self.aggregates)
+    
+    @staticmethod
+    def build(aggregates: AggregateMetrics) -> list:
+        """Build the metric families from one consistent copy of the aggregates"""
+        from prometheus_client.core import CounterMetricFamily, HistogramMetricFamily
+        
+        # dict() copies are atomic under the GIL, the writers never block
+        entries = dict(aggregates.entries)
+        
+        entries_total = CounterMetricFamily(
+            'log_entries_total', 'Total number of log entries processed',
+            labels=['level', 'source', 'framework'])
+        errors = {}
+        warnings = {}
+        for (level, source, framework), count in entries.items():
+            entries_total.add_metric([level, source, framework], count)
+            if level in ('error', 'critical'):
+                errors[(source, framework)] = errors.get((source, framework), 0) + count
+            elif level == 'warning':
+                warnings[(source, framework)] = warnings.get((source, framework), 0) + count
+        
+        families = [entries_total]
+        for name, documentation, labels, values in (
+            ('log_errors_total', 'Total number of error-level log entries',
+             ['source', 'framework'], errors),
+            ('log_warnings_total', 'Total number of warning-level log entries',
+             ['source', 'framework'], warnings),
+            ('log_entries_shed_total', 'Entries counted in metrics but not stored or printed due to sampling',
+             ['level'], {(level,): count for level, count in dict(aggregates.shed).items()}),
+            ('log_http_responses_total', 'HTTP responses reported in log lines',
+             ['application', 'status'], dict(aggregates.http_responses)),
+        ):
+            family = CounterMetricFamily(name, documentation, labels=labels)
+            for key, count in values.items():
+                family.add_metric(list(key), count)
+            families.append(family)
+        
+        for name, documentation, labels, histograms in (
+            ('log_processing_seconds', 'Time spent processing log entries',
+             [], {(): aggregates.processing}),
+            ('log_request_latency_seconds', 'Request latency reported in log lines',
+             ['application', 'endpoint'], dict(aggregates.request_latency)),
+            ('log_query_duration_seconds', 'Database query durations reported in log lines',
+             ['application'], dict(aggregates.query_duration)),
+            ('log_ingestion_lag_seconds', 'Delay between the timestamp in a log line and its processing',
+             ['source'], dict(aggregates.lag)),
+        ):
+            family = HistogramMetricFamily(name, documentation, labels=labels)
+            for key, histogram in histograms.items():
+                buckets, total = histogram.snapshot()
+                family.add_metric(list(key), buckets, total)
+            families.append(family)
+        
+        return families
+
+
+class LabelledAggregateCollector(AggregateCollector):
+    """
+    Several AggregateMetrics exported as one set of families, told apart by an
+    extra label (the fleet aggregator's per-agent state, for instance).
+    """
+    
+    def __init__(self, tables: Dict[str, AggregateMetrics], label: str, tick: float = 1.0):
+        super().__init__(AggregateMetrics(), tick)
+        self.tables = tables
+        self.label = label
+    
+    def snapshot(self) -> list:
+        from prometheus_client import Metric
+        
+        families = {}
+        for value, aggregates in list(self.tables.items()):
+            for family in self.build(aggregates):
+                merged = families.get(family.name)
+                if merged is None:
+                    merged = families[family.name] = Metric(family.name, family.documentation, family.type)
+                merged.samples.extend(
+                    sample._replace(labels={**sample.labels, self.label: value})
+                    for sample in family.samples
+                )
+        return list(families.values()) or self.build(AggregateMetrics())
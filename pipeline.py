@@ -0,0 +1,197 @@
+"""
+Staged ingestion pipeline
+Reader -> classifier -> storage/metrics/alert sinks, joined by bounded queues
+so a slow stage throttles the ones before it instead of growing memory
+"""
+
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class IngestionPipeline:
+    """Run LogParser's read, classify and sink steps as separate stages"""
+
+    SINKS = ('storage', 'metrics', 'alerts')
+
+    def __init__(self, parser, readers: int = 1, classifiers: int = 1,
+                 sink_workers: Optional[Dict[str, int]] = None,
+                 queue_size: int = 64, batch_lines: int = 1000,
+                 read_bytes: int = 1 << 20):
+        self.parser = parser
+        self.batch_lines = batch_lines
+        self.read_bytes = read_bytes
+
+        # Every queue is bounded: a full queue blocks the stage feeding it
+        self.queues = {
+            'reader': queue.Queue(queue_size),
+            'classifier': queue.Queue(queue_size),
+        }
+        for sink in self.SINKS:
+            self.queues[sink] = queue.Queue(queue_size)
+
+        self.concurrency = {'reader': readers, 'classifier': classifiers}
+        for sink in self.SINKS:
+            # The metrics sink updates plain dict counters, keep it single-threaded
+            self.concurrency[sink] = 1 if sink == 'metrics' else (sink_workers or {}).get(sink, 1)
+
+        self.sink_handlers = {
+            'storage': self._store,
+            'metrics': parser.record_metrics,
+            'alerts': parser.alert_record
+        }
+
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.file_locks: Dict[str, threading.Lock] = {}
+        self.threads: Dict[str, list] = {}
+
+        for stage, stage_queue in self.queues.items():
+            parser.metrics.pipeline_queue_depth.labels(stage=stage).set_function(stage_queue.qsize)
+        self.items = {
+            stage: parser.metrics.pipeline_items.labels(stage=stage) for stage in self.queues
+        }
+
+    def _store(self, record: Dict):
+        self.parser.store_record(record)
+        self.parser.print_record(record)
+
+    def submit(self, file_path: Path):
+        """Queue a changed file for reading; blocks while the reader queue is full"""
+        key = str(file_path)
+        with self.lock:
+            if key in self.pending:
+                return
+            self.pending.add(key)
+        self.queues['reader'].put(file_path)
+
+    def submit_lines(self, source: str, lines: list):
+        """Queue already-read lines (flushed multi-line records) for classification"""
+        self.queues['classifier'].put((source, lines))
+
+    def _file_lock(self, key: str) -> threading.Lock:
+        with self.lock:
+            return self.file_locks.setdefault(key, threading.Lock())
+
+    def _reader(self):
+        source_queue = self.queues['reader']
+        while True:
+            file_path = source_queue.get()
+            try:
+                if file_path is None:
+                    return
+                key = str(file_path)
+                with self.lock:
+                    self.pending.discard(key)
+
+                # One reader per file at a time keeps positions consistent
+                with self._file_lock(key):
+                    while True:
+                        lines = self.parser.read_new_lines(file_path, self.read_bytes)
+                        if not lines:
+                            break
+                        source = self.parser.source_name(file_path)
+                        if self.parser.assembler:
+                            lines = self.parser.assembler.feed(key, lines, source=source)
+                        for start in range(0, len(lines), self.batch_lines):
+                            self.queues['classifier'].put(
+                                (source, lines[start:start + self.batch_lines])
+                            )
+                self.items['reader'].inc()
+            except Exception as e:
+                print(f"❌ Error in reader stage for {file_path}: {e}")
+            finally:
+                source_queue.task_done()
+
+    def _classifier(self):
+        parser = self.parser
+        source_queue = self.queues['classifier']
+        sink_queues = [self.queues[sink] for sink in self.SINKS]
+        while True:
+            batch = source_queue.get()
+            try:
+                if batch is None:
+                    return
+                source, lines = batch
+                if parser.sampler:
+                    parser.update_sampling(source_queue.qsize() * self.batch_lines)
+
+                records = []
+                for line in lines:
+                    start_time = time.time()
+                    try:
+                        record = parser.classify_line(line, source, start_time)
+                    except Exception as e:
+                        print(f"❌ Error processing line: {e}")
+                        continue
+                    finally:
+                        parser.metrics.processing_time.observe(time.time() - start_time)
+                    if record:
+                        records.append(record)
+
+                if records:
+                    for sink_queue in sink_queues:
+                        sink_queue.put(records)
+                self.items['classifier'].inc(len(lines))
+            finally:
+                source_queue.task_done()
+
+    def _sink(self, sink: str):
+        handler = self.sink_handlers[sink]
+        source_queue = self.queues[sink]
+        while True:
+            records = source_queue.get()
+            try:
+                if records is None:
+                    return
+                for record in records:
+                    try:
+                        handler(record)
+                    except Exception as e:
+                        print(f"❌ Error in {sink} sink: {e}")
+                self.items[sink].inc(len(records))
+            finally:
+                source_queue.task_done()
+
+    def start(self):
+        """Start every stage's worker threads"""
+        targets = {'reader': self._reader, 'classifier': self._classifier}
+        for stage, count in self.concurrency.items():
+            target = targets.get(stage)
+            args = () if target else (stage,)
+            target = target or self._sink
+            self.threads[stage] = [
+                threading.Thread(target=target, args=args, daemon=True, name=f"pipeline-{stage}")
+                for _ in range(count)
+            ]
+            for thread in self.threads[stage]:
+                thread.start()
+
+    def join(self):
+        """Block until everything submitted so far has passed through every stage"""
+        for stage_queue in self.queues.values():
+            stage_queue.join()
+
+    def stop(self):
+        """Drain the pipeline stage by stage and stop the workers"""
+        for stage, stage_queue in self.queues.items():
+            for _ in self.threads.get(stage, []):
+                stage_queue.put(None)
+            for thread in self.threads.get(stage, []):
+                thread.join()
+            if stage == 'reader':
+                # Multi-line records still open go out before the classifiers stop
+                self.parser.flush_records(force=True)
+        self.threads = {}
+
+    def get_status(self) -> Dict:
+        """Queue depth and worker count per stage"""
+        return {
+            stage: {
+                'queue_depth': stage_queue.qsize(),
+                'workers': self.concurrency[stage]
+            }
+            for stage, stage_queue in self.queues.items()
+        }
@@ -4,13 +4,33 @@ Production Log Simulator
 Generates realistic logs from multiple applications and frameworks
 """
 
+import argparse
+import bisect
+import bz2
+import gzip
+import heapq
+import lzma
+import multiprocessing
+import os
 import random
+import re
+import string
 import time
 import threading
 from datetime import datetime
 from pathlib import Path
 import json
 
+# Openers for captured log files, keyed by suffix
+CAPTURE_OPENERS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open
+}
+
+# First timestamp in a line: 2025-07-05 12:00:00 or 2025-07-05T12:00:00
+CAPTURE_TIMESTAMP = re.compile(r"(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})")
+
 class ProductionLogSimulator:
     def __init__(self, log_directory="logs"):
         self.log_directory = Path(log_directory)
@@ -201,6 +221,39 @@ class ProductionLogSimulator:
             "usernames": ["john_doe", "jane_smith", "admin", "test_user", "api_user"],
             "filenames": ["upload.jpg", "document.pdf", "data.csv", "image.png", "backup.zip"]
         }
+        
+        # Value pools for the load generator, keyed by template field
+        # (mirrors generate_sample_values; fields absent here get a numeric pool)
+        self.field_pools = {
+            "method": self.sample_data["methods"],
+            "endpoint": self.sample_data["endpoints"],
+            "ip": self.sample_data["ips"],
+            "status": ["200", "201", "400", "401", "403", "404", "500"],
+            "response_time": range(10, 2001),
+            "user_id": range(1, 10001),
+            "cache_key": [f"cache_{i}" for i in range(1000, 10000)],
+            "query_time": range(5, 501),
+            "task_id": [f"task_{i}" for i in range(1000, 10000)],
+            "requests": range(50, 151),
+            "memory_percent": range(60, 96),
+            "rate": range(80, 121),
+            "miss_rate": range(10, 41),
+            "pool_size": range(80, 101),
+            "timeout": range(10, 31),
+            "error": self.sample_data["errors"],
+            "filename": self.sample_data["filenames"],
+            "disk_space": range(1, 11),
+            "username": self.sample_data["usernames"],
+            "attempt": range(1, 4),
+            "hits": range(90, 111),
+            "line": range(50, 201),
+            "order_id": range(10000, 100000),
+            "execution_time": range(1, 51),
+            "request_count": range(100, 201),
+            "payload_size": range(5, 51),
+            "session_count": range(800, 1001),
+            "queue_size": range(100, 1001)
+        }
     
     def generate_sample_values(self):
         """Generate random sample values for log templates"""
@@ -363,12 +416,328 @@ class ProductionLogSimulator:
             "total_apps": len(self.applications)
         }
 
+    def compile_template(self, template, constants):
+        """Precompute a renderer for one template: a %-format string plus value pools"""
+        parts = []
+        pools = []
+        for literal, field, _, _ in string.Formatter().parse(template):
+            parts.append(literal.replace("%", "%%"))
+            if field is None:
+                continue
+            parts.append("%s")
+            if field == "timestamp":
+                pools.append(None)
+            elif field in self.field_pools:
+                pools.append([str(value) for value in self.field_pools[field]])
+            elif field in constants:
+                pools.append([str(constants[field])])
+            else:
+                pools.append([str(value) for value in range(1, 1001)])
+        return "".join(parts), pools
+    
+    def build_load_plan(self):
+        """Precompute per-application renderers, level thresholds and app weights"""
+        constants = self.generate_sample_values()
+        plan = []
+        for app_name, app_config in self.applications.items():
+            error_rate = app_config["error_rate"]
+            renderers = {
+                level: [self.compile_template(t, constants) for t in templates]
+                for level, templates in self.log_templates[app_config["framework"]].items()
+            }
+            plan.append({
+                "log_file": app_config["log_file"],
+                # Same split as get_log_level
+                "thresholds": (error_rate * 0.1, error_rate * 0.3, error_rate * 0.6),
+                "renderers": (renderers["critical"], renderers["error"],
+                              renderers["warning"], renderers["info"]),
+                "weight": app_config["request_rate"]
+            })
+        return plan
+    
+    @staticmethod
+    def rate_at(elapsed, rate, profile="steady", ramp_seconds=60.0,
+                burst_period=30.0, burst_seconds=5.0, burst_multiplier=10.0):
+        """Target aggregate lines/s at a point in the run"""
+        if profile == "ramp":
+            return rate * min(1.0, max(elapsed, 0.0) / ramp_seconds) if ramp_seconds else rate
+        if profile == "burst":
+            in_burst = (elapsed % burst_period) < burst_seconds
+            return rate * burst_multiplier if in_burst else rate
+        return rate
+    
+    def run_load(self, rate=100000.0, duration=10.0, seed=0, profile="steady",
+                 pace=True, start_time=None, tick=0.1, on_batch=None, **profile_options):
+        """
+        Benchmark-grade generator: emits a target aggregate lines/s across all apps.
+        
+        Output depends only on seed, start_time, rate, profile and duration;
+        pacing only decides whether wall-clock time is waited for. Lines are
+        buffered per tick and appended with one write per file. on_batch, if
+        given, is called with the cumulative line count after each tick's writes.
+        """
+        rng = random.Random(seed)
+        rand = rng.random
+        plan = self.build_load_plan()
+        cumulative = []
+        total_weight = 0.0
+        for app in plan:
+            total_weight += app["weight"]
+            cumulative.append(total_weight)
+        
+        start_time = time.time() if start_time is None else start_time
+        handles = [
+            os.open(self.log_directory / app["log_file"], os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            for app in plan
+        ]
+        
+        self.running = True
+        written = 0
+        owed = 0.0
+        steps = int(round(duration / tick))
+        step = 0
+        virtual = 0.0
+        wall_start = time.perf_counter()
+        last_second = None
+        timestamp = ""
+        
+        try:
+            while self.running and step < steps:
+                owed += self.rate_at(virtual, rate, profile, **profile_options) * tick
+                count = int(owed)
+                owed -= count
+                
+                second = int(start_time + virtual)
+                if second != last_second:
+                    last_second = second
+                    timestamp = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+                
+                buffers = [[] for _ in plan]
+                for _ in range(count):
+                    index = bisect.bisect(cumulative, rand() * total_weight)
+                    app = plan[index]
+                    roll = rand()
+                    critical, error, warning = app["thresholds"]
+                    level = 0 if roll < critical else 1 if roll < error else 2 if roll < warning else 3
+                    templates = app["renderers"][level]
+                    fmt, pools = templates[int(rand() * len(templates))]
+                    buffers[index].append(fmt % tuple([
+                        timestamp if pool is None else pool[int(rand() * len(pool))]
+                        for pool in pools
+                    ]))
+                
+                for handle, lines in zip(handles, buffers):
+                    if lines:
+                        lines.append("")
+                        os.write(handle, "\n".join(lines).encode("utf-8"))
+                written += count
+                step += 1
+                virtual = step * tick
+                if on_batch:
+                    on_batch(written)
+                
+                if pace:
+                    delay = virtual - (time.perf_counter() - wall_start)
+                    if delay > 0:
+                        time.sleep(delay)
+        finally:
+            for handle in handles:
+                os.close(handle)
+            self.running = False
+        
+        elapsed = time.perf_counter() - wall_start
+        return {
+            "lines": written,
+            "elapsed": elapsed,
+            "lines_per_second": written / elapsed if elapsed else 0.0
+        }
+    
+    def run_load_parallel(self, processes=2, rate=100000.0, seed=0, **options):
+        """Split run_load across processes; each worker gets rate/N and seed+i"""
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.starmap(_run_load_worker, [
+                (str(self.log_directory), rate / processes, seed + index, options)
+                for index in range(processes)
+            ])
+        
+        elapsed = max(result["elapsed"] for result in results)
+        lines = sum(result["lines"] for result in results)
+        return {
+            "lines": lines,
+            "elapsed": elapsed,
+            "lines_per_second": lines / elapsed if elapsed else 0.0,
+            "workers": results
+        }
+
+    @staticmethod
+    def replay_target_name(capture_path):
+        """Output file name for a capture: strip compression and rotation suffixes"""
+        name = capture_path.name
+        if capture_path.suffix in CAPTURE_OPENERS:
+            name = name[:-len(capture_path.suffix)]
+        return re.sub(r"\.\d+$", "", name)
+    
+    @staticmethod
+    def read_capture(capture_path, index):
+        """
+        Stream (event_time, index, line) from a captured file.
+        
+        Lines without a timestamp inherit the previous one, and times never go
+        backwards, so each stream stays sorted and keeps its original order.
+        Lines before the first timestamp get 0.0 (no event time).
+        """
+        opener = CAPTURE_OPENERS.get(capture_path.suffix, open)
+        cached_prefix = None
+        cached_time = 0.0
+        event_time = 0.0
+        with opener(capture_path, "rt", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                match = CAPTURE_TIMESTAMP.search(line)
+                if match:
+                    prefix = match.group(0)
+                    if prefix != cached_prefix:
+                        cached_prefix = prefix
+                        cached_time = datetime.strptime(
+                            f"{match.group(1)} {match.group(2)}", "%Y-%m-%d %H:%M:%S"
+                        ).timestamp()
+                    event_time = max(event_time, cached_time)
+                yield event_time, index, line.rstrip("\n")
+    
+    def replay(self, capture_files, speed=1.0, retime=False, flush_lines=10000):
+        """
+        Re-emit captured log files into the log directory on their original timeline.
+        
+        Args:
+            capture_files: Plain, .gz, .bz2 or .xz log files
+            speed: Time multiplier (1.0 = real time, 10.0 = ten times faster,
+                0 = as fast as possible)
+            retime: Rewrite each line's timestamp to the replay wall-clock time
+            flush_lines: Buffered lines per file before a write is forced
+        
+        Returns:
+            Replay statistics
+        """
+        capture_paths = [Path(path) for path in capture_files]
+        targets = [self.replay_target_name(path) for path in capture_paths]
+        handles = {
+            target: os.open(self.log_directory / target, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            for target in set(targets)
+        }
+        buffers = {target: [] for target in handles}
+        
+        def flush():
+            for target, lines in buffers.items():
+                if lines:
+                    lines.append("")
+                    os.write(handles[target], "\n".join(lines).encode("utf-8"))
+                    lines.clear()
+        
+        # One pending line per capture: memory stays bounded by the file count
+        events = heapq.merge(*[
+            self.read_capture(path, index) for index, path in enumerate(capture_paths)
+        ])
+        
+        self.running = True
+        written = 0
+        max_lag = 0.0
+        first_event = None
+        retime_second = None
+        retime_stamp = ""
+        wall_start = time.time()
+        
+        try:
+            for event_time, index, line in events:
+                if not self.running:
+                    break
+                # The timeline starts at the first parsed timestamp; lines
+                # before any timestamp are written without pacing
+                if first_event is None and event_time:
+                    first_event = event_time
+                
+                if speed > 0 and event_time:
+                    due = wall_start + (event_time - first_event) / speed
+                    delay = due - time.time()
+                    if delay > 0:
+                        flush()
+                        time.sleep(delay)
+                    else:
+                        max_lag = max(max_lag, -delay)
+                
+                if retime:
+                    second = int(time.time())
+                    if second != retime_second:
+                        retime_second = second
+                        retime_stamp = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+                    line = CAPTURE_TIMESTAMP.sub(retime_stamp, line, count=1)
+                
+                target = targets[index]
+                buffers[target].append(line)
+                if len(buffers[target]) >= flush_lines:
+                    flush()
+                written += 1
+            flush()
+        finally:
+            for handle in handles.values():
+                os.close(handle)
+            self.running = False
+        
+        elapsed = time.time() - wall_start
+        return {
+            "lines": written,
+            "elapsed": elapsed,
+            "lines_per_second": written / elapsed if elapsed else 0.0,
+            "max_lag_seconds": max_lag
+        }
+
+def _run_load_worker(log_directory, rate, seed, options):
+    """Process entry point for run_load_parallel"""
+    return ProductionLogSimulator(log_directory).run_load(rate=rate, seed=seed, **options)
+
 def main():
     """Main function to run the production log simulator"""
-    simulator = ProductionLogSimulator()
+    parser = argparse.ArgumentParser(description="Production Log Simulator")
+    parser.add_argument("--log-directory", default="logs")
+    parser.add_argument("--load-rate", type=float,
+                        help="Run the load generator at this aggregate lines/s instead of the real-time simulation")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start-time", type=float, help="Epoch seconds for the first timestamp")
+    parser.add_argument("--profile", choices=["steady", "ramp", "burst"], default="steady")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--no-pace", action="store_true", help="Generate as fast as possible")
+    parser.add_argument("--replay", nargs="+", metavar="FILE",
+                        help="Replay captured log files (plain, .gz, .bz2, .xz)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Replay speed multiplier; 0 replays as fast as possible")
+    parser.add_argument("--retime", action="store_true",
+                        help="Rewrite replayed timestamps to the current time")
+    args = parser.parse_args()
+    
+    simulator = ProductionLogSimulator(args.log_directory)
     
     try:
-        simulator.start_simulation()
+        if args.replay:
+            speed = f"{args.speed:g}x" if args.speed > 0 else "max speed"
+            print(f"⏪ Replaying {len(args.replay)} capture(s) at {speed}")
+            result = simulator.replay(args.replay, speed=args.speed, retime=args.retime)
+            print(f"✅ Replayed {result['lines']:,} lines in {result['elapsed']:.2f}s "
+                  f"({result['lines_per_second']:,.0f} lines/s, max lag {result['max_lag_seconds']:.2f}s)")
+        elif args.load_rate:
+            print(f"🏎️ Load generator: {args.load_rate:,.0f} lines/s for {args.duration}s ({args.profile})")
+            options = {
+                "duration": args.duration,
+                "profile": args.profile,
+                "pace": not args.no_pace,
+                "start_time": args.start_time
+            }
+            if args.processes > 1:
+                result = simulator.run_load_parallel(args.processes, args.load_rate, args.seed, **options)
+            else:
+                result = simulator.run_load(rate=args.load_rate, seed=args.seed, **options)
+            print(f"✅ Wrote {result['lines']:,} lines in {result['elapsed']:.2f}s "
+                  f"({result['lines_per_second']:,.0f} lines/s)")
+        else:
+            simulator.start_simulation()
     except Exception as e:
         print(f"❌ Error: {e}")
     finally:
@@ -0,0 +1,168 @@
+"""
+Multi-line record assembly
+Joins stack traces and other continuation lines to the line that started the
+record, so a traceback is classified, stored, counted and alerted on once.
+A record ends when the next one starts; the last record of a file is flushed
+after a short quiet period.
+"""
+
+import re
+import threading
+import time
+from typing import AnyStr, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from field_extractor import LINE_KINDS, compile_variants
+
+# Start-of-record rules per log format, anchored at the start of the line
+START_PATTERNS = {
+    'bracketed-timestamp': r'\[\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}',  # Laravel, Django
+    'level-prefix': r'(?:DEBUG|INFO|WARN|WARNING|ERROR|CRITICAL|FATAL):\s',  # FastAPI
+    'iso-timestamp': r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}',  # Express, Spring, Python logging
+    'syslog': r'[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2} ',
+    'bracketed-level': r'\[(?:DEBUG|INFO|WARN|WARNING|ERROR|CRITICAL|FATAL)\]',
+}
+
+# Lines that continue the open record in any format
+CONTINUATION_PATTERN = (
+    r'\s'                                            # Indented frames and wrapped text
+    r'|Traceback \(most recent call last\)'          # Python
+    r'|During handling of the above exception'
+    r'|The above exception was the direct cause'
+    r'|[\w.$]+(?:Error|Exception|Exit|Interrupt)(?::|$)'  # Final exception line
+    r'|at [\w.$<]'                                   # Java/Node frames without indentation
+    r'|Caused by[: ]'
+    r'|\.\.\. \d+ (?:more|common frames omitted)'
+    r'|$'                                            # Blank lines inside a record
+)
+
+# Lines carrying a level of their own are records, not continuations
+LEVEL_PATTERN = r'\b(?:DEBUG|INFO|WARN|WARNING|ERROR|CRITICAL|FATAL)\b'
+
+
+class _OpenRecord:
+    __slots__ = ('source', 'lines', 'size', 'updated')
+
+    def __init__(self, source: str, line, now: float):
+        self.source = source
+        self.lines = [line]
+        self.size = len(line)
+        self.updated = now
+
+
+class RecordAssembler:
+    """
+    Per-file buffers joining continuation lines to their record's first line.
+    
+    State is keyed by the file (its full path); the source label only names the
+    records. level_pattern finds lines that carry a level of their own (searched
+    anywhere in the line, case-insensitively).
+    """
+
+    def __init__(self, flush_timeout: float = 0.25, max_lines: int = 500, max_bytes: int = 1 << 20,
+                 start_patterns: Optional[Dict[str, str]] = None, level_pattern: str = LEVEL_PATTERN):
+        self.flush_timeout = flush_timeout
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        patterns = start_patterns or START_PATTERNS
+        start_rules = [(name, compile_variants(pattern)) for name, pattern in patterns.items()]
+        self.start_rules = {
+            kind: [(name, regexes[kind]) for name, regexes in start_rules] for kind in LINE_KINDS
+        }
+        self.continuation = compile_variants(CONTINUATION_PATTERN)
+        self.level = compile_variants(level_pattern, re.IGNORECASE)
+        self.open: Dict[str, _OpenRecord] = {}
+        # Format learned per file: the start rule its records last matched
+        self.formats: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.stats = {'lines': 0, 'records': 0, 'joined_lines': 0}
+
+    def _starts_record(self, line: AnyStr, key: str) -> bool:
+        rules = self.start_rules[type(line)]
+        learned = self.formats.get(key)
+        if learned is not None and rules[learned][1].match(line):
+            return True
+        for index, (name, regex) in enumerate(rules):
+            if index != learned and regex.match(line):
+                self.formats[key] = index
+                return True
+        return False
+
+    @staticmethod
+    def _join(lines: List[AnyStr]) -> AnyStr:
+        if len(lines) == 1:
+            return lines[0]
+        newline = b'\n' if isinstance(lines[0], bytes) else '\n'
+        return newline.join(line.rstrip(b'\r\n' if isinstance(line, bytes) else '\r\n') for line in lines)
+
+    def _continues(self, line: AnyStr, key: str) -> bool:
+        if self.continuation[type(line)].match(line):
+            return True
+        # Known format: lines without a level marker are wrapped message text;
+        # unknown format: only recognizable continuations
+        return key in self.formats and self.level[type(line)].search(line) is None
+
+    def _close(self, key: str) -> Optional[AnyStr]:
+        record = self.open.pop(key, None)
+        if record is None:
+            return None
+        self.stats['records'] += 1
+        self.stats['joined_lines'] += len(record.lines) - 1
+        return self._join(record.lines)
+
+    def feed(self, key: str, lines: Iterable[AnyStr], now: Optional[float] = None,
+             source: Optional[str] = None) -> List[AnyStr]:
+        """
+        Add a file's new lines; returns the records they completed, in order.
+        
+        key identifies the file (its full path), source labels its records in
+        expire() and defaults to the key.
+        """
+        now = time.time() if now is None else now
+        source = key if source is None else source
+        completed = []
+        with self.lock:
+            open_record = self.open.get(key)
+            for line in lines:
+                self.stats['lines'] += 1
+                if open_record is not None and not self._starts_record(line, key):
+                    if (self._continues(line, key) and len(open_record.lines) < self.max_lines
+                            and open_record.size + len(line) <= self.max_bytes):
+                        open_record.lines.append(line)
+                        open_record.size += len(line)
+                        open_record.updated = now
+                        continue
+                elif open_record is None:
+                    self._starts_record(line, key)
+                    if not line.strip():
+                        continue
+
+                if open_record is not None:
+                    completed.append(self._close(key))
+                open_record = self.open[key] = _OpenRecord(source, line, now)
+        return completed
+
+    def expire(self, now: Optional[float] = None, force: bool = False) -> List[Tuple[str, AnyStr]]:
+        """(source, record) for open records quiet for flush_timeout, or all of them with force"""
+        now = time.time() if now is None else now
+        expired = []
+        with self.lock:
+            for key, record in list(self.open.items()):
+                if force or now - record.updated >= self.flush_timeout:
+                    expired.append((record.source, self._close(key)))
+        return expired
+
+    def assemble(self, key: str, lines: Iterable[AnyStr]) -> Iterator[AnyStr]:
+        """Records of a complete input (a whole file), including the last one"""
+        for line in lines:
+            yield from self.feed(key, (line,))
+        with self.lock:
+            record = self._close(key)
+        if record is not None:
+            yield record
+
+    def get_status(self) -> Dict:
+        return {
+            'open_records': len(self.open),
+            'formats': {key: self.start_rules[str][index][0] for key, index in list(self.formats.items())},
+            **self.stats
+        }
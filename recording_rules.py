@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Recording rule generator
+Extracts the PromQL used by the bundled dashboards and alert config, records
+each distinct rate()/increase() once in a Prometheus rules file, and can
+rewrite the dashboards to query the recorded series instead.
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+import yaml
+
+DEFAULT_SOURCES = ["dashboards/*.json", "grafana_dashboard.json", "grafana_alert_config.json"]
+
+# rate(metric{selector}[window]) and friends, the part worth precomputing
+RANGE_CALL = re.compile(
+    r'\b(rate|irate|increase)\(\s*([a-zA-Z_:][\w:]*)\s*(\{[^}]*\})?\s*\[(\w+)\]\s*\)'
+)
+MATCHER_LABEL = re.compile(r'([a-zA-Z_]\w*)\s*(?:=~|!~|!=|=)')
+# A series already recorded by a previous --rewrite, e.g. log_entries:rate5m
+RECORDED_SERIES = re.compile(r'\b([a-zA-Z_]\w*:(?:rate|irate|increase)(?:\d+[smhdwy])+)\b')
+
+# Labels summed away by the recorded series: one series per target instead
+# of one per scraped process
+DROPPED_LABELS = ("instance",)
+
+
+def iter_expressions(node):
+    """Yield every PromQL string in a dashboard ('expr') or alert config ('query')"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in ("expr", "query") and isinstance(value, str):
+                yield value
+            else:
+                yield from iter_expressions(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from iter_expressions(value)
+
+
+def record_name(function, metric, window):
+    """level:metric:operation style name, e.g. log_entries:rate1m"""
+    if function != "irate" and metric.endswith("_total"):
+        metric = metric[:-len("_total")]
+    return f"{metric}:{function}{window}"
+
+
+class RecordingRuleGenerator:
+    """Collect range-vector calls from JSON files and turn them into recording rules"""
+
+    def __init__(self, group_name="log_monitoring_recording_rules"):
+        self.group_name = group_name
+        self.expressions = []
+        self.rules = {}  # record name -> expr
+        self.recorded = set()  # Recorded series the sources already query
+
+    def add_file(self, path):
+        """Collect every expression in one dashboard or alert JSON file"""
+        with open(path, "r") as f:
+            data = json.load(f)
+        for expr in iter_expressions(data):
+            self.expressions.append(expr)
+            self.recorded.update(RECORDED_SERIES.findall(expr))
+            for match in RANGE_CALL.finditer(expr):
+                function, metric, _, window = match.groups()
+                dropped = ", ".join(DROPPED_LABELS)
+                self.rules[record_name(function, metric, window)] = (
+                    f"sum without ({dropped}) ({function}({metric}[{window}]))"
+                )
+
+    def keep_recorded(self, existing):
+        """
+        Carry over the rules for series the sources already query.
+
+        Rewritten dashboards no longer contain the original range calls, so
+        their rules can only come from the previous rules file (existing).
+
+        Returns:
+            Recorded series that are queried but defined nowhere
+        """
+        missing = []
+        for name in sorted(self.recorded):
+            if name in self.rules:
+                continue
+            if name in existing:
+                self.rules[name] = existing[name]
+            else:
+                missing.append(name)
+        return missing
+
+    def rewrite(self, expr):
+        """Replace each recorded range call in expr with its recorded series"""
+        def substitute(match):
+            function, metric, selector, window = match.groups()
+            name = record_name(function, metric, window)
+            labels = MATCHER_LABEL.findall(selector or "")
+            if name not in self.rules or any(label in DROPPED_LABELS for label in labels):
+                return match.group(0)
+            return name + (selector or "")
+        return RANGE_CALL.sub(substitute, expr)
+
+    def rewrite_node(self, node):
+        """Rewrite every expression inside a dashboard in place; returns the change count"""
+        changed = 0
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key in ("expr", "query") and isinstance(value, str):
+                    rewritten = self.rewrite(value)
+                    if rewritten != value:
+                        node[key] = rewritten
+                        changed += 1
+                else:
+                    changed += self.rewrite_node(value)
+        elif isinstance(node, list):
+            for value in node:
+                changed += self.rewrite_node(value)
+        return changed
+
+    def rewrite_dashboard(self, path):
+        """Point a dashboard file's queries at the recorded series"""
+        with open(path, "r") as f:
+            data = json.load(f)
+        changed = self.rewrite_node(data)
+        if changed:
+            Path(path).write_text(json.dumps(data, indent=2, ensure_ascii=False))
+        return changed
+
+    def rules_document(self):
+        """The rules file as a Prometheus rule_files document"""
+        return {
+            "groups": [{
+                "name": self.group_name,
+                "rules": [
+                    {"record": name, "expr": expr} for name, expr in sorted(self.rules.items())
+                ]
+            }]
+        }
+
+    def write_rules(self, path):
+        """Write the recording rules as YAML"""
+        with open(path, "w") as f:
+            f.write("# Generated by recording_rules.py - do not edit by hand\n")
+            yaml.safe_dump(self.rules_document(), f, sort_keys=False, width=120)
+
+
+def load_rules(path):
+    """record name -> expr of an existing rules file (empty if there is none)"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    document = yaml.safe_load(path.read_text()) or {}
+    return {
+        rule["record"]: rule["expr"]
+        for group in document.get("groups", [])
+        for rule in group.get("rules", [])
+        if "record" in rule
+    }
+
+
+def expand_sources(patterns):
+    """Expand source globs relative to the working directory"""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(Path().glob(pattern))
+        paths.extend(path for path in matches if path.is_file())
+    return paths
+
+
+def main(argv=None):
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Generate Prometheus recording rules from dashboards")
+    parser.add_argument("sources", nargs="*", default=DEFAULT_SOURCES,
+                        help="Dashboard/alert JSON files or globs")
+    parser.add_argument("--output", default="recording_rules.yml", help="Rules file to write")
+    parser.add_argument("--rewrite", action="store_true",
+                        help="Rewrite dashboard files in place to query the recorded series")
+    args = parser.parse_args(argv)
+
+    paths = expand_sources(args.sources)
+    if not paths:
+        print("❌ No dashboard or alert files found")
+        return 1
+
+    generator = RecordingRuleGenerator()
+    for path in paths:
+        generator.add_file(path)
+
+    print(f"📊 {len(generator.expressions)} expressions in {len(paths)} files, "
+          f"{len(set(generator.expressions))} distinct")
+    missing = generator.keep_recorded(load_rules(args.output))
+    if missing:
+        print(f"⚠️  Queried but not defined in {args.output}: {', '.join(missing)}")
+    generator.write_rules(args.output)
+    print(f"✅ Wrote {len(generator.rules)} recording rules to {args.output}")
+
+    if args.rewrite:
+        for path in paths:
+            if path.name == "grafana_alert_config.json":
+                continue  # Alert queries are read, not rewritten
+            changed = generator.rewrite_dashboard(path)
+            if changed:
+                print(f"✏️  Rewrote {changed} queries in {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
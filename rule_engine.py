@@ -0,0 +1,265 @@
+"""
+User-defined rule sets
+Per-application level and framework rules loaded from YAML/JSON files,
+hot-reloaded when the files change. Each rule's regex is only run when a
+multi-pattern literal scan (Aho-Corasick) finds one of its required literals
+in the line, so per-line cost stays flat as the rule count grows.
+"""
+
+import json
+import os
+import re
+from collections import deque
+from pathlib import Path
+from typing import AnyStr, Dict, FrozenSet, List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Shorter literals match too many lines to be worth prefiltering on
+MIN_LITERAL_LENGTH = 3
+
+LEVELS = ('critical', 'error', 'warning', 'info', 'debug')
+
+
+def _required(items) -> List[FrozenSet[str]]:
+    """
+    Literal sets found in a parsed regex sequence.
+
+    Each returned set is a requirement: every match contains at least one of
+    its literals. Runs of plain characters form single-literal sets,
+    alternations form multi-literal ones.
+    """
+    candidates = []
+    run = []
+
+    def end_run():
+        if run:
+            candidates.append(frozenset([''.join(run)]))
+            run.clear()
+
+    for op, value in items:
+        if op is sre_parse.LITERAL:
+            run.append(chr(value))
+        elif op is sre_parse.AT:
+            continue  # Anchors and \b consume nothing
+        else:
+            end_run()
+            if op is sre_parse.SUBPATTERN:
+                candidates.extend(_required(value[-1]))
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and value[0] >= 1:
+                candidates.extend(_required(value[2]))
+            elif op is sre_parse.BRANCH:
+                branches = [_best(_required(branch)) for branch in value[1]]
+                if all(branches):
+                    candidates.append(frozenset().union(*branches))
+    end_run()
+    return candidates
+
+
+def _best(candidates: List[FrozenSet[str]]) -> Optional[FrozenSet[str]]:
+    """The most selective requirement: the one whose shortest literal is longest"""
+    usable = [c for c in candidates if min(map(len, c)) >= MIN_LITERAL_LENGTH]
+    return max(usable, key=lambda c: (min(map(len, c)), -len(c)), default=None)
+
+
+def required_literals(pattern: str) -> Optional[FrozenSet[str]]:
+    """Lowercased literals of which every match of pattern contains one, or None"""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    best = _best(_required(list(parsed)))
+    return frozenset(literal.lower() for literal in best) if best else None
+
+
+class LiteralAutomaton:
+    """
+    Aho-Corasick automaton reporting which keys' literals occur in a text.
+
+    Works on str literals and text, or on bytes literals and raw bytes lines
+    (where the transitions are keyed by byte value).
+    """
+
+    def __init__(self, literals: Dict[AnyStr, Tuple[int, ...]]):
+        goto: List[Dict] = [{}]
+        outputs: List[FrozenSet[int]] = [frozenset()]
+        for literal, keys in literals.items():
+            state = 0
+            for char in literal:
+                following = goto[state].get(char)
+                if following is None:
+                    following = len(goto)
+                    goto.append({})
+                    outputs.append(frozenset())
+                    goto[state][char] = following
+                state = following
+            outputs[state] = outputs[state] | frozenset(keys)
+
+        # Breadth-first: fold failure links into the transition tables, giving
+        # a DFA that needs a single dict lookup per character
+        fail = [0] * len(goto)
+        self.delta: List[Dict] = [dict(goto[0])] + [None] * (len(goto) - 1)
+        pending = deque(goto[0].values())
+        while pending:
+            state = pending.popleft()
+            outputs[state] = outputs[state] | outputs[fail[state]]
+            transitions = dict(self.delta[fail[state]]) if state else {}
+            for char, following in goto[state].items():
+                fail[following] = self.delta[fail[state]].get(char, 0) if state else 0
+                transitions[char] = following
+                pending.append(following)
+            self.delta[state] = transitions
+        self.outputs = outputs
+
+    def search(self, text: AnyStr) -> set:
+        """Keys of every literal occurring in text"""
+        delta, outputs = self.delta, self.outputs
+        found = set()
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+
+class Rule:
+    """One user rule: a regex plus the level and/or framework it assigns"""
+
+    __slots__ = ('name', 'regex', 'bytes_regex', 'level', 'framework', 'applications', 'literals')
+
+    def __init__(self, name: str, pattern: str, level: Optional[str] = None,
+                 framework: Optional[str] = None, applications: Optional[List[str]] = None,
+                 ignore_case: bool = True):
+        if level is not None and level not in LEVELS:
+            raise ValueError(f"rule {name!r}: unknown level {level!r}")
+        if level is None and framework is None:
+            raise ValueError(f"rule {name!r}: needs a level or a framework")
+        self.name = name
+        flags = re.IGNORECASE if ignore_case else 0
+        self.regex = re.compile(pattern, flags)
+        # Raw bytes lines: \w, \b and case folding are ASCII-only here
+        self.bytes_regex = re.compile(pattern.encode('utf-8'), flags)
+        self.level = level
+        self.framework = framework
+        self.applications = frozenset(applications) if applications else None
+        self.literals = required_literals(pattern)
+
+
+class RuleMatcher:
+    """Compiled rule set: literal prefilter, then full regexes on candidate rules"""
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = rules
+        literals: Dict[str, List[int]] = {}
+        always = []
+        for index, rule in enumerate(rules):
+            if rule.literals is None:
+                always.append(index)
+            else:
+                for literal in rule.literals:
+                    literals.setdefault(literal, []).append(index)
+        self.always = frozenset(always)
+        self.automata = {}
+        if literals:
+            self.automata[str] = LiteralAutomaton({k: tuple(v) for k, v in literals.items()})
+            self.automata[bytes] = LiteralAutomaton(
+                {k.encode('utf-8'): tuple(v) for k, v in literals.items()}
+            )
+
+    def match(self, line: AnyStr, application: str) -> Tuple[Optional[str], Optional[str]]:
+        """(level, framework) from the first matching rules, in file order"""
+        automaton = self.automata.get(type(line))
+        candidates = automaton.search(line.lower()) if automaton else set()
+        if self.always:
+            candidates |= self.always
+        raw = isinstance(line, bytes)
+        level = framework = None
+        for index in sorted(candidates):
+            rule = self.rules[index]
+            if rule.applications and application not in rule.applications:
+                continue
+            if (level or not rule.level) and (framework or not rule.framework):
+                continue
+            if (rule.bytes_regex if raw else rule.regex).search(line):
+                level = level or rule.level
+                framework = framework or rule.framework
+                if level and framework:
+                    break
+        return level, framework
+
+
+def load_rules(path: Path) -> List[Rule]:
+    """Load rules from a YAML or JSON file with a top-level 'rules' list"""
+    text = Path(path).read_text()
+    if Path(path).suffix in ('.yml', '.yaml'):
+        import yaml
+        data = yaml.safe_load(text) or {}
+    else:
+        data = json.loads(text)
+
+    rules = []
+    for number, entry in enumerate(data.get('rules') or [], 1):
+        rules.append(Rule(
+            name=entry.get('name', f"{Path(path).name}#{number}"),
+            pattern=entry['pattern'],
+            level=entry.get('level'),
+            framework=entry.get('framework'),
+            applications=entry.get('applications'),
+            ignore_case=entry.get('ignore_case', True)
+        ))
+    return rules
+
+
+class RuleEngine:
+    """Rule files compiled into one matcher, recompiled when a file changes"""
+
+    def __init__(self, paths: List[str]):
+        self.paths = [Path(path) for path in paths]
+        self.mtimes: Dict[Path, Optional[float]] = {}
+        self.matcher = RuleMatcher([])
+        self.reload()
+
+    def _mtimes(self) -> Dict[Path, Optional[float]]:
+        mtimes = {}
+        for path in self.paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def reload(self) -> bool:
+        """Recompile every rule file; keeps the previous rules if one is invalid"""
+        self.mtimes = self._mtimes()
+        rules = []
+        try:
+            for path in self.paths:
+                if self.mtimes[path] is not None:
+                    rules.extend(load_rules(path))
+        except Exception as e:
+            print(f"❌ Invalid rule file, keeping previous rules: {e}")
+            return False
+        # Swapped in one assignment; lines in flight finish on the old matcher
+        self.matcher = RuleMatcher(rules)
+        print(f"📜 Loaded {len(rules)} rules from {len(self.paths)} file(s)")
+        return True
+
+    def maybe_reload(self) -> bool:
+        """Reload if any rule file was modified, created or removed"""
+        if self._mtimes() != self.mtimes:
+            return self.reload()
+        return False
+
+    def match(self, line: AnyStr, application: str) -> Tuple[Optional[str], Optional[str]]:
+        return self.matcher.match(line, application)
+
+    def get_status(self) -> Dict:
+        return {
+            'files': [str(path) for path in self.paths],
+            'rules': len(self.matcher.rules),
+            'prefiltered': len(self.matcher.rules) - len(self.matcher.always)
+        }
@@ -3,38 +3,29 @@
 Setup script for Grafana alerts and notifications
 """
 
+import argparse
 import json
-import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-from pathlib import Path
+
+from grafana_client import create_session, org_headers, wait_for_grafana
 
 
 class GrafanaAlertSetup:
-    def __init__(self, grafana_url="http://localhost:3000", username="admin", password="admin"):
+    def __init__(self, grafana_url="http://localhost:3000", username="admin", password="admin",
+                 org_ids=None, max_workers=8):
         self.grafana_url = grafana_url
         self.auth = (username, password)
-        self.headers = {"Content-Type": "application/json"}
+        self.org_ids = org_ids or [None]  # None = the user's current org
+        self.max_workers = max_workers
+        self.session = create_session(self.auth, pool_size=max_workers)
     
     def wait_for_grafana(self, max_attempts=30):
         """Wait for Grafana to be available"""
-        print("⏳ Waiting for Grafana to be available...")
-        
-        for attempt in range(max_attempts):
-            try:
-                response = requests.get(f"{self.grafana_url}/api/health", timeout=5)
-                if response.status_code == 200:
-                    print("✅ Grafana is available")
-                    return True
-            except requests.exceptions.RequestException:
-                pass
-            
-            time.sleep(2)
-            print(f"   Attempt {attempt + 1}/{max_attempts}...")
-        
-        print("❌ Grafana is not available")
-        return False
+        return wait_for_grafana(self.session, self.grafana_url, max_attempts)
     
-    def create_data_source(self):
+    def create_data_source(self, org_id=None):
         """Create Prometheus data source"""
         print("📊 Setting up Prometheus data source...")
         
@@ -47,10 +38,9 @@ class GrafanaAlertSetup:
         }
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.grafana_url}/api/datasources",
-                auth=self.auth,
-                headers=self.headers,
+                headers=org_headers(org_id),
                 data=json.dumps(data_source)
             )
             
@@ -65,7 +55,7 @@ class GrafanaAlertSetup:
             print(f"❌ Error creating data source: {e}")
             return False
     
-    def create_notification_channel_email(self):
+    def create_notification_channel_email(self, org_id=None):
         """Create email notification channel"""
         print("📧 Setting up email notification channel...")
         
@@ -80,10 +70,9 @@ class GrafanaAlertSetup:
         }
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.grafana_url}/api/alert-notifications",
-                auth=self.auth,
-                headers=self.headers,
+                headers=org_headers(org_id),
                 data=json.dumps(notification_channel)
             )
             
@@ -98,7 +87,7 @@ class GrafanaAlertSetup:
             print(f"❌ Error creating email channel: {e}")
             return False
     
-    def create_webhook_notification(self):
+    def create_webhook_notification(self, org_id=None):
         """Create webhook notification for console alerts"""
         print("🔗 Setting up webhook notification...")
         
@@ -114,10 +103,9 @@ class GrafanaAlertSetup:
         }
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.grafana_url}/api/alert-notifications",
-                auth=self.auth,
-                headers=self.headers,
+                headers=org_headers(org_id),
                 data=json.dumps(webhook_channel)
             )
             
@@ -132,6 +120,14 @@ class GrafanaAlertSetup:
             print(f"❌ Error creating webhook channel: {e}")
             return False
     
+    def setup_org(self, org_id=None):
+        """Create the data source and notification channels in one org"""
+        success = True
+        success &= self.create_data_source(org_id)
+        success &= self.create_notification_channel_email(org_id)
+        success &= self.create_webhook_notification(org_id)
+        return success
+    
     def setup(self):
         """Setup complete alerting system"""
         print("🚨 Setting up Grafana Alerting System")
@@ -140,10 +136,9 @@ class GrafanaAlertSetup:
         if not self.wait_for_grafana():
             return False
         
-        success = True
-        success &= self.create_data_source()
-        success &= self.create_notification_channel_email()
-        success &= self.create_webhook_notification()
+        # Orgs are independent of each other; provision them concurrently
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            success = all(executor.map(self.setup_org, self.org_ids))
         
         if success:
             print("\n✅ Alert setup completed successfully!")
@@ -163,7 +158,17 @@ class GrafanaAlertSetup:
 
 def main():
     """Main function"""
-    setup = GrafanaAlertSetup()
+    parser = argparse.ArgumentParser(description="Set up Grafana alert notification channels")
+    parser.add_argument("--url", default="http://localhost:3000", help="Grafana base URL")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--org", type=int, action="append", dest="orgs",
+                        help="Grafana org id to provision (repeatable; default: current org)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent requests to Grafana")
+    args = parser.parse_args()
+
+    setup = GrafanaAlertSetup(args.url, args.username, args.password,
+                              org_ids=args.orgs, max_workers=args.workers)
     setup.setup()
 
 
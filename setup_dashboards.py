@@ -4,51 +4,47 @@ Dashboard setup script for Grafana
 Automatically imports all dashboard configurations
 """
 
+import argparse
+import hashlib
 import json
-import requests
-import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import requests
+
+from grafana_client import create_session, org_headers, wait_for_grafana
+
 class GrafanaDashboardSetup:
-    def __init__(self, grafana_url="http://localhost:3000", username="admin", password="admin"):
+    def __init__(self, grafana_url="http://localhost:3000", username="admin", password="admin",
+                 org_ids=None, max_workers=8, force=False):
         self.grafana_url = grafana_url
         self.auth = (username, password)
-        self.headers = {"Content-Type": "application/json"}
         self.dashboards_dir = Path("dashboards")
+        self.org_ids = org_ids or [None]  # None = the user's current org
+        self.max_workers = max_workers
+        self.force = force
+        self.session = create_session(self.auth, pool_size=max_workers)
     
     def wait_for_grafana(self, max_attempts=30):
         """Wait for Grafana to be available"""
-        print("⏳ Waiting for Grafana to be available...")
-        
-        for attempt in range(max_attempts):
-            try:
-                response = requests.get(f"{self.grafana_url}/api/health", timeout=5)
-                if response.status_code == 200:
-                    print("✅ Grafana is available")
-                    return True
-            except requests.exceptions.RequestException:
-                pass
-            
-            time.sleep(2)
-            print(f"   Attempt {attempt + 1}/{max_attempts}...")
-        
-        print("❌ Grafana is not available")
-        return False
+        return wait_for_grafana(self.session, self.grafana_url, max_attempts)
     
-    def create_data_source(self):
+    def create_data_source(self, org_id=None):
         """Create Prometheus data source if it doesn't exist"""
-        print("📊 Setting up Prometheus data source...")
+        org = f" (org {org_id})" if org_id is not None else ""
+        print(f"📊 Setting up Prometheus data source{org}...")
+        headers = org_headers(org_id)
         
         # Check if data source already exists
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.grafana_url}/api/datasources/name/Prometheus",
-                auth=self.auth
+                headers=headers
             )
             if response.status_code == 200:
-                print("✅ Prometheus data source already exists")
+                print(f"✅ Prometheus data source already exists{org}")
                 return True
-        except:
+        except requests.exceptions.RequestException:
             pass
         
         # Create new data source
@@ -62,35 +58,85 @@ class GrafanaDashboardSetup:
         }
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.grafana_url}/api/datasources",
-                auth=self.auth,
-                headers=self.headers,
+                headers=headers,
                 data=json.dumps(data_source)
             )
             
             if response.status_code in [200, 409]:
-                print("✅ Prometheus data source created")
+                print(f"✅ Prometheus data source created{org}")
                 return True
             else:
-                print(f"❌ Failed to create data source: {response.text}")
+                print(f"❌ Failed to create data source{org}: {response.text}")
                 return False
                 
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error creating data source: {e}")
+            print(f"❌ Error creating data source{org}: {e}")
             return False
     
-    def import_dashboard(self, dashboard_file):
-        """Import a single dashboard from JSON file"""
-        print(f"📊 Importing dashboard: {dashboard_file.name}")
+    @staticmethod
+    def load_dashboard(dashboard_file):
+        """
+        Load a dashboard file, giving it a stable uid and a content hash.
+
+        The hash covers everything but the server-assigned id and version and is
+        stored in the dashboard as provisioningHash, so a later run can tell
+        whether Grafana already holds this exact content.
+        """
+        with open(dashboard_file, 'r') as f:
+            dashboard = json.load(f)["dashboard"]
         
+        # Without a uid Grafana creates a new random one per import
+        dashboard.setdefault("uid", dashboard_file.stem.replace("_", "-")[:40])
+        dashboard["id"] = None
+        content = {key: value for key, value in dashboard.items()
+                   if key not in ("id", "version", "provisioningHash")}
+        dashboard["provisioningHash"] = hashlib.sha256(
+            json.dumps(content, sort_keys=True).encode()
+        ).hexdigest()
+        return dashboard
+    
+    def is_unchanged(self, dashboard, org_id=None):
+        """Check whether Grafana already holds this dashboard's content hash"""
         try:
-            with open(dashboard_file, 'r') as f:
-                dashboard_json = json.load(f)
+            response = self.session.get(
+                f"{self.grafana_url}/api/dashboards/uid/{dashboard['uid']}",
+                headers=org_headers(org_id),
+                timeout=10
+            )
+        except requests.exceptions.RequestException:
+            return False
+        if response.status_code != 200:
+            return False
+        existing = response.json().get("dashboard", {})
+        return existing.get("provisioningHash") == dashboard["provisioningHash"]
+    
+    def import_dashboard(self, dashboard_file, org_id=None, dashboard=None):
+        """
+        Import a single dashboard from JSON file.
+
+        Returns:
+            (status, url) where status is 'imported', 'unchanged' or 'failed'
+        """
+        org = f" (org {org_id})" if org_id is not None else ""
+        
+        try:
+            if dashboard is None:
+                dashboard = self.load_dashboard(dashboard_file)
+            dashboard_url = f"{self.grafana_url}/d/{dashboard['uid']}"
+            if org_id is not None:
+                dashboard_url += f"?orgId={org_id}"
+            
+            if not self.force and self.is_unchanged(dashboard, org_id):
+                print(f"⏭️  Dashboard unchanged{org}: {dashboard_file.name}")
+                return 'unchanged', dashboard_url
+            
+            print(f"📊 Importing dashboard{org}: {dashboard_file.name}")
             
             # Prepare import payload
             import_payload = {
-                "dashboard": dashboard_json["dashboard"],
+                "dashboard": dashboard,
                 "overwrite": True,
                 "inputs": [
                     {
@@ -102,60 +148,75 @@ class GrafanaDashboardSetup:
                 ]
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.grafana_url}/api/dashboards/import",
-                auth=self.auth,
-                headers=self.headers,
-                data=json.dumps(import_payload)
+                headers=org_headers(org_id),
+                data=json.dumps(import_payload),
+                timeout=30
             )
             
             if response.status_code == 200:
-                result = response.json()
-                dashboard_url = f"{self.grafana_url}/d/{result['uid']}"
                 print(f"✅ Dashboard imported: {dashboard_url}")
-                return True, dashboard_url
+                return 'imported', dashboard_url
             else:
-                print(f"❌ Failed to import {dashboard_file.name}: {response.text}")
-                return False, None
+                print(f"❌ Failed to import {dashboard_file.name}{org}: {response.text}")
+                return 'failed', None
                 
         except Exception as e:
-            print(f"❌ Error importing {dashboard_file.name}: {e}")
-            return False, None
+            print(f"❌ Error importing {dashboard_file.name}{org}: {e}")
+            return 'failed', None
     
     def import_all_dashboards(self):
-        """Import all dashboard JSON files from dashboards directory"""
+        """Import all dashboard JSON files from dashboards directory into every org"""
         print("📊 Importing all dashboards...")
         
         if not self.dashboards_dir.exists():
             print("❌ Dashboards directory not found")
             return False
         
-        dashboard_files = list(self.dashboards_dir.glob("*.json"))
+        dashboard_files = sorted(self.dashboards_dir.glob("*.json"))
         if not dashboard_files:
             print("❌ No dashboard JSON files found")
             return False
         
-        imported_dashboards = []
+        # Load and hash each file once, whatever the number of orgs
+        dashboards = {}
         failed_imports = []
-        
         for dashboard_file in dashboard_files:
-            success, url = self.import_dashboard(dashboard_file)
-            if success:
+            try:
+                dashboards[dashboard_file] = self.load_dashboard(dashboard_file)
+            except Exception as e:
+                print(f"❌ Error loading {dashboard_file.name}: {e}")
+                failed_imports.extend(dashboard_file.name for _ in self.org_ids)
+        
+        jobs = [(dashboard_file, org_id) for org_id in self.org_ids for dashboard_file in dashboards]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(
+                lambda job: self.import_dashboard(job[0], job[1], dashboards[job[0]]), jobs
+            ))
+        
+        imported_dashboards = []
+        unchanged_dashboards = []
+        for (dashboard_file, org_id), (status, url) in zip(jobs, results):
+            if status == 'imported':
                 imported_dashboards.append((dashboard_file.name, url))
+            elif status == 'unchanged':
+                unchanged_dashboards.append((dashboard_file.name, url))
             else:
                 failed_imports.append(dashboard_file.name)
         
         print(f"\n📊 Dashboard Import Summary:")
         print(f"✅ Successfully imported: {len(imported_dashboards)}")
+        print(f"⏭️  Unchanged (skipped): {len(unchanged_dashboards)}")
         print(f"❌ Failed imports: {len(failed_imports)}")
         
-        if imported_dashboards:
+        if imported_dashboards or unchanged_dashboards:
             print("\n🎯 Access your dashboards:")
-            for name, url in imported_dashboards:
+            for name, url in imported_dashboards + unchanged_dashboards:
                 print(f"   • {name}: {url}")
         
         if failed_imports:
-            print(f"\n❌ Failed to import: {', '.join(failed_imports)}")
+            print(f"\n❌ Failed to import: {', '.join(sorted(set(failed_imports)))}")
         
         return len(failed_imports) == 0
     
@@ -167,11 +228,9 @@ class GrafanaDashboardSetup:
         if not self.wait_for_grafana():
             return False
         
-        if not self.create_data_source():
-            return False
-        
-        # Small delay to ensure data source is ready
-        time.sleep(2)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            if not all(executor.map(self.create_data_source, self.org_ids)):
+                return False
         
         success = self.import_all_dashboards()
         
@@ -190,8 +249,20 @@ class GrafanaDashboardSetup:
 
 def main():
     """Main function"""
-    setup = GrafanaDashboardSetup()
+    parser = argparse.ArgumentParser(description="Import the bundled dashboards into Grafana")
+    parser.add_argument("--url", default="http://localhost:3000", help="Grafana base URL")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--org", type=int, action="append", dest="orgs",
+                        help="Grafana org id to provision (repeatable; default: current org)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent requests to Grafana")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-import dashboards even if their content is unchanged")
+    args = parser.parse_args()
+
+    setup = GrafanaDashboardSetup(args.url, args.username, args.password,
+                                  org_ids=args.orgs, max_workers=args.workers, force=args.force)
     setup.setup()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
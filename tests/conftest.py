@@ -0,0 +1,24 @@
+"""Shared pytest setup: the modules live at the repository root"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def wait_until():
+    """Poll a condition until it holds or the timeout passes; returns its last value"""
+    def wait(condition, timeout=5.0, interval=0.01):
+        deadline = time.monotonic() + timeout
+        while True:
+            result = condition()
+            if result or time.monotonic() > deadline:
+                return result
+            time.sleep(interval)
+    return wait
@@ -0,0 +1,233 @@
+"""Alert delivery against local stub HTTP and SMTP servers"""
+
+import email
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from alert_dispatcher import (AlertChannel, AlertDispatcher, FileChannel, SmtpChannel,
+                              WebhookChannel, build_channels)
+
+
+class WebhookStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), WebhookStubHandler)
+        self.failures = 0  # Requests to answer with 500 before accepting
+        self.batches = []
+        self.attempts = []  # monotonic time of every request
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/alerts"
+
+
+class WebhookStubHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        stub = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        stub.attempts.append(time.monotonic())
+        if stub.failures > 0:
+            stub.failures -= 1
+            status = 500
+        else:
+            stub.batches.append(body['alerts'])
+            status = 200
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SmtpStub(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SmtpStubHandler)
+        self.connections = 0
+        self.noops = 0
+        self.messages = []
+
+
+class SmtpStubHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: greeting, EHLO, MAIL/RCPT, DATA, NOOP, QUIT"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        stub = self.server
+        stub.connections += 1
+        self.reply("220 stub ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb = line.decode().strip().split(' ', 1)[0].upper()
+            if verb == 'DATA':
+                self.reply("354 end with .")
+                data = []
+                while True:
+                    line = self.rfile.readline()
+                    if line in (b".\r\n", b""):
+                        break
+                    data.append(line[1:] if line.startswith(b"..") else line)
+                stub.messages.append(email.message_from_bytes(b"".join(data)))
+                self.reply("250 queued")
+            elif verb == 'QUIT':
+                self.reply("221 bye")
+                return
+            else:
+                if verb == 'NOOP':
+                    stub.noops += 1
+                self.reply("250 ok")
+
+
+def serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def webhook():
+    server = serve(WebhookStub())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def smtp():
+    server = serve(SmtpStub())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_dispatcher(tmp_path, *channels):
+    dispatcher = AlertDispatcher(list(channels), dead_letter_path=str(tmp_path / "dead-letter.ndjson"))
+    dispatcher.start()
+    return dispatcher
+
+
+def dispatch(dispatcher, count, level='error'):
+    for number in range(count):
+        dispatcher.dispatch(level, f"alert {number}", 'app.log', 'laravel')
+
+
+def test_channel_requires_deliver():
+    with pytest.raises(TypeError):
+        AlertChannel()
+
+
+def test_webhook_batches(webhook, tmp_path, wait_until):
+    channel = WebhookChannel(webhook.url, batch_size=5, flush_interval=0.3)
+    dispatcher = make_dispatcher(tmp_path, channel)
+    dispatch(dispatcher, 12)
+    assert wait_until(lambda: sum(map(len, webhook.batches)) == 12)
+    dispatcher.stop()
+
+    assert [len(batch) for batch in webhook.batches] == [5, 5, 2]
+    messages = [alert['message'] for batch in webhook.batches for alert in batch]
+    assert messages == [f"alert {number}" for number in range(12)]
+    assert set(webhook.batches[0][0]) == {'timestamp', 'level', 'source', 'framework', 'message'}
+    assert channel.get_status()['sent'] == 12 and channel.get_status()['batches'] == 3
+
+
+def test_webhook_retries_with_backoff(webhook, tmp_path, wait_until):
+    webhook.failures = 2
+    channel = WebhookChannel(webhook.url, flush_interval=0.05, initial_backoff=0.1, max_attempts=5)
+    dispatcher = make_dispatcher(tmp_path, channel)
+    dispatch(dispatcher, 3)
+    assert wait_until(lambda: webhook.batches)
+    dispatcher.stop()
+
+    assert [len(batch) for batch in webhook.batches] == [3]
+    first, second, third = webhook.attempts
+    assert second - first >= 0.1
+    assert third - second >= 0.2  # Doubled
+    assert channel.stats['failed_attempts'] == 2
+    assert channel.stats['dead_lettered'] == 0
+    assert not (tmp_path / "dead-letter.ndjson").exists()
+
+
+def test_dead_letter_after_max_attempts(webhook, tmp_path, wait_until):
+    webhook.failures = 100
+    channel = WebhookChannel(webhook.url, flush_interval=0.05, initial_backoff=0.01, max_attempts=3)
+    dispatcher = make_dispatcher(tmp_path, channel)
+    dispatch(dispatcher, 4, level='critical')
+    assert wait_until(lambda: channel.stats['dead_lettered'] == 4)
+    dispatcher.stop()
+
+    assert len(webhook.attempts) == 3
+    lines = (tmp_path / "dead-letter.ndjson").read_text().splitlines()
+    assert len(lines) == 4
+    entry = json.loads(lines[0])
+    assert entry['channel'] == 'webhook'
+    assert '500' in entry['error']
+    assert entry['alert']['level'] == 'critical' and entry['alert']['message'] == 'alert 0'
+
+
+def test_full_queue_drops_without_blocking(tmp_path):
+    channel = FileChannel(str(tmp_path / "alerts.ndjson"), queue_size=2)
+    dispatcher = AlertDispatcher([channel], dead_letter_path=str(tmp_path / "dead-letter.ndjson"))
+    started = time.monotonic()
+    dispatch(dispatcher, 5)  # Not started: nothing drains the queue
+    assert time.monotonic() - started < 0.5
+    assert channel.stats['dropped'] == 3
+    assert channel.get_status()['queued'] == 2
+
+
+def test_stop_flushes_queued_alerts(tmp_path):
+    path = tmp_path / "alerts.ndjson"
+    # Far longer flush interval than the test: only stop() can flush the batch
+    channel = FileChannel(str(path), flush_interval=60.0)
+    dispatcher = make_dispatcher(tmp_path, channel)
+    dispatch(dispatcher, 3)
+    started = time.monotonic()
+    dispatcher.stop()
+    assert time.monotonic() - started < 5.0
+    assert [json.loads(line)['message'] for line in path.read_text().splitlines()] == \
+        ["alert 0", "alert 1", "alert 2"]
+    assert channel.thread is None
+
+
+def test_smtp_batches_over_one_connection(smtp, tmp_path, wait_until):
+    channel = SmtpChannel('127.0.0.1', ['oncall@example.com'], port=smtp.server_address[1],
+                          sender='monitor@example.com', flush_interval=0.1)
+    dispatcher = make_dispatcher(tmp_path, channel)
+    dispatcher.dispatch('critical', 'disk full', 'db.log', 'unknown')
+    dispatch(dispatcher, 2)
+    assert wait_until(lambda: len(smtp.messages) == 1)
+    dispatch(dispatcher, 1)
+    assert wait_until(lambda: len(smtp.messages) == 2)
+    dispatcher.stop()
+
+    first = smtp.messages[0]
+    assert first['Subject'] == "[log-monitor] 3 alert(s), 1 critical"
+    assert first['To'] == 'oncall@example.com' and first['From'] == 'monitor@example.com'
+    body = first.get_payload()
+    assert "disk full" in body and "alert 1" in body
+    # The second batch reused the connection after checking it with NOOP
+    assert smtp.connections == 1 and smtp.noops == 1
+
+
+def test_build_channels_names_and_smtp_env(monkeypatch):
+    monkeypatch.setenv('SMTP_USERNAME', 'bot')
+    monkeypatch.setenv('SMTP_STARTTLS', 'true')
+    channels = build_channels(['http://a/hook', 'http://b/hook'], ['alerts.ndjson'],
+                              'mail.example.com:2525', ['oncall@example.com'])
+    assert [channel.name for channel in channels] == ['webhook', 'webhook-2', 'file', 'smtp']
+    smtp_channel = channels[-1]
+    assert (smtp_channel.port, smtp_channel.username, smtp_channel.starttls) == (2525, 'bot', True)
+    with pytest.raises(ValueError):
+        build_channels(smtp_host='mail.example.com')
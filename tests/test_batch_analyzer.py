@@ -0,0 +1,31 @@
+"""One-shot batch analysis counts records the way the live parser does"""
+
+import json
+
+from batch_analyzer import main
+
+TRACEBACK = """2025-07-05 12:00:00,001 ERROR worker: job failed
+Traceback (most recent call last):
+  File "worker.py", line 10, in run
+    raise Error("card expired")
+payments.Error: card expired
+2025-07-05 12:00:01,000 INFO worker: next job
+"""
+
+
+def analyze(tmp_path, capsys, *flags):
+    path = tmp_path / "worker.log"
+    path.write_text(TRACEBACK)
+    assert main([str(path), *flags]) == 0
+    return json.loads(capsys.readouterr().out)
+
+
+def test_lines_are_records_by_default(tmp_path, capsys):
+    summary = analyze(tmp_path, capsys)
+    # Frames mentioning an error are entries of their own, as in live monitoring
+    assert summary['levels'] == {'error': 3, 'info': 1}
+
+
+def test_multiline_joins_stack_traces(tmp_path, capsys):
+    summary = analyze(tmp_path, capsys, '--multiline')
+    assert summary['levels'] == {'error': 1, 'info': 1}
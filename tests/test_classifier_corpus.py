@@ -0,0 +1,39 @@
+"""Every classifier implementation must reproduce the golden corpus labels"""
+
+import pytest
+
+from classifier_benchmark import IMPLEMENTATIONS, check_equivalence, load_corpus
+
+CORPUS = load_corpus()
+
+
+@pytest.fixture(scope="module", params=list(IMPLEMENTATIONS))
+def implementation(request):
+    return request.param, IMPLEMENTATIONS[request.param]()
+
+
+@pytest.mark.parametrize("record", CORPUS, ids=lambda record: record["line"][:40])
+def test_matches_golden_labels(implementation, record):
+    name, (detect_level, detect_framework) = implementation
+    actual = (detect_level(record["line"]), detect_framework(record["line"]))
+    assert actual == (record["level"], record["framework"]), f"{name}: {record['line']!r}"
+
+
+def test_bytes_lines_match_text_lines():
+    """The hot path classifies undecoded bytes; it must agree with str lines"""
+    from log_parser import LogParser
+    parser = LogParser(extract_fields=False, detect_anomalies=False, monitoring=False)
+    for record in CORPUS:
+        encoded = record["line"].encode("utf-8")
+        assert parser.detect_log_level(encoded) == record["level"]
+        assert parser.detect_framework(encoded) == record["framework"]
+
+
+@pytest.mark.parametrize("name", list(IMPLEMENTATIONS))
+def test_check_equivalence_reports_no_mismatches(name):
+    assert check_equivalence(name, CORPUS) == []
+
+
+def test_corpus_covers_every_level():
+    levels = {record["level"] for record in CORPUS}
+    assert {"critical", "error", "warning", "info", "debug", None} <= levels
@@ -0,0 +1,141 @@
+"""Per-level retention tiers and the memory budget of the in-memory store"""
+
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import dummy_database
+import log_parser
+from dummy_database import DEFAULT_RETENTION, ENTRY_OVERHEAD, DummyDatabase
+
+LEVELS = ('critical', 'error', 'warning', 'info', 'debug')
+MESSAGE = "x" * 40
+ENTRY_BYTES = ENTRY_OVERHEAD + sys.getsizeof(MESSAGE)
+
+
+def level_counts(database):
+    return {level: tier['entries'] for level, tier in database.get_retention_status()['tiers'].items()}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(dummy_database, 'time', SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_lowest_priority_tier_is_evicted_first(clock):
+    database = DummyDatabase(budget_bytes=100 * ENTRY_BYTES)
+    for level in LEVELS:
+        for _ in range(20):
+            database.add_log_entry(level, MESSAGE)
+    assert database.get_statistics()['evicted_entries'] == 0
+
+    # Debug holds 4x its share, info 2x: debug goes first
+    for _ in range(5):
+        database.add_log_entry('critical', MESSAGE)
+    assert level_counts(database) == {'critical': 25, 'error': 20, 'warning': 20, 'info': 20, 'debug': 15}
+
+    # Once debug is down to info's ratio, both are evicted before anything else
+    for _ in range(10):
+        database.add_log_entry('critical', MESSAGE)
+    assert level_counts(database) == {'critical': 35, 'error': 20, 'warning': 20, 'info': 17, 'debug': 8}
+    assert database.get_retention_status()['used_bytes'] <= database.budget_bytes
+
+
+def test_errors_survive_an_info_flood(clock):
+    database = DummyDatabase(budget_bytes=200 * ENTRY_BYTES)
+    for number in range(10):
+        database.add_log_entry('error', f"error {number:<34}")
+        database.add_log_entry('critical', f"critical {number:<31}")
+    for number in range(10000):
+        database.add_log_entry('info', f"info {number:<35}")
+
+    counts = level_counts(database)
+    assert counts['error'] == 10 and counts['critical'] == 10
+    assert counts['info'] == 180
+    assert [entry['message'].rstrip() for entry in database.get_entries_by_level('info', 2)] == \
+        ["info 9998", "info 9999"]  # Oldest info entries are the ones evicted
+    stats = database.get_statistics()
+    assert stats['total_entries'] == 10020 and stats['info_count'] == 10000
+    assert stats['evicted_entries'] == 10000 - 180
+    assert len(database.get_unalerted_errors()) == 20
+
+
+def test_aged_out_entries_are_dropped_on_insert(clock):
+    database = DummyDatabase()
+    database.add_log_entry('info', "old info")
+    database.add_log_entry('error', "old error")
+    clock[0] += DEFAULT_RETENTION['info']['max_age'] + 1
+    database.add_log_entry('warning', "new warning")
+
+    assert [entry['message'] for entry in database.get_recent_entries()] == ["old error", "new warning"]
+    tiers = database.get_retention_status()['tiers']
+    assert tiers['info']['entries'] == 0 and tiers['info']['oldest_age'] is None
+    assert tiers['error']['oldest_age'] == DEFAULT_RETENTION['info']['max_age'] + 1
+
+
+def test_recent_entries_keep_their_shape_and_order(clock):
+    database = DummyDatabase()
+    for number in range(30):
+        database.add_log_entry(LEVELS[number % 5].upper(), f"message {number}", 'api.log', 'django')
+
+    recent = database.get_recent_entries(10)
+    assert [entry['message'] for entry in recent] == [f"message {number}" for number in range(20, 30)]
+    assert {'timestamp', 'level', 'message', 'source', 'framework', 'alert_sent'} <= set(recent[0])
+    assert recent[0]['level'] == 'critical' and recent[0]['source'] == 'api.log'
+    assert len(database.get_recent_entries()) == 30
+    assert [entry['message'] for entry in database.get_entries_by_level('ERROR', 2)] == \
+        ["message 21", "message 26"]
+
+    # mark_alert_sent indexes entries chronologically, as the old list did
+    assert database.mark_alert_sent(1)
+    assert not database.mark_alert_sent(-1)
+    assert "message 1" not in [entry['message'] for entry in database.get_unalerted_errors()]
+
+    database.clear_old_entries(keep_last=5)
+    assert [entry['message'] for entry in database.get_recent_entries()] == \
+        [f"message {number}" for number in range(25, 30)]
+
+
+def test_statistics_and_parser_status_keep_their_keys(monkeypatch):
+    database = DummyDatabase()
+    monkeypatch.setattr(log_parser, 'db', database)
+    parser = log_parser.LogParser(detect_anomalies=False, monitoring=False)
+    database.add_log_entry('error', "boom")
+
+    status = parser.get_status()
+    assert {'total_entries', 'error_count', 'warning_count', 'info_count', 'debug_count',
+            'last_processed'} <= set(status['database_stats'])
+    assert status['database_stats']['error_count'] == 1
+    assert set(status['retention']) == {'budget_bytes', 'used_bytes', 'tiers'}
+    assert set(status['retention']['tiers']['error']) == \
+        {'entries', 'bytes', 'share_bytes', 'max_age', 'oldest_age'}
+
+
+def test_memory_budget_is_split_by_share(monkeypatch):
+    database = DummyDatabase()
+    monkeypatch.setattr(log_parser, 'db', database)
+    budget = 1024 * 1024
+    log_parser.LogParser(detect_anomalies=False, monitoring=False, memory_budget=budget)
+    for level in LEVELS:
+        database.add_log_entry(level, MESSAGE)
+
+    status = database.get_retention_status()
+    assert status['budget_bytes'] == budget
+    assert status['used_bytes'] == 5 * ENTRY_BYTES
+    for level in LEVELS:
+        assert status['tiers'][level]['share_bytes'] == int(DEFAULT_RETENTION[level]['share'] * budget)
+    assert sum(tier['share_bytes'] for tier in status['tiers'].values()) <= budget
+
+
+def test_shrinking_the_budget_evicts_immediately(clock):
+    database = DummyDatabase()
+    for level in LEVELS:
+        for _ in range(10):
+            database.add_log_entry(level, MESSAGE)
+    database.configure_retention(budget_bytes=20 * ENTRY_BYTES)
+    # Every tier ends up at its share of the new budget
+    assert level_counts(database) == {'critical': 7, 'error': 6, 'warning': 4, 'info': 2, 'debug': 1}
+    assert database.get_statistics()['evicted_entries'] == 30
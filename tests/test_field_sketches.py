@@ -0,0 +1,63 @@
+"""Field sketch value extraction and heavy-hitter answers"""
+
+import pytest
+
+from field_sketches import FieldSketches
+
+
+def record(line, level='error', fields=None, source='user-service.log'):
+    return {'line': line, 'level': level, 'source': source, 'fields': fields}
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("ERROR: 2025-07-05 12:00:00 - Authentication failed for user: 4821", "4821"),
+    ("2025-07-05 12:00:00 [ERROR] Authentication failed for user 77", "77"),
+    ("INFO: 2025-07-05 12:00:00 - User 193 authenticated successfully", "193"),
+    ("[2025-07-05 12:00:00] ERROR django.auth: Authentication failed for user 'john_doe'", "john_doe"),
+    ('[2025-07-05 12:00:00] local.ERROR: GET /api/orders {"ip":"10.0.0.1","user_id":512}', "512"),
+    ('[2025-07-05 12:00:00] local.ERROR: {"user_id": "abc"} rejected', "abc"),
+    ("payment declined user_id=u-1 amount=10", "u-1"),
+    ("token refresh failed for user 3f2a-9c1e", "3f2a-9c1e"),
+    ("session expired for user u123x", "u123x"),
+])
+def test_user_id_fallback_captures_identifiers(line, expected):
+    assert FieldSketches().values(record(line)).get('user_id') == expected
+
+
+@pytest.mark.parametrize("line", [
+    "ERROR: User authentication failed",
+    "WARNING: new user registered without email",
+    "ERROR: user: session store unavailable",
+    "CRITICAL: User 'quoted for no reason",
+])
+def test_user_id_fallback_ignores_ordinary_words(line):
+    assert 'user_id' not in FieldSketches().values(record(line))
+
+
+def test_bytes_lines_use_the_same_patterns():
+    values = FieldSketches().values(record(b"ERROR 10.1.2.3 Authentication failed for user 42"))
+    assert values == {'ip': '10.1.2.3', 'user_id': '42'}
+
+
+def test_extracted_fields_win_over_fallbacks():
+    values = FieldSketches().values(record("user 99 from 10.0.0.9", fields={'user_id': 7, 'endpoint': '/api'}))
+    assert values == {'user_id': '7', 'endpoint': '/api', 'ip': '10.0.0.9'}
+
+
+def test_top_user_ids_are_not_polluted_by_words():
+    sketches = FieldSketches()
+    for number in range(200):
+        sketches.observe(record(f"ERROR: Authentication failed for user {number % 5}"), now=1000.0)
+        sketches.observe(record("ERROR: User authentication failed"), now=1000.0)
+        sketches.observe(record("ERROR: user registered twice"), now=1000.0)
+    result = sketches.query('user_id', now=1000.0)
+    assert sorted(item['value'] for item in result['top']) == [str(number) for number in range(5)]
+    assert all(item['count'] == 40 for item in result['top'])
+    assert result['distinct'] == 5
+    assert result['total'] == 200
+
+
+def test_info_entries_are_not_sketched():
+    sketches = FieldSketches()
+    sketches.observe(record("INFO: User 5 logged in", level='info'), now=1000.0)
+    assert sketches.series == {}
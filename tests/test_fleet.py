@@ -0,0 +1,154 @@
+"""Fleet agents reporting to an aggregator over localhost"""
+
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import CollectorRegistry, generate_latest
+
+import fleet
+from dummy_database import db
+from fleet import FleetAgent, FleetAggregator
+from metrics_collector import AggregateMetrics
+
+
+def make_record(level='error', source='app.log', line='boom'):
+    return {
+        'level': level, 'source': source, 'framework': 'laravel', 'application': 'legacy-app',
+        'line': line, 'event_time': None, 'lag': None, 'fields': None, 'store': True
+    }
+
+
+def make_agent(aggregator, agent_id, **kwargs):
+    parser = SimpleNamespace(aggregates=AggregateMetrics())
+    port = aggregator.server.server_address[1]
+    kwargs.setdefault('initial_backoff', 0.0)
+    return FleetAgent(parser, f"127.0.0.1:{port}", agent_id, **kwargs)
+
+
+def observe(agent, count, level='error', source='app.log'):
+    for number in range(count):
+        record = make_record(level, source, f"{agent.agent_id} {level} {number}")
+        agent.aggregates.record(record)
+        agent.submit(record)
+
+
+@pytest.fixture
+def aggregator():
+    aggregator = FleetAggregator('127.0.0.1', 0)
+    aggregator.start()
+    yield aggregator
+    aggregator.stop()
+
+
+def test_agents_merge_with_agent_label(aggregator):
+    agents = [make_agent(aggregator, f"web-{number}") for number in range(3)]
+    for number, agent in enumerate(agents, 1):
+        observe(agent, 10 * number)
+        observe(agent, number, level='info')
+        assert agent.flush()
+
+    assert aggregator.aggregates.entries[('error', 'app.log', 'laravel')] == 60
+    assert aggregator.aggregates.entries[('info', 'app.log', 'laravel')] == 6
+
+    registry = CollectorRegistry()
+    registry.register(aggregator.collector())
+    exposition = generate_latest(registry).decode()
+    for number in range(3):
+        assert (f'log_entries_total{{agent="web-{number}",framework="laravel",level="error",source="app.log"}} '
+                f'{10 * (number + 1)}.0') in exposition
+        assert f'log_errors_total{{agent="web-{number}",framework="laravel",source="app.log"}}' in exposition
+
+    sources = {entry['source'] for entry in db.get_recent_entries(1000)}
+    assert {'web-0/app.log', 'web-1/app.log', 'web-2/app.log'} <= sources
+    for agent in agents:
+        agent._close()
+
+
+def test_duplicate_sequence_is_not_applied_twice(aggregator):
+    agent = make_agent(aggregator, 'dup')
+    observe(agent, 5)
+    delta = agent.build_delta()
+    instance = agent.instance
+    aggregator.connect('dup', instance, '127.0.0.1')
+
+    assert aggregator.apply('dup', instance, delta)
+    assert not aggregator.apply('dup', instance, delta)
+    assert aggregator.aggregates.entries[('error', 'app.log', 'laravel')] == 5
+    state = aggregator.get_status()['agents']['dup']
+    assert state['applied'] == 1 and state['duplicates'] == 1
+
+
+def test_lost_ack_is_resynced_on_reconnect(aggregator, monkeypatch):
+    agent = make_agent(aggregator, 'lossy')
+    observe(agent, 7)
+
+    # The delta is applied but its ack never arrives
+    real_read_frame = fleet.read_frame
+
+    def lose_ack(sock):
+        message = real_read_frame(sock)
+        if message and message.get('type') == 'ack':
+            raise ConnectionError("connection reset")
+        return message
+
+    monkeypatch.setattr(fleet, 'read_frame', lose_ack)
+    assert not agent.flush()
+    assert agent.pending is not None
+    monkeypatch.setattr(fleet, 'read_frame', real_read_frame)
+
+    # Reconnecting learns the sequence was applied and drops it instead of resending
+    agent.retry_at = 0.0
+    assert agent.flush()
+    assert agent.pending is None
+    status = aggregator.get_status()['agents']['lossy']
+    assert status['applied'] == 1 and status['duplicates'] == 0
+    assert aggregator.aggregates.entries[('error', 'app.log', 'laravel')] == 7
+
+    observe(agent, 3)
+    assert agent.flush()
+    assert aggregator.aggregates.entries[('error', 'app.log', 'laravel')] == 10
+    agent._close()
+
+
+def test_outage_owes_one_delta_not_one_per_attempt(aggregator):
+    agent = make_agent(aggregator, 'outage')
+    observe(agent, 4)
+    assert agent.flush()
+
+    port = aggregator.server.server_address[1]
+    aggregator.stop()
+    agent._close()
+    for _ in range(3):
+        observe(agent, 5)
+        agent.retry_at = 0.0
+        assert not agent.flush()
+    assert agent.pending['seq'] == 2  # One delta owed, not one per failed attempt
+
+    restarted = FleetAggregator('127.0.0.1', port)
+    restarted.start()
+    try:
+        # The owed delta, then one more with everything counted since it was built
+        agent.retry_at = 0.0
+        assert agent.flush() and agent.flush()
+        assert restarted.aggregates.entries[('error', 'app.log', 'laravel')] == 15
+        assert restarted.get_status()['agents']['outage']['last_seq'] == 3
+    finally:
+        agent._close()
+        restarted.stop()
+
+
+def test_restarted_agent_starts_a_new_sequence(aggregator):
+    first = make_agent(aggregator, 'api')
+    observe(first, 2)
+    assert first.flush() and first.flush()
+    first._close()
+
+    # Same agent id, new process: sequence 1 again, which must not count as a duplicate
+    second = make_agent(aggregator, 'api')
+    observe(second, 3)
+    assert second.flush()
+    status = aggregator.get_status()['agents']['api']
+    assert status['last_seq'] == 1 and status['duplicates'] == 0
+    assert aggregator.aggregates.entries[('error', 'app.log', 'laravel')] == 5
+    assert aggregator.agent_aggregates['api'].entries[('error', 'app.log', 'laravel')] == 5
+    second._close()
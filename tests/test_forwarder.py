@@ -0,0 +1,198 @@
+"""EntryForwarder against local stand-in HTTP and TCP receivers"""
+
+import gzip
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from forwarder import EntryForwarder
+
+
+def make_record(number, message=None):
+    return {
+        'event_time': None,
+        'level': 'error' if number % 2 else 'info',
+        'source': 'app.log',
+        'framework': 'laravel',
+        'application': 'legacy-app',
+        'line': message or f"entry {number}",
+        'fields': None
+    }
+
+
+def messages(batches):
+    return [json.loads(line)['message'] for batch in batches for line in batch]
+
+
+class HttpReceiver(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), HttpReceiverHandler)
+        self.batches = []
+        self.headers_seen = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/ingest"
+
+
+class HttpReceiverHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.headers_seen.append(dict(self.headers))
+        self.server.batches.append(gzip.decompress(body).splitlines())
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TcpReceiver(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0):
+        super().__init__(('127.0.0.1', port), TcpReceiverHandler)
+        self.batches = []
+
+    @property
+    def url(self):
+        return f"tcp://127.0.0.1:{self.server_address[1]}"
+
+
+class TcpReceiverHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        while True:
+            header = self.rfile.read(4)
+            if len(header) < 4:
+                return
+            (length,) = struct.unpack('>I', header)
+            self.server.batches.append(gzip.decompress(self.rfile.read(length)).splitlines())
+
+
+def serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def http_receiver():
+    server = serve(HttpReceiver())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def tcp_receiver():
+    server = serve(TcpReceiver())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_http_batches_gzip_ndjson(http_receiver, tmp_path, wait_until):
+    forwarder = EntryForwarder(http_receiver.url, batch_lines=5, flush_interval=0.2,
+                               spool_directory=str(tmp_path / "spool"))
+    for number in range(12):
+        forwarder.submit(make_record(number))
+    forwarder.start()
+    assert wait_until(lambda: sum(map(len, http_receiver.batches)) == 12)
+    forwarder.stop()
+
+    assert [len(batch) for batch in http_receiver.batches] == [5, 5, 2]
+    assert messages(http_receiver.batches) == [f"entry {number}" for number in range(12)]
+    headers = http_receiver.headers_seen[0]
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['Content-Type'] == 'application/x-ndjson'
+    first = json.loads(http_receiver.batches[0][0])
+    assert first == {'event_time': None, 'level': 'info', 'source': 'app.log', 'framework': 'laravel',
+                     'application': 'legacy-app', 'message': 'entry 0', 'fields': None}
+    assert forwarder.stats['sent'] == 12 and forwarder.stats['batches'] == 3
+
+
+def test_tcp_length_prefixed_frames(tcp_receiver, tmp_path, wait_until):
+    forwarder = EntryForwarder(tcp_receiver.url, batch_lines=4, flush_interval=0.2,
+                               spool_directory=str(tmp_path / "spool"))
+    forwarder.start()
+    for number in range(10):
+        forwarder.submit(make_record(number))
+    assert wait_until(lambda: sum(map(len, tcp_receiver.batches)) == 10)
+    forwarder.stop()
+
+    assert messages(tcp_receiver.batches) == [f"entry {number}" for number in range(10)]
+    assert max(len(batch) for batch in tcp_receiver.batches) <= 4
+
+
+def test_downstream_down_spools_then_drains_in_order(tmp_path, wait_until):
+    port = free_port()
+    spool = tmp_path / "spool"
+    forwarder = EntryForwarder(f"tcp://127.0.0.1:{port}", batch_lines=3, flush_interval=0.05,
+                               spool_directory=str(spool), initial_backoff=0.05, max_backoff=0.2)
+    forwarder.start()
+    for number in range(9):
+        forwarder.submit(make_record(number))
+    assert wait_until(lambda: forwarder.stats['spooled'] == 9)
+    assert len(list(spool.glob("*.ndjson.gz"))) == 3
+
+    # New entries arriving while spooled data is pending queue up behind it
+    for number in range(9, 12):
+        forwarder.submit(make_record(number))
+    receiver = serve(TcpReceiver(port))
+    try:
+        assert wait_until(lambda: sum(map(len, receiver.batches)) == 12)
+        forwarder.stop()
+        assert messages(receiver.batches) == [f"entry {number}" for number in range(12)]
+        assert not list(spool.glob("*.ndjson.gz"))
+        assert forwarder.stats['failures'] > 0
+        assert forwarder.stats['dropped'] == 0
+    finally:
+        receiver.shutdown()
+        receiver.server_close()
+
+
+def test_spool_is_bounded_dropping_oldest(tmp_path):
+    spool = tmp_path / "spool"
+    forwarder = EntryForwarder(f"tcp://127.0.0.1:{free_port()}", spool_directory=str(spool),
+                               spool_max_bytes=10000)
+    # Incompressible batches of about 3 KiB each
+    for batch in range(8):
+        payload = gzip.compress(os.urandom(3000))
+        forwarder._spool(payload, 10)
+    files = sorted(spool.glob("*.ndjson.gz"))
+    assert sum(path.stat().st_size for path in files) <= 10000
+    assert len(files) == 3
+    assert forwarder.stats['spooled'] == 80
+    assert forwarder.stats['dropped'] == 50
+    # The newest batches survive
+    assert [path.name.split('-')[1] for path in files] == ['000006', '000007', '000008']
+
+
+def test_full_queue_drops_without_blocking(tmp_path):
+    forwarder = EntryForwarder("http://127.0.0.1:9/ingest", queue_size=3,
+                               spool_directory=str(tmp_path / "spool"))
+    started = time.monotonic()
+    for number in range(10):
+        forwarder.submit(make_record(number))
+    assert time.monotonic() - started < 0.5
+    assert forwarder.queue.qsize() == 3
+    assert forwarder.stats['dropped'] == 7
+    assert forwarder.get_status()['queued'] == 3
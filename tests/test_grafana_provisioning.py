@@ -0,0 +1,190 @@
+"""Dashboard provisioning against a local stub Grafana"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import grafana_client
+import setup_dashboards
+from grafana_client import create_session, wait_for_grafana
+from setup_dashboards import GrafanaDashboardSetup
+
+
+class StubGrafana(ThreadingHTTPServer):
+    """Health, datasource and dashboard endpoints, with dashboards stored per org"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubGrafanaHandler)
+        self.unhealthy = 0  # Health checks to fail before answering 200
+        self.import_delay = 0.0
+        self.dashboards = {}  # (org, uid) -> dashboard
+        self.imports = []  # (org, uid) per import request
+        self.datasources = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubGrafanaHandler(BaseHTTPRequestHandler):
+
+    def _reply(self, status, body=None):
+        data = json.dumps(body or {}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _org(self):
+        return self.headers.get('X-Grafana-Org-Id', '1')
+
+    def do_GET(self):
+        stub = self.server
+        if self.path == '/api/health':
+            with stub.lock:
+                healthy = stub.unhealthy <= 0
+                stub.unhealthy -= 1
+            self._reply(200 if healthy else 503)
+        elif self.path == '/api/datasources/name/Prometheus':
+            self._reply(200 if self._org() in stub.datasources else 404)
+        elif self.path.startswith('/api/dashboards/uid/'):
+            dashboard = stub.dashboards.get((self._org(), self.path.rsplit('/', 1)[1]))
+            self._reply(200 if dashboard else 404, {'dashboard': dashboard} if dashboard else None)
+        else:
+            self._reply(404)
+
+    def do_POST(self):
+        stub = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if self.path == '/api/datasources':
+            stub.datasources.add(self._org())
+            self._reply(200)
+        elif self.path == '/api/dashboards/import':
+            with stub.lock:
+                stub.in_flight += 1
+                stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+            time.sleep(stub.import_delay)
+            dashboard = body['dashboard']
+            with stub.lock:
+                stub.in_flight -= 1
+                stub.dashboards[(self._org(), dashboard['uid'])] = dashboard
+                stub.imports.append((self._org(), dashboard['uid']))
+            self._reply(200)
+        else:
+            self._reply(404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def grafana():
+    server = StubGrafana()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def dashboards_dir(tmp_path):
+    directory = tmp_path / "dashboards"
+    directory.mkdir()
+    for name in ("service_overview.json", "error_budget.json"):
+        (directory / name).write_text(json.dumps({"dashboard": {"id": 7, "title": name, "panels": []}}))
+    return directory
+
+
+def make_setup(grafana, dashboards_dir, **kwargs):
+    setup = GrafanaDashboardSetup(grafana.url, **kwargs)
+    setup.dashboards_dir = dashboards_dir
+    return setup
+
+
+def test_wait_for_grafana_backs_off_exponentially(grafana, monkeypatch):
+    delays = []
+    monkeypatch.setattr(grafana_client.time, "sleep", delays.append)
+    grafana.unhealthy = 5
+    session = create_session(("admin", "admin"))
+    assert wait_for_grafana(session, grafana.url, initial_delay=0.1, max_delay=0.5)
+    assert delays == pytest.approx([0.1, 0.2, 0.4, 0.5, 0.5])
+
+
+def test_wait_for_grafana_gives_up_after_max_attempts(grafana, monkeypatch):
+    delays = []
+    monkeypatch.setattr(grafana_client.time, "sleep", delays.append)
+    grafana.unhealthy = 100
+    session = create_session(("admin", "admin"))
+    assert not wait_for_grafana(session, grafana.url, max_attempts=4)
+    assert len(delays) == 4
+
+
+def test_uid_derived_from_file_name(tmp_path):
+    path = tmp_path / "payment_service_dashboard.json"
+    path.write_text(json.dumps({"dashboard": {"id": 3, "title": "Payments"}}))
+    dashboard = GrafanaDashboardSetup.load_dashboard(path)
+    assert dashboard["uid"] == "payment-service-dashboard"
+    assert dashboard["id"] is None
+
+    long_path = tmp_path / ("x" * 60 + ".json")
+    long_path.write_text(json.dumps({"dashboard": {"title": "Long"}}))
+    assert len(GrafanaDashboardSetup.load_dashboard(long_path)["uid"]) == 40
+
+    path.write_text(json.dumps({"dashboard": {"uid": "kept", "title": "Payments"}}))
+    assert GrafanaDashboardSetup.load_dashboard(path)["uid"] == "kept"
+
+
+def test_content_hash_ignores_server_fields(tmp_path):
+    path = tmp_path / "board.json"
+    path.write_text(json.dumps({"dashboard": {"id": 1, "version": 4, "title": "Board"}}))
+    first = GrafanaDashboardSetup.load_dashboard(path)["provisioningHash"]
+    path.write_text(json.dumps({"dashboard": {"id": 9, "version": 12, "title": "Board"}}))
+    assert GrafanaDashboardSetup.load_dashboard(path)["provisioningHash"] == first
+    path.write_text(json.dumps({"dashboard": {"id": 9, "title": "Board v2"}}))
+    assert GrafanaDashboardSetup.load_dashboard(path)["provisioningHash"] != first
+
+
+def test_unchanged_dashboards_are_skipped(grafana, dashboards_dir):
+    assert make_setup(grafana, dashboards_dir).import_all_dashboards()
+    assert len(grafana.imports) == 2
+
+    assert make_setup(grafana, dashboards_dir).import_all_dashboards()
+    assert len(grafana.imports) == 2
+
+    # A content change is re-imported, the other dashboard is still skipped
+    changed = dashboards_dir / "error_budget.json"
+    changed.write_text(json.dumps({"dashboard": {"title": "Error budget v2", "panels": []}}))
+    assert make_setup(grafana, dashboards_dir).import_all_dashboards()
+    assert grafana.imports[2:] == [("1", "error-budget")]
+
+
+def test_force_reimports_unchanged_dashboards(grafana, dashboards_dir):
+    assert make_setup(grafana, dashboards_dir).import_all_dashboards()
+    assert make_setup(grafana, dashboards_dir, force=True).import_all_dashboards()
+    assert len(grafana.imports) == 4
+
+
+def test_multi_org_provisioning_with_workers(grafana, dashboards_dir, monkeypatch):
+    grafana.import_delay = 0.05
+    monkeypatch.chdir(dashboards_dir.parent)
+    monkeypatch.setattr(sys, "argv", [
+        "setup_dashboards.py", "--url", grafana.url,
+        "--org", "1", "--org", "2", "--org", "3", "--workers", "4"
+    ])
+    setup_dashboards.main()
+
+    assert grafana.datasources == {"1", "2", "3"}
+    assert sorted(grafana.imports) == sorted(
+        (org, uid) for org in ("1", "2", "3") for uid in ("error-budget", "service-overview")
+    )
+    assert 1 < grafana.max_in_flight <= 4
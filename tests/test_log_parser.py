@@ -0,0 +1,118 @@
+"""LogParser behaviour that does not need a metrics server or a watcher"""
+
+import re
+import threading
+import time
+
+import pytest
+
+from classifier_benchmark import load_corpus
+from field_extractor import compile_variants
+from log_parser import LogParser
+
+FIELD_LINES = [
+    "2025-07-05 12:00:00 [INFO] GET /api/orders/42 200 153ms",
+    "[2025-07-05 12:00:00] INFO django.request: GET /api/users/7 - 200 [87ms]",
+    "INFO: 2025-07-05 12:00:00 - POST /api/items - 10.0.0.1 - 201 - 45ms",
+    '[2025-07-05 12:00:00] local.ERROR: Slow query {"time":1200}',
+    "2025-07-05T12:00:00Z ERROR payment failed\n  File \"pay.py\", line 3\nValueError: declined",
+]
+
+
+def test_process_log_line_without_monitoring(capsys):
+    """monitoring=False parsers have no metrics; processing must still work"""
+    parser = LogParser(detect_anomalies=False, monitoring=False)
+    assert parser.metrics is None
+    assert parser.process_log_line("[2025-01-01 00:00:00] local.ERROR: payment failed", "app.log")
+    assert parser.process_log_line(b"[2025-01-01 00:00:00] local.INFO: ok\n", "app.log")
+    assert not parser.process_log_line("no level marker here", "app.log")
+    assert parser.series_counts == {("app.log", "error"): 1, ("app.log", "info"): 1}
+    assert "Error processing line" not in capsys.readouterr().out
+
+
+
+class YieldingDict(dict):
+    """Gives up the GIL between reading a counter and writing it back"""
+    
+    def get(self, key, default=None):
+        value = super().get(key, default)
+        time.sleep(0)
+        return value
+
+
+def test_flush_timer_and_watcher_do_not_lose_counts(tmp_path, monkeypatch):
+    """Records expired by the flush timer race the watcher's own records"""
+    from prometheus_client import CollectorRegistry
+    
+    parser = LogParser(str(tmp_path), detect_anomalies=False, registry=CollectorRegistry(),
+                       exporter='collector', memory_accounting=False, field_sketches=False,
+                       multiline=True)
+    monkeypatch.setattr(parser, 'print_record', lambda record: None)
+    monkeypatch.setattr(parser, 'store_record', lambda record: None)
+    parser.series_counts = YieldingDict()
+    parser.aggregates.entries = YieldingDict()
+    parser.assembler.flush_timeout = 0.0  # Every open record is due at once
+    files, rounds, per_round = 4, 50, 20
+    done = threading.Event()
+    
+    def watcher(path):
+        for number in range(rounds):
+            with open(path, 'a') as f:
+                for line in range(per_round):
+                    level = 'ERROR' if line % 2 else 'INFO'
+                    f.write(f"2025-07-05 12:00:00 {level} job {number}-{line}\n")
+            parser.process_new_lines(path)
+    
+    def flusher():
+        while not done.is_set():
+            parser.flush_records()
+    
+    flush_thread = threading.Thread(target=flusher)
+    flush_thread.start()
+    try:
+        watchers = [threading.Thread(target=watcher, args=(tmp_path / f"app-{n}.log",)) for n in range(files)]
+        for thread in watchers:
+            thread.start()
+        for thread in watchers:
+            thread.join()
+    finally:
+        done.set()
+        flush_thread.join()
+    parser.flush_records(force=True)
+    
+    expected = rounds * per_round // 2
+    for n in range(files):
+        source = f"app-{n}.log"
+        assert parser.series_counts[(source, 'error')] == expected
+        assert parser.series_counts[(source, 'info')] == expected
+        assert parser.aggregates.entries[('error', source, 'unknown')] == expected
+    assert sum(parser.aggregates.entries.values()) == files * rounds * per_round
+
+
+@pytest.mark.parametrize("line", [record["line"] for record in load_corpus()] + FIELD_LINES)
+def test_bytes_and_text_lines_classify_alike(line):
+    parser = LogParser(detect_anomalies=False, monitoring=False)
+    text = parser.classify_line(line, "api.log", now=1751716800.0)
+    raw = parser.classify_line(line.encode("utf-8"), "api.log", now=1751716800.0)
+    if text is None:
+        assert raw is None
+        return
+    assert isinstance(raw["line"], bytes)
+    assert parser.record_text(raw) == text["line"]
+    assert raw == text
+
+
+def test_invalid_utf8_is_replaced_once_needed():
+    parser = LogParser(extract_fields=False, detect_anomalies=False, monitoring=False)
+    record = parser.classify_line(b"ERROR: bad byte \xff in caf\xc3\xa9 \xe2\x82\n", "app.log")
+    assert record["level"] == "error"
+    assert record["line"] == b"ERROR: bad byte \xff in caf\xc3\xa9 \xe2\x82"  # Not decoded yet
+    assert parser.record_text(record) == "ERROR: bad byte \ufffd in caf\u00e9 \ufffd"
+    assert record["line"] == "ERROR: bad byte \ufffd in caf\u00e9 \ufffd"  # Decoded once, then kept
+
+
+def test_compile_variants_match_text_and_bytes():
+    variants = compile_variants(r"\bERROR\b", re.IGNORECASE)
+    assert variants[str].search("an error here")
+    assert variants[bytes].search(b"an error here")
+    assert not variants[bytes].search(b"errors")
@@ -0,0 +1,61 @@
+"""The scrape-time collector must expose what LogMetrics exposes"""
+
+from prometheus_client import CollectorRegistry, generate_latest
+
+from log_parser import LogParser
+from metrics_collector import AggregateCollector, AggregateMetrics
+
+LINES = [
+    ("2025-07-05 12:00:00 [INFO] GET /api/orders/42 200 153ms", "orders.log"),
+    ("2025-07-05 12:00:01 [ERROR] POST /api/orders 500 2300ms", "orders.log"),
+    ("[2025-07-05 12:00:02] INFO django.request: GET /api/users/7 - 200 [87ms]", "users.log"),
+    ("[2025-07-05 12:00:03] WARNING django.db: Slow query (340ms)", "users.log"),
+    ('[2025-07-05 12:00:04] local.ERROR: Slow query {"time":1200}', "app.log"),
+    ("CRITICAL: 2025-07-05 12:00:05 - Database connection lost", "api.log"),
+    ("WARNING: disk usage at 91%", "api.log"),
+    (b"ERROR: 2025-07-05 12:00:06 - bad byte \xff", "api.log"),
+]
+
+
+def exposition(exporter):
+    registry = CollectorRegistry()
+    parser = LogParser(detect_anomalies=False, registry=registry, exporter=exporter,
+                       memory_accounting=False, field_sketches=False)
+    for number, (line, source) in enumerate(LINES * 3):
+        record = parser.classify_line(line, source, now=1751716810.0 + number)
+        record['store'] = number % 4 != 0  # Some entries shed by sampling
+        parser.record_metrics(record)
+    return sorted(
+        line for line in generate_latest(registry).decode().splitlines()
+        if '_created' not in line
+    )
+
+
+def test_collector_matches_client_exposition():
+    client = exposition('client')
+    collector = exposition('collector')
+    assert any(line.startswith('log_request_latency_seconds_bucket') for line in client)
+    assert any(line.startswith('log_ingestion_lag_seconds_count') for line in client)
+    assert collector == client
+
+
+def test_scrapes_within_a_tick_share_a_snapshot():
+    aggregates = AggregateMetrics()
+    collector = AggregateCollector(aggregates, tick=60.0)
+    record = {'level': 'error', 'source': 'app.log', 'framework': 'laravel',
+              'lag': None, 'store': True, 'fields': None, 'application': 'legacy-app'}
+
+    def entries(families):
+        family = next(family for family in families if family.name == 'log_entries')
+        return {sample.labels['level']: sample.value for sample in family.samples}
+
+    aggregates.record(record)
+    first = collector.collect()
+    assert entries(first) == {'error': 1}
+    aggregates.record(record)
+    assert collector.collect() is first  # Same tick: cached
+
+    collector.cached_at -= 60.0
+    assert entries(collector.collect()) == {'error': 2}
+    # Registering only describes the families; no snapshot is built for it
+    assert [family.samples for family in collector.describe()][0] == []
@@ -0,0 +1,105 @@
+"""Staged ingestion pipeline: ordering, backpressure and draining on stop"""
+
+import threading
+import time
+
+import pytest
+from prometheus_client import CollectorRegistry
+
+from log_parser import LogParser
+from pipeline import IngestionPipeline
+
+
+def make_parser(tmp_path, monkeypatch, **kwargs):
+    parser = LogParser(str(tmp_path), detect_anomalies=False, registry=CollectorRegistry(),
+                       memory_accounting=False, field_sketches=False, **kwargs)
+    stored = {}
+    monkeypatch.setattr(parser, 'print_record', lambda record: None)
+    monkeypatch.setattr(parser, 'store_record',
+                        lambda record: stored.setdefault(record['source'], []).append(parser.record_text(record)))
+    return parser, stored
+
+
+def write_lines(path, start, count):
+    with open(path, 'a') as f:
+        for number in range(start, start + count):
+            f.write(f"2025-07-05 12:00:00 ERROR job {number}\n")
+
+
+def expected_lines(start, count):
+    return [f"2025-07-05 12:00:00 ERROR job {number}" for number in range(start, start + count)]
+
+
+def test_per_file_order_is_kept(tmp_path, monkeypatch):
+    parser, stored = make_parser(tmp_path, monkeypatch)
+    parser.pipeline = IngestionPipeline(parser, readers=3, batch_lines=7, read_bytes=512)
+    parser.pipeline.start()
+    paths = [tmp_path / f"app-{number}.log" for number in range(4)]
+    for chunk in range(10):
+        for path in paths:
+            write_lines(path, chunk * 50, 50)
+            parser.process_new_lines(path)
+    parser.pipeline.join()
+    parser.pipeline.stop()
+
+    assert set(stored) == {path.name for path in paths}
+    for lines in stored.values():
+        assert lines == expected_lines(0, 500)
+
+
+def test_full_queues_block_the_stages_before_them(tmp_path, monkeypatch):
+    parser, stored = make_parser(tmp_path, monkeypatch)
+    release = threading.Event()
+    store = parser.store_record
+
+    def stuck_store(record):
+        release.wait()
+        store(record)
+
+    monkeypatch.setattr(parser, 'store_record', stuck_store)
+    queue_size, batch_lines = 2, 10
+    parser.pipeline = IngestionPipeline(parser, queue_size=queue_size, batch_lines=batch_lines)
+    parser.pipeline.start()
+    path = tmp_path / "app.log"
+    write_lines(path, 0, 1000)
+    parser.process_new_lines(path)
+
+    def progress():
+        return sum(parser.series_counts.values())
+
+    # Storage is stuck: the classifier stops once the storage queue is full,
+    # so the other sinks only see the few batches already in flight
+    time.sleep(0.3)
+    stalled = progress()
+    time.sleep(0.2)
+    assert progress() == stalled
+    assert stalled <= batch_lines * (2 * queue_size + 3)
+    status = parser.pipeline.get_status()
+    assert status['storage']['queue_depth'] == queue_size
+    assert all(stage['queue_depth'] <= queue_size for stage in status.values())
+
+    release.set()
+    parser.pipeline.join()
+    parser.pipeline.stop()
+    assert progress() == 1000
+    assert stored['app.log'] == expected_lines(0, 1000)
+
+
+@pytest.mark.parametrize("multiline", [False, True])
+def test_stop_drains_everything(tmp_path, monkeypatch, multiline):
+    parser, stored = make_parser(tmp_path, monkeypatch, multiline=multiline)
+    parser.pipeline = IngestionPipeline(parser, batch_lines=25)
+    parser.pipeline.start()
+    paths = [tmp_path / f"app-{number}.log" for number in range(3)]
+    for path in paths:
+        write_lines(path, 0, 300)
+        parser.process_new_lines(path)
+    # No join: stop() alone must see every submitted file through every stage
+    parser.pipeline.stop()
+
+    assert parser.pipeline.threads == {}
+    for path in paths:
+        assert stored[path.name] == expected_lines(0, 300)
+        assert parser.series_counts[(path.name, 'error')] == 300
+    if multiline:
+        assert parser.assembler.get_status()['open_records'] == 0
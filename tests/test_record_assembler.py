@@ -0,0 +1,76 @@
+"""Multi-line record assembly"""
+
+from record_assembler import RecordAssembler
+
+TRACEBACK = [
+    "2025-07-05 12:00:00,001 ERROR worker: job failed\n",
+    "Traceback (most recent call last):\n",
+    '  File "worker.py", line 10, in run\n',
+    "    charge(order)\n",
+    "ValueError: card expired\n",
+]
+
+
+def test_traceback_is_one_record():
+    records = list(RecordAssembler().assemble('/logs/worker.log', TRACEBACK + [
+        "2025-07-05 12:00:01,000 INFO worker: next job\n"
+    ]))
+    assert len(records) == 2
+    assert records[0].splitlines() == [line.rstrip('\n') for line in TRACEBACK]
+
+
+def test_java_frames_and_caused_by_are_joined():
+    lines = [
+        "2025-07-05 12:00:00 ERROR [main] c.e.Service - request failed\n",
+        "java.lang.IllegalStateException: closed\n",
+        "\tat com.example.Service.call(Service.java:42)\n",
+        "Caused by: java.io.IOException: reset\n",
+        "\t... 12 more\n",
+    ]
+    assert len(list(RecordAssembler().assemble('/logs/app.log', lines))) == 1
+
+
+def test_leveled_lines_without_start_pattern_are_new_records():
+    assembler = RecordAssembler()
+    lines = [
+        b"2025-07-05 12:00:00 INFO checkout started\n",
+        b"  cart has 3 items\n",
+        b"ERROR payment declined for order 9\n",
+        b"Fatal error: out of memory\n",
+        b"wrapped text without a level\n",
+    ]
+    records = list(assembler.assemble('/logs/shop.log', lines))
+    assert records == [
+        b"2025-07-05 12:00:00 INFO checkout started\n  cart has 3 items",
+        b"ERROR payment declined for order 9\n",
+        b"Fatal error: out of memory\nwrapped text without a level",
+    ]
+
+
+def test_unknown_format_only_joins_recognizable_continuations():
+    records = list(RecordAssembler().assemble('/logs/plain.log', [
+        "something happened\n", "another thing\n", "  indented detail\n"
+    ]))
+    assert records == ["something happened\n", "another thing\n  indented detail"]
+
+
+def test_same_named_files_keep_separate_records():
+    assembler = RecordAssembler(flush_timeout=1.0)
+    first, second = '/srv/api/logs/app.log', '/srv/web/logs/app.log'
+    assert assembler.feed(first, [TRACEBACK[0], TRACEBACK[1]], now=100.0, source='app.log') == []
+    # The other file's record start must not close the first file's traceback
+    assert assembler.feed(second, ["2025-07-05 12:00:00,500 INFO web: up\n"], now=100.0,
+                          source='app.log') == []
+    assert assembler.feed(first, TRACEBACK[2:], now=100.0, source='app.log') == []
+
+    expired = sorted(assembler.expire(now=101.0))
+    assert [source for source, _ in expired] == ['app.log', 'app.log']
+    assert sorted(len(record.splitlines()) for _, record in expired) == [1, 5]
+    assert assembler.get_status()['open_records'] == 0
+
+
+def test_quiet_records_expire_after_timeout():
+    assembler = RecordAssembler(flush_timeout=0.25)
+    assembler.feed('/logs/a.log', TRACEBACK, now=10.0, source='a.log')
+    assert assembler.expire(now=10.1) == []
+    assert [source for source, _ in assembler.expire(now=10.3)] == ['a.log']
@@ -0,0 +1,58 @@
+"""Recording rule generation and dashboard rewriting on copies of the bundled files"""
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from recording_rules import RECORDED_SERIES, iter_expressions, load_rules, main
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    shutil.copytree(ROOT / "dashboards", tmp_path / "dashboards")
+    for name in ("grafana_dashboard.json", "grafana_alert_config.json"):
+        shutil.copy(ROOT / name, tmp_path / name)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def queried_series(directory):
+    series = set()
+    for path in list(directory.glob("dashboards/*.json")) + [directory / "grafana_dashboard.json"]:
+        for expr in iter_expressions(json.loads(path.read_text())):
+            series.update(RECORDED_SERIES.findall(expr))
+    return series
+
+
+def test_rules_match_bundled_file(workdir):
+    assert main([]) == 0
+    assert load_rules(workdir / "recording_rules.yml") == load_rules(ROOT / "recording_rules.yml")
+
+
+def test_rerun_after_rewrite_keeps_every_queried_rule(workdir):
+    assert main(["--rewrite"]) == 0
+    rules = load_rules(workdir / "recording_rules.yml")
+    queried = queried_series(workdir)
+    assert queried and queried <= set(rules)
+
+    # The dashboards now query recorded series only; a plain re-run must not drop them
+    assert main([]) == 0
+    assert load_rules(workdir / "recording_rules.yml") == rules
+
+
+def test_rewrite_is_idempotent(workdir):
+    assert main(["--rewrite"]) == 0
+    dashboards = {path: path.read_text() for path in workdir.glob("dashboards/*.json")}
+    assert main(["--rewrite"]) == 0
+    assert {path: path.read_text() for path in dashboards} == dashboards
+
+
+def test_undefined_recorded_series_are_reported(workdir, capsys):
+    assert main(["--rewrite"]) == 0
+    (workdir / "recording_rules.yml").unlink()
+    assert main([]) == 0
+    assert "Queried but not defined" in capsys.readouterr().out
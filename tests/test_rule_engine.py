@@ -0,0 +1,154 @@
+"""User rule sets: literal extraction, the Aho-Corasick prefilter and rule files"""
+
+import json
+import os
+import random
+from pathlib import Path
+
+import pytest
+
+from log_parser import LogParser
+from rule_engine import LiteralAutomaton, Rule, RuleEngine, RuleMatcher, required_literals
+
+EXAMPLE_RULES = Path(__file__).resolve().parent.parent / "examples" / "rules.yml"
+
+RULES = [
+    Rule('card', 'credit card declined', level='critical', applications=['payment-service']),
+    Rule('gateway', 'payment gateway (timeout|unavailable)', level='critical'),
+    Rule('disk', 'disk (full|quota exceeded)|no space left', level='error'),
+    Rule('reset', r'conn(ection)? reset by peer', level='warning'),
+    Rule('colour', r'colou?r mismatch', level='info'),
+    Rule('oom', 'OutOfMemory', level='critical'),
+    Rule('spring', r'\[\s*main\] o\.s\.b\.', framework='spring', ignore_case=False),
+    Rule('slow', r'\b\d{4,}ms\b', level='warning'),  # No literal: always run
+    Rule('short', 'ab|cd', level='debug'),  # Literals too short to prefilter on
+    Rule('retries', r'(?:retry)+ exhausted', level='error'),
+    Rule('rails', r'ActionController::\w+', framework='rails'),
+]
+
+WORDS = [
+    'credit', 'card', 'declined', 'payment', 'gateway', 'timeout', 'unavailable', 'disk', 'full',
+    'quota exceeded', 'no space left', 'conn', 'connection', 'reset by peer', 'color', 'colour',
+    'mismatch', 'OUTOFMEMORY', 'outofmemoryerror', '[main] o.s.b.', '[ main] O.S.B.', '12000ms',
+    '5ms', 'ab', 'retryretry exhausted', 'exhausted', 'ActionController::RoutingError', 'ok', 'Ünïcode',
+]
+
+
+def reference(rules, line, application):
+    """Every rule's regex run in file order, without the prefilter"""
+    level = framework = None
+    for rule in rules:
+        if rule.applications and application not in rule.applications:
+            continue
+        if (level or not rule.level) and (framework or not rule.framework):
+            continue
+        if (rule.bytes_regex if isinstance(line, bytes) else rule.regex).search(line):
+            level = level or rule.level
+            framework = framework or rule.framework
+    return level, framework
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ('credit card declined', {'credit card declined'}),
+    ('payment gateway (timeout|unavailable)', {'payment gateway '}),
+    ('(foo|ab)bar', {'bar'}),
+    ('(timeout|unavailable) upstream', {' upstream'}),
+    ('(timeouts|unavailable)!', {'timeouts', 'unavailable'}),
+    (r'conn(ection)? reset', {' reset'}),
+    ('OutOfMemory', {'outofmemory'}),
+    (r'\b\d{4,}ms\b', None),
+    ('ab|cd', None),
+    ('(unclosed', None),
+])
+def test_required_literals(pattern, expected):
+    literals = required_literals(pattern)
+    assert (set(literals) if literals is not None else None) == expected
+
+
+def test_automaton_reports_overlapping_literals():
+    automaton = LiteralAutomaton({'he': (0,), 'she': (1,), 'his': (2,), 'hers': (3,)})
+    assert automaton.search('ushers') == {0, 1, 3}
+    assert automaton.search('history') == {2}
+    assert automaton.search('nothing') == set()
+    raw = LiteralAutomaton({b'she': (1,), b'hers': (3,)})
+    assert raw.search(b'ushers') == {1, 3}
+
+
+def test_literal_free_rules_are_always_run():
+    matcher = RuleMatcher(RULES)
+    assert {RULES[index].name for index in matcher.always} == {'slow', 'short'}
+
+
+@pytest.mark.parametrize("application", ['payment-service', 'user-service'])
+def test_prefilter_agrees_with_every_regex(application):
+    matcher = RuleMatcher(RULES)
+    generator = random.Random(41)
+    lines = [' '.join(generator.choice(WORDS) for _ in range(generator.randint(1, 5))) for _ in range(2000)]
+    matched = 0
+    for line in lines:
+        expected = reference(RULES, line, application)
+        assert matcher.match(line, application) == expected, line
+        assert matcher.match(line.encode('utf-8'), application) == expected, line
+        matched += expected != (None, None)
+    assert matched > 1000  # The vocabulary exercises the rules, not just misses
+
+
+def test_rules_apply_in_file_order():
+    matcher = RuleMatcher([
+        Rule('first', 'gateway', level='warning'),
+        Rule('second', 'payment gateway timeout', level='critical', framework='spring'),
+    ])
+    assert matcher.match('payment gateway timeout', 'app') == ('warning', 'spring')
+
+
+def test_invalid_rules_are_rejected():
+    with pytest.raises(ValueError):
+        Rule('bad-level', 'x', level='fatal')
+    with pytest.raises(ValueError):
+        Rule('no-effect', 'x')
+
+
+def test_example_rule_file():
+    engine = RuleEngine([str(EXAMPLE_RULES)])
+    assert engine.get_status()['rules'] == 5
+    assert engine.get_status()['prefiltered'] == 5
+    assert engine.match('credit card declined for order 7', 'payment-service') == ('critical', None)
+    assert engine.match('credit card declined for order 7', 'user-service') == (None, None)
+    assert engine.match(b'External API timeout: stripe', 'user-service') == ('warning', None)
+    assert engine.match('[  main] o.s.b.SpringApplication started', 'api') == (None, 'spring')
+    # ignore_case: false
+    assert engine.match('[  MAIN] O.S.B.SpringApplication started', 'api') == (None, None)
+
+
+def test_json_rules_reload_and_keep_previous_on_error(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({'rules': [{'pattern': 'quota exceeded', 'level': 'error'}]}))
+    engine = RuleEngine([str(path)])
+    assert engine.matcher.rules[0].name == 'rules.json#1'
+    assert engine.match('QUOTA EXCEEDED', 'app') == ('error', None)
+    assert not engine.maybe_reload()
+
+    path.write_text(json.dumps({'rules': [{'pattern': 'quota exceeded', 'level': 'warning'}]}))
+    os.utime(path, (1, 1))
+    assert engine.maybe_reload()
+    assert engine.match('quota exceeded', 'app') == ('warning', None)
+
+    path.write_text(json.dumps({'rules': [{'pattern': 'quota', 'level': 'loud'}]}))
+    os.utime(path, (2, 2))
+    assert not engine.maybe_reload()
+    assert engine.match('quota exceeded', 'app') == ('warning', None)
+
+    path.unlink()
+    assert engine.maybe_reload()
+    assert engine.get_status()['rules'] == 0
+
+
+def test_rules_take_precedence_over_built_in_patterns():
+    parser = LogParser(detect_anomalies=False, monitoring=False, rule_files=[str(EXAMPLE_RULES)])
+    record = parser.classify_line("INFO: credit card declined for order 7", 'payment-service.log')
+    assert record['level'] == 'critical'
+    # Only the rules' own application
+    assert parser.classify_line("INFO: credit card declined", 'user-service.log')['level'] == 'info'
+    # A framework-only rule leaves the level to the built-ins
+    record = parser.classify_line(b"ERROR ActionController::RoutingError", 'web.log')
+    assert (record['level'], record['framework']) == ('error', 'rails')
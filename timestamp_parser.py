@@ -0,0 +1,81 @@
+"""
+Event-time parsing
+Extracts the timestamp embedded in a log line without calling strptime per line
+"""
+
+import re
+from datetime import datetime
+from typing import AnyStr, Dict, Optional, Tuple
+
+_STAMP = r'(\d{4})-(\d{2})-(\d{2})[ T](\d{2}):(\d{2}):(\d{2})'
+
+
+class TimestampParser:
+    """Per-source cached timestamp layout detection with a memoized last second"""
+
+    # Anchored layouts, most common first. A source's layout is detected once
+    # and tried first afterwards; 'anywhere' is the unanchored fallback.
+    LAYOUTS = [
+        ('bracketed', re.compile(r'\[' + _STAMP)),            # Django, Laravel
+        ('leading', re.compile(_STAMP)),                       # Express, Ansible
+        ('level_prefix', re.compile(r'[A-Z]+: ' + _STAMP)),    # FastAPI
+    ]
+    ANYWHERE = re.compile(_STAMP)
+    
+    # The same layouts for raw bytes lines; int() accepts the bytes groups as-is
+    BYTES_LAYOUTS = [(name, re.compile(pattern.pattern.encode())) for name, pattern in LAYOUTS]
+    BYTES_ANYWHERE = re.compile(_STAMP.encode())
+
+    def __init__(self):
+        # source -> index into LAYOUTS (or -1 for the unanchored fallback)
+        self.source_layouts: Dict[str, int] = {}
+        # (date, time) group tuple of the last parsed second -> (epoch, datetime)
+        self.last_second: Optional[Tuple] = None
+        self.last_value: Optional[Tuple[float, datetime]] = None
+
+    def _match(self, line: AnyStr, source: str):
+        if isinstance(line, bytes):
+            layouts, anywhere = self.BYTES_LAYOUTS, self.BYTES_ANYWHERE
+        else:
+            layouts, anywhere = self.LAYOUTS, self.ANYWHERE
+
+        index = self.source_layouts.get(source)
+        if index is not None:
+            pattern = layouts[index][1] if index >= 0 else anywhere
+            match = pattern.match(line) if index >= 0 else pattern.search(line)
+            if match:
+                return match
+
+        for candidate, (_, pattern) in enumerate(layouts):
+            match = pattern.match(line)
+            if match:
+                self.source_layouts[source] = candidate
+                return match
+
+        match = anywhere.search(line)
+        if match:
+            self.source_layouts[source] = -1
+        return match
+
+    def parse(self, line: AnyStr, source: str) -> Optional[Tuple[float, datetime]]:
+        """
+        Parse the event time of a line (str or raw bytes).
+
+        Returns:
+            (epoch seconds, naive local datetime), or None if the line has no timestamp
+        """
+        match = self._match(line, source)
+        if not match:
+            return None
+
+        groups = match.groups()
+        if groups == self.last_second:
+            return self.last_value
+
+        try:
+            event_time = datetime(*map(int, groups))
+        except ValueError:
+            return None
+        self.last_second = groups
+        self.last_value = (event_time.timestamp(), event_time)
+        return self.last_value